@@ -0,0 +1,47 @@
+# analytics - 库存预警与预测分析的无界面计算核心（不依赖 Streamlit）
+# 导出名称在首次访问时才导入所在模块：python -m analytics.backtest 等入口运行前包内不预先加载任何子模块
+import importlib
+
+_EXPORTS = {
+    'accuracy': ['accuracy_table', 'calculate_forecast_accuracy', 'error_metrics', 'error_sums', 'finalize_metrics',
+                 'process_forecast_data', 'quantity_accuracy'],
+    'backtest': ['run_backtest', 'summarize'],
+    'cache': ['read_excel_cached'],
+    'charts': ['create_depletion_chart', 'create_error_dashboard', 'create_forecast_dashboard',
+               'create_risk_analysis_dashboard'],
+    'config': ['ACTUAL_COL', 'ADMIN_ROLE', 'CACHE_DIR', 'COLOR_SCHEME', 'DATA_FILES', 'DEFAULT_PRICE', 'RISK_POLICY_FILE',
+               'RISK_THRESHOLDS', 'FORECAST_COL', 'SHIPMENT_STORE_DIR', 'TIMINGS_FILE'],
+    'cube': ['AccuracyCube'],
+    'depletion': ['DepletionProjection', 'monthly_demand', 'simulate_depletion'],
+    'diff': ['diff_snapshots', 'diff_summary'],
+    'errors': ['ErrorProfile'],
+    'export': ['EXPORT_FORMATS', 'ExportFile', 'FrameQuery', 'iter_csv', 'write_export'],
+    'forecasting': ['MACHINE_COL', 'fit_forecast', 'machine_forecasts', 'series_matrix'],
+    'instrument': ['Timings', 'profiled', 'stage', 'timed'],
+    'incremental': ['ShipmentStore', 'monthly_actuals'],
+    'metrics': ['calculate_key_metrics'],
+    'pipeline': ['data_version', 'forecast_analysis', 'load_and_process_data'],
+    'policy': ['DEFAULT_POLICY', 'RiskPolicy', 'compare_policies', 'evaluate_policies', 'load_policies', 'load_policy'],
+    'pricing': ['PriceIndex'],
+    'query': ['BatchQuery'],
+    'risk': ['build_product_name_map', 'classify_age', 'process_inventory', 'risk_label', 'with_risk_labels'],
+    'schema': ['SCHEMAS', 'SchemaError', 'load_sources', 'read_source', 'validate_frame'],
+    'sketch': ['QuantileSketch'],
+    'timeline': ['RiskTimeline'],
+}
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = sorted(_MODULES)
+
+
+def __getattr__(name):
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
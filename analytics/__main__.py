@@ -0,0 +1,74 @@
+# analytics/__main__.py - 批处理入口：与 Streamlit 页面相同的计算，结果写入目录
+# 用法: python -m analytics --data-dir . --output-dir output [--figures] [--timings] [--profile]
+import argparse
+import json
+from contextlib import nullcontext
+from pathlib import Path
+
+import pandas as pd
+
+from .accuracy import process_forecast_data
+from .config import RISK_POLICY_FILE
+from .errors import PROFILE_DIMS, ErrorProfile
+from .instrument import Timings, profiled
+from .pipeline import load_and_process_data
+from .policy import compare_policies, load_policies
+from .risk import with_risk_labels
+
+
+def run(args, out):
+    """执行与页面相同的计算并写出结果文件"""
+    policies = load_policies(Path(args.data_dir) / RISK_POLICY_FILE)
+    policy = policies[args.policy] if args.policy else next(iter(policies.values()))
+    processed_inventory, forecast_accuracy, shipment_df, forecast_df, metrics, _, price_index, actual_monthly = \
+        load_and_process_data(args.data_dir, policy, pd.Timestamp(args.as_of) if args.as_of else None)
+    merged_data = process_forecast_data(shipment_df, forecast_df, actual_monthly)
+
+    out.mkdir(parents=True, exist_ok=True)
+    with_risk_labels(processed_inventory, policy).to_csv(out / '批次风险.csv', index=False, encoding='utf-8-sig')
+    compare_policies(processed_inventory, policies.values()).to_csv(out / '风险策略对比.csv', index=False,
+                                                                   encoding='utf-8-sig')
+    forecast_accuracy.to_csv(out / '预测准确率.csv', index=False, encoding='utf-8-sig')
+    merged_data.to_csv(out / '预测对比.csv', index=False, encoding='utf-8-sig')
+    error_profile = ErrorProfile.build(merged_data)
+    for dim in PROFILE_DIMS:
+        error_profile.summary(dim).to_csv(out / f"误差分布_{dim.replace('所属', '')}.csv", index=False,
+                                          encoding='utf-8-sig')
+    price_index.fallback_report().to_csv(out / '默认单价物料.csv', index=False, encoding='utf-8-sig')
+    with open(out / 'metrics.json', 'w', encoding='utf-8') as f:
+        json.dump(metrics, f, ensure_ascii=False, indent=2, default=int)
+
+    if args.figures:
+        from .charts import create_forecast_dashboard, create_risk_analysis_dashboard
+        create_risk_analysis_dashboard(processed_inventory, policy).write_html(out / '风险分析.html')
+        create_forecast_dashboard(merged_data).write_html(out / '预测分析.html')
+
+    print(json.dumps(metrics, ensure_ascii=False, indent=2, default=int))
+    print(f'结果已写入 {out}/')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='库存预警与预测准确率批处理')
+    parser.add_argument('--data-dir', default='.', help='工作簿所在目录')
+    parser.add_argument('--output-dir', default='output')
+    parser.add_argument('--figures', action='store_true', help='同时输出仪表盘 HTML')
+    parser.add_argument('--policy', help='风险策略名（默认取配置中的默认策略）')
+    parser.add_argument('--as-of', help='分析基准日期，如 2025-02-21（默认为当前时间）')
+    parser.add_argument('--timings', action='store_true', help='记录各阶段耗时/行数/峰值内存并写入 timings.json')
+    parser.add_argument('--profile', action='store_true', help='用 cProfile 剖析本次运行并写入 profile.prof')
+    args = parser.parse_args(argv)
+
+    out = Path(args.output_dir)
+    timings = Timings(memory=True).start() if args.timings else None
+    try:
+        with profiled(out / 'profile.prof') if args.profile else nullcontext():
+            run(args, out)
+    finally:
+        if timings is not None:
+            timings.stop()
+            print(timings.to_frame().to_string(index=False))
+            print(f"阶段记录已写入 {timings.write_json(out / 'timings.json')}")
+
+
+if __name__ == '__main__':
+    main()
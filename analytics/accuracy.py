@@ -0,0 +1,149 @@
+# analytics/accuracy.py - 向量化预测准确率内核与误差指标
+import numpy as np
+import pandas as pd
+
+from .config import ACTUAL_COL, FORECAST_COL
+from .forecasting import MACHINE_COL, machine_forecasts
+from .incremental import monthly_actuals
+from .instrument import timed
+
+METRIC_COLUMNS = ['准确率', 'MAPE', 'WMAPE', '偏差']
+
+
+def quantity_accuracy(actual, forecast):
+    """数量准确率：max(0, 1 - |实际 - 预测| / (实际 + 1))，支持标量与数组"""
+    actual = np.asarray(actual, dtype=float)
+    forecast = np.asarray(forecast, dtype=float)
+    return np.maximum(0, 1 - np.abs(actual - forecast) / (actual + 1))
+
+
+def _ratio(numerator, denominator):
+    """分母为 0 时返回 NaN 的逐元素除法"""
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator != 0, numerator / denominator, np.nan)
+
+
+def error_metrics(actual, forecast):
+    """整体误差指标：准确率、MAPE、WMAPE、偏差（均为比例）"""
+    actual = np.asarray(actual, dtype=float)
+    forecast = np.asarray(forecast, dtype=float)
+    abs_err = np.abs(actual - forecast)
+    positive = actual > 0
+    total = actual.sum()
+    return {
+        '准确率': float(quantity_accuracy(total, forecast.sum())),
+        'MAPE': float(np.mean(abs_err[positive] / actual[positive])) if positive.any() else np.nan,
+        'WMAPE': float(_ratio(abs_err.sum(), total)),
+        '偏差': float(_ratio(forecast.sum() - total, total))
+    }
+
+
+def error_sums(df, by, actual_col=ACTUAL_COL, forecast_col=FORECAST_COL):
+    """按维度汇总实际、预测及误差的可加中间量（可再次上卷）"""
+    by = [by] if isinstance(by, str) else list(by)
+    actual = df[actual_col].to_numpy(dtype=float)
+    forecast = df[forecast_col].to_numpy(dtype=float)
+    abs_err = np.abs(actual - forecast)
+    ape = _ratio(abs_err, np.where(actual > 0, actual, 0))
+
+    work = df[by].copy()
+    work[actual_col] = actual
+    work[forecast_col] = forecast
+    work['_abs'] = abs_err
+    work['_ape'] = np.nan_to_num(ape)
+    work['_ape_n'] = ~np.isnan(ape)
+    if not by:
+        return work.sum().to_frame().T
+    return work.groupby(by, sort=True).sum().reset_index()
+
+
+def finalize_metrics(sums, actual_col=ACTUAL_COL, forecast_col=FORECAST_COL, scale=100):
+    """由可加中间量计算准确率、MAPE、WMAPE、偏差"""
+    table = sums.copy()
+    table['准确率'] = quantity_accuracy(table[actual_col], table[forecast_col]) * scale
+    table['MAPE'] = _ratio(table['_ape'], table['_ape_n']) * scale
+    table['WMAPE'] = _ratio(table['_abs'], table[actual_col]) * scale
+    table['偏差'] = _ratio(table[forecast_col] - table[actual_col], table[actual_col]) * scale
+    return table.drop(columns=['_abs', '_ape', '_ape_n'])
+
+
+def accuracy_table(df, by, actual_col=ACTUAL_COL, forecast_col=FORECAST_COL, scale=100):
+    """按维度汇总实际/预测并计算准确率与误差指标
+
+    准确率按汇总后的实际与预测计算（与原看板口径一致），MAPE 为组内
+    实际大于 0 的明细行平均，WMAPE/偏差以组内实际总量为分母；指标乘以 scale。
+    """
+    sums = error_sums(df, by, actual_col, forecast_col)
+    return finalize_metrics(sums, actual_col, forecast_col, scale)
+
+
+@timed('预测准确率')
+def calculate_forecast_accuracy(actual_monthly, forecast_df):
+    """计算预测准确率（actual_monthly 为出货月度汇总，forecast_df 为经 schema 校验的预测表）
+
+    actual_monthly 取 monthly_actuals() 或 ShipmentStore.monthly() 的结果（不再接收出货明细）；
+    按 (月份, 产品) 汇总，所属区域为空的出货同样计入。
+
+    此处不捕获异常：列名或类型问题由加载时的 SchemaError 报告，不会表现为 0% 准确率。
+    """
+    shipment_monthly = actual_monthly.groupby(['所属年月', '产品代码'])[ACTUAL_COL].sum().reset_index()
+    shipment_monthly['年月'] = pd.to_datetime(shipment_monthly.pop('所属年月'), format='%Y-%m')
+    
+    merged = forecast_df.merge(
+        shipment_monthly,
+        left_on=['所属年月', '产品代码'],
+        right_on=['年月', '产品代码'],
+        how='inner'
+    )
+    
+    merged['预测误差'] = abs(merged[FORECAST_COL] - merged[ACTUAL_COL])
+    merged['预测准确率'] = 1 - (merged['预测误差'] / (merged[ACTUAL_COL] + 1))
+    merged['预测准确率'] = merged['预测准确率'].clip(0, 1)
+    
+    return merged
+
+
+@timed('预测对比合并')
+def process_forecast_data(shipment_df, forecast_df, actual_monthly=None, machine_method='auto'):
+    """处理预测数据（actual_monthly 为已物化的出货月度汇总，缺省时由 shipment_df 汇总）
+
+    同时按出货历史生成机器基线预测，与人工预测并列计算准确率。
+    """
+    # 转换日期格式（不修改传入的 forecast_df）
+    forecast_month = forecast_df['所属年月']
+    if pd.api.types.is_datetime64_any_dtype(forecast_month):
+        forecast_month = forecast_month.dt.strftime('%Y-%m')
+    
+    # 按月份、区域、产品码汇总数据（区域×产品对比不含所属区域为空的出货）
+    if actual_monthly is None:
+        actual_monthly = monthly_actuals(shipment_df)
+    actual_monthly = actual_monthly[actual_monthly['所属区域'].notna()]
+
+    forecast_monthly = forecast_df.assign(所属年月=forecast_month).groupby(['所属年月', '所属区域', '产品代码']).agg({
+        '预计销售量': 'sum'
+    }).reset_index()
+
+    # 合并数据
+    merged_monthly = pd.merge(
+        actual_monthly,
+        forecast_monthly,
+        on=['所属年月', '所属区域', '产品代码'],
+        how='outer'
+    ).fillna(0)
+
+    # 机器基线预测（无出货历史的序列记为 0）
+    machine = machine_forecasts(actual_monthly, machine_method, until=merged_monthly['所属年月'].max())
+    merged_monthly = merged_monthly.merge(
+        machine[['所属年月', '所属区域', '产品代码', MACHINE_COL]],
+        on=['所属年月', '所属区域', '产品代码'],
+        how='left'
+    )
+    merged_monthly[MACHINE_COL] = merged_monthly[MACHINE_COL].fillna(0)
+
+    # 计算准确率
+    merged_monthly['数量准确率'] = quantity_accuracy(merged_monthly['求和项:数量（箱）'], merged_monthly['预计销售量'])
+    merged_monthly['机器准确率'] = quantity_accuracy(merged_monthly['求和项:数量（箱）'], merged_monthly[MACHINE_COL])
+
+    return merged_monthly
@@ -0,0 +1,145 @@
+# analytics/backtest.py - 预测方法的滚动起点回测（进程池 + 共享内存）
+# 夜间批处理: python -m analytics.backtest --start 2024-09 --end 2025-02 --horizon 3 --workers 4
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from .accuracy import accuracy_table, quantity_accuracy
+from .config import DATA_FILES
+from .forecasting import SERIES_KEYS, fit_forecast, series_matrix
+from .incremental import monthly_actuals
+from .schema import read_source
+
+DEFAULT_METHODS = ['seasonal_naive', 'ses', 'croston', 'auto']
+
+
+def _backtest_chunk(shm_name, shape, start, stop, origins, methods, horizon):
+    """子进程：挂载共享内存中的序列矩阵，对 [start, stop) 行做全部起点的回测"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        Y = np.ndarray(shape, dtype=float, buffer=shm.buf)[start:stop]
+        result = {}
+        for method in methods:
+            preds = np.full((len(origins), stop - start, horizon), np.nan)
+            for i, origin in enumerate(origins):
+                _, preds[i], _ = fit_forecast(Y[:, :origin], method, horizon)
+            result[method] = preds
+        return start, stop, result
+    finally:
+        shm.close()
+
+
+def _chunks(n_rows, chunk_size):
+    return [(start, min(start + chunk_size, n_rows)) for start in range(0, n_rows, chunk_size)]
+
+
+def run_backtest(actual_monthly, start, end, horizon=1, methods=DEFAULT_METHODS,
+                 workers=None, chunk_size=2000, keys=SERIES_KEYS):
+    """滚动起点回测：起点依次取 start..end 各月，用此前历史预测后续 horizon 个月
+
+    返回逐序列结果表，含与 calculate_forecast_accuracy() 同口径的预测准确率与数量准确率。
+    """
+    index, months, Y = series_matrix(actual_monthly, keys)
+    for label, month in [('起点', start), ('末月', end)]:
+        if month not in months:
+            raise ValueError(f'回测{label} {month} 不在数据月份范围 {months[0]}..{months[-1]} 内')
+    first, last = months.index(start), months.index(end)
+    if first > last:
+        raise ValueError(f'回测起点 {start} 晚于末月 {end}')
+    origins = list(range(max(first, 1), last + 1))
+    workers = workers or os.cpu_count() or 1
+
+    preds = {method: np.full((len(origins), len(Y), horizon), np.nan) for method in methods}
+    shm = shared_memory.SharedMemory(create=True, size=max(Y.nbytes, 1))
+    try:
+        np.ndarray(Y.shape, dtype=float, buffer=shm.buf)[:] = Y
+        tasks = [(shm.name, Y.shape, a, b, origins, list(methods), horizon)
+                 for a, b in _chunks(len(Y), chunk_size)]
+        if workers == 1:
+            outputs = [_backtest_chunk(*task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                outputs = list(pool.map(_backtest_chunk, *zip(*tasks)))
+        for a, b, result in outputs:
+            for method, block in result.items():
+                preds[method][:, a:b] = block
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return _to_frame(index, months, Y, origins, preds, horizon, last)
+
+
+def _to_frame(index, months, Y, origins, preds, horizon, last):
+    """回测结果展开为长表，只保留目标月份不晚于回测窗口末月的记录"""
+    n = len(index)
+    origin_idx, series_idx, step_idx = np.meshgrid(
+        np.arange(len(origins)), np.arange(n), np.arange(horizon), indexing='ij')
+    target = np.asarray(origins)[origin_idx] + step_idx
+    valid = (target <= last).ravel()
+
+    series = index.to_frame(index=False).iloc[series_idx.ravel()[valid]].reset_index(drop=True)
+    months = np.asarray(months)
+    frames = []
+    for method, values in preds.items():
+        frame = series.copy()
+        frame.insert(0, '方法', method)
+        frame.insert(1, '预测起点', months[np.asarray(origins)[origin_idx].ravel()[valid]])
+        frame.insert(2, '所属年月', months[target.ravel()[valid]])
+        frame.insert(3, '期数', step_idx.ravel()[valid] + 1)
+        frame['实际'] = Y[series_idx.ravel()[valid], target.ravel()[valid]]
+        frame['预测'] = np.maximum(values.ravel()[valid], 0)
+        frames.append(frame)
+    result = pd.concat(frames, ignore_index=True)
+
+    # 与 calculate_forecast_accuracy() / process_forecast_data() 相同的准确率口径
+    result['预测误差'] = np.abs(result['预测'] - result['实际'])
+    result['预测准确率'] = (1 - result['预测误差'] / (result['实际'] + 1)).clip(0, 1)
+    result['数量准确率'] = quantity_accuracy(result['实际'], result['预测'])
+    return result
+
+
+def summarize(result):
+    """按方法×期数汇总：明细平均准确率与汇总口径误差指标"""
+    table = accuracy_table(result, ['方法', '期数'], actual_col='实际', forecast_col='预测')
+    means = result.groupby(['方法', '期数'])[['预测准确率', '数量准确率']].mean().mul(100).reset_index()
+    return means.merge(table, on=['方法', '期数'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='预测方法滚动起点回测')
+    parser.add_argument('--shipment', default=DATA_FILES['shipment'], help='出货数据工作簿')
+    parser.add_argument('--start', default='2024-09', help='首个预测起点月份')
+    parser.add_argument('--end', default='2025-02', help='回测窗口末月')
+    parser.add_argument('--horizon', type=int, default=1)
+    parser.add_argument('--methods', nargs='+', default=DEFAULT_METHODS)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--output', help='逐序列结果输出路径（.parquet 或 .csv）')
+    args = parser.parse_args(argv)
+
+    actual_monthly = monthly_actuals(read_source(args.shipment, 'shipment')[0])
+    began = time.perf_counter()
+    try:
+        result = run_backtest(actual_monthly, args.start, args.end, args.horizon, args.methods,
+                              args.workers, args.chunk_size)
+    except ValueError as error:
+        parser.error(str(error))
+    elapsed = time.perf_counter() - began
+
+    print(summarize(result).round(2).to_string(index=False))
+    print(f'{result.groupby("方法").size().iloc[0]:,} 条/方法，耗时 {elapsed:.2f}s')
+    if args.output:
+        if args.output.endswith('.csv'):
+            result.to_csv(args.output, index=False, encoding='utf-8-sig')
+        else:
+            result.to_parquet(args.output, index=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+# analytics/cache.py - Excel 数据源的列式磁盘缓存（大小/修改时间/内容哈希失效）
+# 预热: python -m analytics.cache [--data-dir .] [--clear]
+# 缓存默认位于工作簿所在目录下的 CACHE_DIR，不同数据目录互不影响
+import argparse
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from .config import CACHE_DIR, DATA_FILES
+
+try:
+    import pyarrow  # noqa: F401
+    CACHE_FORMAT = 'parquet'
+except ImportError:
+    CACHE_FORMAT = 'pickle'
+
+# 需要统一为字符串才能写入列式文件的混合类型
+_MIXED_TYPES = {'mixed', 'mixed-integer'}
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """计算文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_version(path):
+    """由大小与修改时间生成的文件版本标识（不读取内容）"""
+    stat = os.stat(path)
+    return f'{stat.st_size}:{stat.st_mtime_ns}'
+
+
+def source_signature(path, read_kwargs=None):
+    """数据源签名：大小、修改时间、内容哈希与读取参数"""
+    stat = os.stat(path)
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': file_digest(path),
+        'read_kwargs': repr(sorted((read_kwargs or {}).items())),
+        'format': CACHE_FORMAT
+    }
+
+
+def frame_suffix():
+    """当前缓存格式的文件后缀"""
+    return '.parquet' if CACHE_FORMAT == 'parquet' else '.pkl'
+
+
+def default_cache_dir(data_dir='.'):
+    """数据目录下的列式缓存目录"""
+    return Path(data_dir) / CACHE_DIR
+
+
+def _cache_paths(path, cache_dir):
+    """缓存文件与清单文件路径（cache_dir 为 None 时取工作簿所在目录下的缓存目录）"""
+    source = Path(path).resolve()
+    key = hashlib.sha1(str(source).encode('utf-8')).hexdigest()[:8]
+    stem = Path(cache_dir or default_cache_dir(Path(path).parent)) / f'{source.stem}-{key}'
+    return stem.with_suffix(frame_suffix()), stem.with_suffix('.json')
+
+
+def _to_columnar(df):
+    """混合类型的 object 列统一为字符串（保留空值），其余列保持原类型"""
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True) in _MIXED_TYPES:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def write_frame(df, data_path):
+    """原子写入列式文件"""
+    tmp_path = data_path.with_name(data_path.name + '.tmp')
+    if CACHE_FORMAT == 'parquet':
+        df.to_parquet(tmp_path, index=False)
+    else:
+        df.to_pickle(tmp_path)
+    os.replace(tmp_path, data_path)
+
+
+def read_frame(data_path):
+    """读取列式文件"""
+    if CACHE_FORMAT == 'parquet':
+        return pd.read_parquet(data_path)
+    return pd.read_pickle(data_path)
+
+
+def cache_status(path, cache_dir=None, **read_kwargs):
+    """返回 (是否命中, 当前签名)"""
+    data_path, meta_path = _cache_paths(path, cache_dir)
+    signature = source_signature(path, read_kwargs)
+    if not (data_path.exists() and meta_path.exists()):
+        return False, signature
+    with open(meta_path, encoding='utf-8') as f:
+        cached = json.load(f)
+    hit = all(cached.get(k) == signature[k] for k in signature)
+    return hit, signature
+
+
+def read_excel_cached(path, cache_dir=None, **read_kwargs):
+    """读取工作簿：签名未变时直接读取列式缓存，否则解析 Excel 并写入缓存"""
+    data_path, meta_path = _cache_paths(path, cache_dir)
+    hit, signature = cache_status(path, cache_dir, **read_kwargs)
+    if hit:
+        return read_frame(data_path)
+
+    df = _to_columnar(pd.read_excel(path, **read_kwargs))
+    data_path.parent.mkdir(parents=True, exist_ok=True)
+    write_frame(df, data_path)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(signature, rows=len(df)), f, ensure_ascii=False, indent=2)
+    return df
+
+
+def clear_cache(cache_dir=None, data_dir='.'):
+    """删除全部缓存文件（cache_dir 默认为数据目录下的缓存目录）"""
+    removed = 0
+    for item in Path(cache_dir or default_cache_dir(data_dir)).glob('*'):
+        if item.suffix in ('.parquet', '.pkl', '.json', '.tmp'):
+            item.unlink()
+            removed += 1
+    return removed
+
+
+def warm_cache(data_dir='.', cache_dir=None, files=None, read_kwargs=None):
+    """预热缓存，返回每个数据源的冷/热加载耗时（read_kwargs 为 {数据源: read_excel 参数}）"""
+    read_kwargs = read_kwargs or {}
+    report = []
+    for name, file_name in (files or DATA_FILES).items():
+        path = Path(data_dir) / file_name
+        if not path.exists():
+            report.append({'数据源': name, '文件': file_name, '状态': '缺失'})
+            continue
+
+        kwargs = read_kwargs.get(name, {})
+        hit, _ = cache_status(path, cache_dir, **kwargs)
+        start = time.perf_counter()
+        df = read_excel_cached(path, cache_dir, **kwargs)
+        first = time.perf_counter() - start
+
+        start = time.perf_counter()
+        read_excel_cached(path, cache_dir, **kwargs)
+        warm = time.perf_counter() - start
+
+        report.append({
+            '数据源': name,
+            '文件': file_name,
+            '状态': '已缓存' if hit else '新建',
+            '行数': len(df),
+            '冷加载(s)': None if hit else round(first, 3),
+            '热加载(s)': round(warm, 3)
+        })
+    return pd.DataFrame(report)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='预热 Excel 数据源的列式缓存')
+    parser.add_argument('--data-dir', default='.', help='工作簿所在目录')
+    parser.add_argument('--cache-dir', help=f'缓存目录（默认为 数据目录/{CACHE_DIR}）')
+    parser.add_argument('--clear', action='store_true', help='先清空缓存，测量冷加载耗时')
+    args = parser.parse_args(argv)
+
+    cache_dir = args.cache_dir or default_cache_dir(args.data_dir)
+    if args.clear:
+        print(f'已清除 {clear_cache(cache_dir)} 个缓存文件')
+    print(f'缓存格式: {CACHE_FORMAT}，目录: {cache_dir}')
+    # 与加载流水线使用相同的读取参数（只读所需列），否则预热的缓存不会命中
+    from .schema import source_read_kwargs
+    read_kwargs = {name: source_read_kwargs(name) for name in DATA_FILES}
+    print(warm_cache(args.data_dir, cache_dir, read_kwargs=read_kwargs).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
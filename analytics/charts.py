@@ -0,0 +1,320 @@
+# analytics/charts.py - Plotly 仪表盘构建（不依赖 Streamlit）
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from .config import CHART_MAX_POINTS, COLOR_SCHEME, WEBGL_MIN_POINTS
+from .cube import AccuracyCube
+from .forecasting import MACHINE_COL
+from .instrument import timed
+from .policy import DEFAULT_POLICY, RISK_COLORS
+from .risk import risk_label
+
+
+def histogram_bars(values, nbins, color, hover_format=',.0f'):
+    """服务端分箱的直方图柱（只发送 nbins 个计数而非原始样本，图表数据量与批次数无关）"""
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    counts, edges = np.histogram(values, bins=nbins) if len(values) else (np.zeros(0, dtype=int), np.zeros(1))
+    return go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        hovertemplate=f'%{{customdata[0]:{hover_format}}} ~ %{{customdata[1]:{hover_format}}}：%{{y:,}}<extra></extra>',
+        marker_color=color,
+        opacity=0.7,
+        showlegend=False
+    )
+
+
+def scatter_trace(n_points, **kwargs):
+    """点数较多时用 WebGL 散点（Scattergl），否则用 SVG 散点"""
+    return (go.Scattergl if n_points > WEBGL_MIN_POINTS else go.Scatter)(**kwargs)
+
+
+def high_risk_products(processed_inventory, max_points=CHART_MAX_POINTS):
+    """高风险及以上批次按物料汇总（价值加权库龄、总价值、总数量、批次数），取价值最高的 max_points 个物料
+
+    风险等级取该物料最老批次的等级。
+    """
+    data = processed_inventory[processed_inventory['风险等级'].isin(['极高风险', '高风险'])]
+    if data.empty:
+        return pd.DataFrame(columns=['物料', '产品名称', '批次价值', '数量', '批次数', '库龄', '风险等级'])
+    data = data.assign(_加权库龄=data['库龄'].astype(float) * data['批次价值'])
+    grouped = data.groupby('物料', observed=True)
+    result = grouped.agg(产品名称=('产品名称', 'first'), _加权库龄=('_加权库龄', 'sum'), 批次价值=('批次价值', 'sum'),
+                         数量=('数量', 'sum'), 批次数=('库龄', 'size'), _最大库龄=('库龄', 'idxmax'))
+    oldest = data.loc[result['_最大库龄']]
+    value = result['批次价值']
+    result['库龄'] = (result['_加权库龄'] / value).where(value > 0, oldest['库龄'].to_numpy())
+    result['风险等级'] = oldest['风险等级'].values
+    result = result.drop(columns=['_加权库龄', '_最大库龄']).reset_index()
+    return result.nlargest(max_points, '批次价值')
+
+
+@timed('图表:风险仪表盘')
+def create_risk_analysis_dashboard(processed_inventory, policy=None):
+    """创建紧凑的风险分析仪表盘（库龄阈值线取自风险策略）"""
+    policy = policy or DEFAULT_POLICY
+    # 风险分布数据
+    risk_counts = processed_inventory['风险等级'].value_counts()
+    risk_counts = risk_counts[risk_counts > 0]
+    risk_value = processed_inventory.groupby('风险等级', observed=True)['批次价值'].sum() / 1000000
+    
+    # 创建2x2子图
+    fig = make_subplots(
+        rows=2, cols=2,
+        subplot_titles=("风险等级分布", "各风险等级价值分布", "库存批次库龄分布", "高风险批次分析"),
+        specs=[[{"type": "pie"}, {"type": "bar"}],
+               [{"type": "bar"}, {"type": "scatter"}]],
+        vertical_spacing=0.12,
+        horizontal_spacing=0.1
+    )
+    
+    # 1. 风险等级分布饼图
+    fig.add_trace(go.Pie(
+        labels=risk_counts.index,
+        values=risk_counts.values,
+        hole=.4,
+        marker_colors=risk_label(risk_counts.index, '风险颜色'),
+        textinfo='label+percent',
+        showlegend=False
+    ), row=1, col=1)
+    
+    # 2. 风险等级价值分布
+    fig.add_trace(go.Bar(
+        x=risk_value.index,
+        y=risk_value.values,
+        marker_color=risk_label(risk_value.index, '风险颜色'),
+        text=[f'¥{v:.1f}M' for v in risk_value.values],
+        textposition='auto',
+        showlegend=False
+    ), row=1, col=2)
+    
+    # 3. 库龄分布直方图（服务端分箱）
+    fig.add_trace(histogram_bars(processed_inventory['库龄'], 15, COLOR_SCHEME['primary']),
+                  row=2, col=1, exclude_empty_subplots=False)
+    
+    # 4. 高风险批次散点图（按物料汇总，点数有上限）
+    high_risk_data = high_risk_products(processed_inventory)
+    
+    if not high_risk_data.empty:
+        fig.add_trace(scatter_trace(
+            len(high_risk_data),
+            x=high_risk_data['库龄'],
+            y=high_risk_data['批次价值'],
+            mode='markers',
+            marker=dict(
+                size=np.clip(high_risk_data['数量']/15, 8, 30),
+                color=risk_label(high_risk_data['风险等级'], '风险颜色'),
+                opacity=0.8,
+                line=dict(width=1, color='white')
+            ),
+            text=high_risk_data['产品名称'].astype(str) + '（' + high_risk_data['批次数'].astype(str) + ' 个批次）',
+            showlegend=False
+        ), row=2, col=2)
+    
+    # 更新布局
+    fig.update_layout(
+        height=700,
+        title_text="库存风险综合分析仪表盘",
+        title_x=0.5,
+        title_font=dict(size=20, color='#333'),
+        showlegend=False
+    )
+    
+    # 添加库龄阈值线
+    for start, code in zip(policy.bins, policy.codes[1:]):
+        fig.add_vline(x=start, line_dash="dash", line_color=RISK_COLORS[code], row=2, col=1, exclude_empty_subplots=False)
+    
+    return fig
+
+
+@timed('图表:预测仪表盘')
+def create_forecast_dashboard(merged_data, cube=None, machine_cube=None):
+    """创建预测分析仪表盘 - 按照附件维度（各层级指标取自准确率立方体）"""
+    if cube is None:
+        cube = AccuracyCube(merged_data)
+    if machine_cube is None and MACHINE_COL in merged_data.columns:
+        machine_cube = AccuracyCube(merged_data, forecast_col=MACHINE_COL)
+    
+    # 计算各项指标
+    # 1. 全国准确率趋势
+    monthly_national = cube.slice('所属年月')
+    
+    # 2. 区域准确率对比
+    regional_accuracy = cube.slice('所属区域')
+    
+    # 3. 产品准确率分析
+    product_accuracy = cube.slice('产品代码')
+    product_accuracy = product_accuracy.nlargest(10, '求和项:数量（箱）')
+    
+    # 4. 预测准确率分布（服务端分箱）
+    accuracy_distribution = merged_data['数量准确率'].to_numpy(dtype=float) * 100
+    
+    # 创建2x2子图布局
+    fig = make_subplots(
+        rows=2, cols=2,
+        subplot_titles=("预测准确率月度趋势", "各区域预测准确率对比", "TOP10产品预测准确率", "预测准确率分布"),
+        specs=[[{"type": "scatter"}, {"type": "bar"}],
+               [{"type": "bar"}, {"type": "bar"}]],
+        vertical_spacing=0.12,
+        horizontal_spacing=0.1
+    )
+    
+    # 1. 月度趋势
+    fig.add_trace(go.Scatter(
+        x=monthly_national['所属年月'],
+        y=monthly_national['准确率'],
+        mode='lines+markers',
+        name='准确率',
+        line=dict(color=COLOR_SCHEME['primary'], width=3),
+        marker=dict(size=8),
+        showlegend=False
+    ), row=1, col=1)
+    
+    # 机器基线对照
+    if machine_cube is not None:
+        monthly_machine = machine_cube.slice('所属年月')
+        fig.add_trace(go.Scatter(
+            x=monthly_machine['所属年月'],
+            y=monthly_machine['准确率'],
+            mode='lines+markers',
+            name='机器基线准确率',
+            line=dict(color=COLOR_SCHEME['secondary'], width=2, dash='dot'),
+            marker=dict(size=6),
+            showlegend=False
+        ), row=1, col=1)
+    
+    # 添加目标线
+    fig.add_hline(y=85, line_dash="dash", line_color="red", row=1, col=1)
+    
+    # 2. 区域对比
+    colors_regional = [COLOR_SCHEME['risk_low'] if acc > 85 else 
+                      COLOR_SCHEME['risk_medium'] if acc > 75 else 
+                      COLOR_SCHEME['risk_high'] for acc in regional_accuracy['准确率']]
+    
+    fig.add_trace(go.Bar(
+        x=regional_accuracy['所属区域'],
+        y=regional_accuracy['准确率'],
+        marker_color=colors_regional,
+        text=[f'{acc:.1f}%' for acc in regional_accuracy['准确率']],
+        textposition='auto',
+        showlegend=False
+    ), row=1, col=2)
+    
+    fig.add_hline(y=85, line_dash="dash", line_color="red", row=1, col=2)
+    
+    # 3. 产品准确率
+    colors_product = [COLOR_SCHEME['risk_low'] if acc > 85 else 
+                     COLOR_SCHEME['risk_medium'] if acc > 75 else 
+                     COLOR_SCHEME['risk_high'] for acc in product_accuracy['准确率']]
+    
+    fig.add_trace(go.Bar(
+        y=product_accuracy['产品代码'],
+        x=product_accuracy['准确率'],
+        orientation='h',
+        marker_color=colors_product,
+        text=[f'{acc:.1f}%' for acc in product_accuracy['准确率']],
+        textposition='auto',
+        showlegend=False
+    ), row=2, col=1, exclude_empty_subplots=False)
+    
+    # 4. 准确率分布
+    fig.add_trace(histogram_bars(accuracy_distribution, 20, COLOR_SCHEME['secondary'], '.1f'), row=2, col=2)
+    
+    # 更新布局
+    fig.update_layout(
+        height=700,
+        title_text="销售预测准确性综合分析仪表盘",
+        title_x=0.5,
+        title_font=dict(size=20, color='#333'),
+        showlegend=False
+    )
+    
+    return fig
+
+
+@timed('图表:库龄推演')
+def create_depletion_chart(summary):
+    """库龄推演图：各月末按风险等级堆叠的剩余库存价值，叠加预期损失"""
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    
+    for level, data in summary.groupby('风险等级', observed=True, sort=True):
+        fig.add_trace(go.Bar(
+            x=data['月份'],
+            y=data['剩余价值'] / 1000000,
+            name=level,
+            marker_color=risk_label([level], '风险颜色')[0]
+        ), secondary_y=False)
+    
+    loss = summary.groupby('月份')['预期损失'].sum() / 1000000
+    fig.add_trace(go.Scatter(
+        x=loss.index,
+        y=loss.values,
+        mode='lines+markers',
+        name='预期损失',
+        line=dict(color=COLOR_SCHEME['secondary'], width=3),
+        marker=dict(size=8)
+    ), secondary_y=True)
+    
+    fig.update_layout(
+        barmode='stack',
+        height=420,
+        title_text="未来各月库存风险推演（先进先出消耗预测销量）",
+        title_x=0.5,
+        legend=dict(orientation='h', y=-0.15)
+    )
+    fig.update_yaxes(title_text="剩余库存价值 (¥M)", secondary_y=False)
+    fig.update_yaxes(title_text="预期损失 (¥M)", secondary_y=True)
+    
+    return fig
+
+
+@timed('图表:误差分布')
+def create_error_dashboard(profile, by='所属区域', top=8):
+    """误差分布与偏差趋势：各分组 P50/P90 绝对误差及按月的带符号偏差（只画实际销量前 top 组）"""
+    trend = profile.bias_trend(by)
+    keys = trend.groupby(by)['实际'].sum().nlargest(top).index
+    trend = trend[trend[by].isin(keys)]
+    quantiles = profile.error_quantiles(by)
+    quantiles = quantiles[quantiles[by].isin(keys)]
+    
+    fig = make_subplots(
+        rows=1, cols=2,
+        subplot_titles=("绝对误差分位数（箱）", "预测偏差月度趋势（正值为高估）"),
+        horizontal_spacing=0.1
+    )
+    
+    for column, color in [('P50绝对误差', COLOR_SCHEME['primary']), ('P90绝对误差', COLOR_SCHEME['secondary'])]:
+        fig.add_trace(go.Bar(
+            x=quantiles[by],
+            y=quantiles[column],
+            name=column.replace('绝对误差', ''),
+            marker_color=color,
+            text=[f'{v:,.0f}' for v in quantiles[column]],
+            textposition='auto'
+        ), row=1, col=1)
+    
+    for key, data in trend.groupby(by, sort=True):
+        fig.add_trace(go.Scatter(
+            x=data['所属年月'],
+            y=data['偏差'],
+            mode='lines+markers',
+            name=str(key),
+            marker=dict(size=6)
+        ), row=1, col=2)
+    
+    fig.add_hline(y=0, line_dash="dash", line_color="gray", row=1, col=2)
+    fig.update_layout(
+        barmode='group',
+        height=420,
+        title_text="预测误差分布与偏差分析",
+        title_x=0.5,
+        legend=dict(orientation='h', y=-0.15)
+    )
+    fig.update_yaxes(title_text="偏差 (%)", row=1, col=2)
+    
+    return fig
@@ -0,0 +1,59 @@
+# analytics/config.py - 配色方案与库龄风险阈值表
+
+# 配色方案
+COLOR_SCHEME = {
+    'primary': '#667eea',
+    'secondary': '#764ba2',
+    'risk_extreme': '#ff4757',
+    'risk_high': '#ff6348',
+    'risk_medium': '#ffa502',
+    'risk_low': '#2ed573',
+    'risk_minimal': '#5352ed',
+    'chart_colors': ['#667eea', '#ff6b9d', '#c44569', '#ffc75f', '#f8b500', '#845ec2', '#4e8397', '#00c9a7']
+}
+
+# 库龄风险阈值表（按起始库龄升序）：(起始库龄, 风险等级, 颜色键, 处理建议, 预期损失率)
+RISK_THRESHOLDS = [
+    (0, '极低风险', 'risk_minimal', '🌟 新鲜库存', 0.0),
+    (30, '低风险', 'risk_low', '✅ 正常销售', 0.0),
+    (60, '中风险', 'risk_medium', '📢 适度9折促销', 0.1),
+    (90, '高风险', 'risk_high', '⚠️ 建议8折促销', 0.2),
+    (120, '极高风险', 'risk_extreme', '🚨 立即7折清库', 0.3),
+]
+
+# 风险策略配置文件（不存在时使用上表作为标准策略）
+RISK_POLICY_FILE = 'risk_policies.json'
+
+# 未匹配到单价时使用的默认单价
+DEFAULT_PRICE = 100
+
+# 出货/预测数量列
+ACTUAL_COL = '求和项:数量（箱）'
+FORECAST_COL = '预计销售量'
+
+# 四个数据源工作簿
+DATA_FILES = {
+    'shipment': '2409~250224出货数据.xlsx',
+    'forecast': '2409~2502人工预测.xlsx',
+    'inventory': '含批次库存0221(2).xlsx',
+    'price': '单价.xlsx'
+}
+
+# 列式缓存目录
+CACHE_DIR = '.cache/columnar'
+
+# 出货月度汇总存储目录
+SHIPMENT_STORE_DIR = '.cache/shipment_store'
+
+# 多仓库库存快照分区存储目录
+INVENTORY_STORE_DIR = '.cache/inventory_store'
+
+# 可查看性能计时面板的登录角色（st.session_state.role）
+ADMIN_ROLE = 'admin'
+
+# 页面性能计时写入位置
+TIMINGS_FILE = '.cache/timings/last_run.json'
+
+# 散点图最多绘制的点数；超过 WEBGL_MIN_POINTS 个点时改用 WebGL 绘制
+CHART_MAX_POINTS = 200
+WEBGL_MIN_POINTS = 100
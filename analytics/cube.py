@@ -0,0 +1,75 @@
+# analytics/cube.py - 多层级预测准确率立方体（grouping sets / rollup 语义）
+from itertools import combinations
+
+import pandas as pd
+
+from .accuracy import error_sums, finalize_metrics
+from .config import ACTUAL_COL, FORECAST_COL
+
+DIMENSIONS = ['所属年月', '所属区域', '产品代码']
+
+# 上卷后的维度取值
+ALL = '全部'
+
+
+def all_grouping_sets(dimensions):
+    """维度的全部子集（完整立方体）"""
+    return [combo for size in range(len(dimensions) + 1) for combo in combinations(dimensions, size)]
+
+
+def rollup(base, dims, dimensions):
+    """将最细粒度的可加中间量上卷到 dims"""
+    values = base.drop(columns=list(dimensions))
+    if not dims:
+        return values.sum().to_frame().T
+    return values.groupby([base[d] for d in dims], sort=True).sum().reset_index()
+
+
+class AccuracyCube:
+    """每个数据版本构建一次：先按最细粒度汇总可加中间量，各层级再由其上卷"""
+
+    def __init__(self, merged, dimensions=DIMENSIONS, grouping_sets=None,
+                 actual_col=ACTUAL_COL, forecast_col=FORECAST_COL):
+        self.dimensions = list(dimensions)
+        self.actual_col = actual_col
+        self.forecast_col = forecast_col
+        self.base = error_sums(merged, self.dimensions, actual_col, forecast_col)
+
+        sets = grouping_sets if grouping_sets is not None else all_grouping_sets(self.dimensions)
+        self.levels = {}
+        for dims in sets:
+            key = self._key(dims)
+            sums = rollup(self.base, key, self.dimensions)
+            self.levels[key] = finalize_metrics(sums, actual_col, forecast_col)
+
+    def _key(self, dims):
+        """按立方体维度顺序规范化层级键"""
+        dims = [dims] if isinstance(dims, str) else list(dims)
+        unknown = set(dims) - set(self.dimensions)
+        if unknown:
+            raise KeyError(f'未知维度: {sorted(unknown)}')
+        return tuple(d for d in self.dimensions if d in dims)
+
+    def slice(self, dims=(), **filters):
+        """取某一层级（如 ('所属区域',)），可按维度取值过滤"""
+        table = self.levels[self._key(dims)]
+        for dim, value in filters.items():
+            table = table[table[dim] == value]
+        return table.reset_index(drop=True)
+
+    def total(self):
+        """全国整体指标"""
+        return self.slice(()).iloc[0]
+
+    def to_frame(self):
+        """全部层级拼接为长表，上卷维度填充为“全部”"""
+        frames = []
+        for key, table in self.levels.items():
+            table = table.copy()
+            for dim in self.dimensions:
+                if dim not in key:
+                    table[dim] = ALL
+            table.insert(0, '层级', '×'.join(key) or '全国')
+            frames.append(table)
+        return pd.concat(frames, ignore_index=True)[['层级'] + self.dimensions + [
+            c for c in frames[0].columns if c not in self.dimensions and c != '层级']]
@@ -0,0 +1,160 @@
+# analytics/depletion.py - 先进先出库存消耗推演：按月度预测销量消耗批次，预测未来各月的风险分布与预期损失
+# 每个物料的批次按生产日期排队，批次 i 在累计需求超过其前序批次累计数量后开始消耗；
+# 只在月份维度上循环，批次维度全部向量化。
+import numpy as np
+import pandas as pd
+
+from .config import FORECAST_COL
+from .instrument import timed
+from .metrics import calculate_key_metrics
+from .policy import DEFAULT_POLICY, RISK_DTYPE
+from .risk import risk_codes
+
+DAY = np.timedelta64(1, 'D')
+
+# 达到该风险等级前仍未售罄的批次视为需提前处理
+ALERT_LEVEL = '高风险'
+
+
+def monthly_demand(forecast_df, materials, months, fill_missing=True):
+    """按物料×月份汇总预测销量（各区域相加），返回 (物料数 × 月份数) 矩阵
+
+    fill_missing=True 时，推演期内缺少预测的月份按该物料已有预测月份的平均值补齐。
+    """
+    if forecast_df.empty:
+        return np.zeros((len(materials), len(months)))
+    periods = pd.PeriodIndex(pd.to_datetime(forecast_df['所属年月']), freq='M')
+    table = forecast_df.groupby([forecast_df['产品代码'].to_numpy(), periods])[FORECAST_COL].sum()
+    table = table.unstack(fill_value=0)
+    rate = table.mean(axis=1)
+    demand = table.reindex(index=materials, columns=months)
+    if fill_missing:
+        demand = demand.apply(lambda col: col.fillna(rate.reindex(materials)))
+    return demand.fillna(0).to_numpy(dtype=float, copy=True)
+
+
+class DepletionProjection:
+    """库存消耗推演结果：按月份重放剩余数量，风险分布与关键指标均由此派生"""
+
+    def __init__(self, batches, remaining_fn, months, month_ends, policy):
+        self.batches = batches
+        self._remaining = remaining_fn
+        self.months = months
+        self.month_ends = month_ends
+        self.policy = policy
+
+    def snapshot(self, month):
+        """某月末的在库批次表（与 process_inventory 结构一致），可直接传入 calculate_key_metrics"""
+        m = self.months.get_loc(pd.Period(month, freq='M'))
+        end = np.datetime64(self.month_ends[m], 'ns')
+        remaining = self._remaining(m)
+        keep = remaining > 0
+        batches = self.batches.loc[keep]
+        prod_date = batches['生产日期'].to_numpy(dtype='datetime64[ns]')
+        age_days = (end - prod_date) // DAY
+        bucket = self.policy.classify(age_days)
+        value = remaining[keep] * batches['单价'].to_numpy(dtype=float)
+        return pd.DataFrame({
+            '物料': batches['物料'].to_numpy(),
+            '产品名称': batches['产品名称'].to_numpy(),
+            '生产日期': prod_date,
+            '生产批号': batches['生产批号'].to_numpy(),
+            '数量': remaining[keep],
+            '库龄': age_days,
+            '风险等级': self.policy.categorical(bucket),
+            '单价': batches['单价'].to_numpy(),
+            '批次价值': value,
+            '预期损失': value * self.policy.loss_rates[bucket]
+        })
+
+    @timed('推演月度汇总')
+    def summary(self):
+        """各月末按风险等级汇总：批次数、剩余数量、剩余价值、预期损失"""
+        prod_date = self.batches['生产日期'].to_numpy(dtype='datetime64[ns]')
+        price = self.batches['单价'].to_numpy(dtype=float)
+        n_levels = len(RISK_DTYPE.categories)
+        frames = []
+        for m, end in enumerate(self.month_ends):
+            remaining = self._remaining(m)
+            bucket = self.policy.classify((np.datetime64(end, 'ns') - prod_date) // DAY)
+            codes = self.policy.level_codes(bucket)
+            value = remaining * price
+            frames.append(pd.DataFrame({
+                '月份': str(self.months[m]),
+                '风险等级': RISK_DTYPE.categories,
+                '批次数': np.bincount(codes, weights=remaining > 0, minlength=n_levels).astype(int),
+                '剩余数量': np.bincount(codes, weights=remaining, minlength=n_levels),
+                '剩余价值': np.bincount(codes, weights=value, minlength=n_levels),
+                '预期损失': np.bincount(codes, weights=value * self.policy.loss_rates[bucket], minlength=n_levels)
+            }))
+        result = pd.concat(frames, ignore_index=True)
+        result['风险等级'] = result['风险等级'].astype(RISK_DTYPE)
+        return result
+
+    def key_metrics(self, forecast_accuracy):
+        """各月末的 calculate_key_metrics() 指标"""
+        return {str(month): calculate_key_metrics(self.snapshot(month), forecast_accuracy) for month in self.months}
+
+
+@timed('库龄推演')
+def simulate_depletion(processed_inventory, forecast_df, as_of=None, horizon=6, policy=None, fill_missing=True):
+    """先进先出消耗推演：从 as_of 起按月消耗各物料批次，返回 DepletionProjection
+
+    projection.batches 为逐批次结果：预计售罄日期（推演期内未售罄为 NaT）、售罄时库龄、
+    售罄前风险等级（未售罄时取推演期末）、是否将在售罄前升级到高风险及以上。
+    """
+    policy = policy or DEFAULT_POLICY
+    as_of = pd.Timestamp(as_of or pd.Timestamp.now()).normalize()
+    months = pd.period_range(as_of.to_period('M'), periods=horizon, freq='M')
+    month_ends = months.end_time.normalize()
+
+    # 批次按 (物料, 生产日期) 排队，组内累计数量即每个批次售罄所需的累计需求
+    material_codes, materials = pd.factorize(processed_inventory['物料'].to_numpy())
+    prod_date = processed_inventory['生产日期'].to_numpy(dtype='datetime64[ns]')
+    order = np.lexsort((prod_date, material_codes))
+    batches = processed_inventory.iloc[order].reset_index(drop=True)
+    material_codes = material_codes[order]
+    prod_date = prod_date[order]
+    quantity = batches['数量'].to_numpy(dtype=float)
+    cum_qty = np.cumsum(quantity)
+    group_start = np.flatnonzero(np.r_[True, material_codes[1:] != material_codes[:-1]]) if len(order) \
+        else np.zeros(0, dtype=int)
+    offset = np.repeat(cum_qty[group_start] - quantity[group_start], np.diff(np.r_[group_start, len(order)]))
+    need = cum_qty - offset
+
+    # 各物料的月度需求，首月按基准日之后的剩余天数折算
+    days = np.asarray((month_ends - months.start_time.normalize()).days + 1, dtype=float)
+    days[0] = (month_ends[0] - as_of).days + 1
+    demand = monthly_demand(forecast_df, materials, months, fill_missing)
+    demand[:, 0] *= days[0] / months[0].days_in_month
+    cum_demand = np.cumsum(demand, axis=1)
+    batch_demand = cum_demand[material_codes] if len(order) else np.zeros((0, horizon))
+
+    def remaining(m):
+        return np.clip(need - batch_demand[:, m], 0, quantity)
+
+    # 售罄月份与月内线性插值的售罄日期
+    sold_month = (batch_demand < need[:, None]).sum(axis=1)
+    sold = sold_month < horizon
+    m = np.minimum(sold_month, horizon - 1)
+    rows = np.arange(len(order))
+    previous = np.where(m > 0, batch_demand[rows, np.maximum(m - 1, 0)], 0.0)
+    month_start = np.where(m > 0, months.start_time.normalize().to_numpy()[m], np.datetime64(as_of, 'ns'))
+    rate = demand[material_codes, m] / days[m] if len(order) else np.zeros(0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        offset_days = np.ceil(np.where(rate > 0, (need - previous) / rate, 0))
+    sold_date = month_start + offset_days.astype('timedelta64[D]')
+    sold_date = np.where(sold & (quantity > 0), sold_date, np.datetime64('NaT'))
+    sold_date = np.where(quantity <= 0, np.datetime64(as_of, 'ns'), sold_date).astype('datetime64[ns]')
+
+    # 售罄前（或推演期末仍在库时）达到的风险等级
+    last_date = np.where(sold, sold_date, np.datetime64(month_ends[-1], 'ns')).astype('datetime64[ns]')
+    last_age = (last_date - prod_date) // DAY
+    last_level = policy.categorical(policy.classify(last_age))
+
+    batches['预计售罄日期'] = sold_date
+    batches['售罄时库龄'] = np.where(sold, last_age, np.nan)
+    batches['售罄前风险等级'] = last_level
+    batches['将转高风险'] = (last_level.codes >= RISK_DTYPE.categories.get_loc(ALERT_LEVEL)) & \
+        (last_level.codes > risk_codes(batches['风险等级']))
+    return DepletionProjection(batches, remaining, months, month_ends, policy)
@@ -0,0 +1,106 @@
+# analytics/diff.py - 库存快照对比：按 (物料, 生产批号) 哈希连接两个已处理快照，识别批次变动与价值变化
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .instrument import timed
+from .policy import RISK_DTYPE
+from .risk import risk_codes
+
+KEYS = ['物料', '生产批号']
+DIFF_TYPES = ['新增', '清空', '部分消耗', '增加', '未变动']
+
+
+def batch_keys(before, after):
+    """两个快照共用编码的 64 位整数批次键 (物料, 生产批号)"""
+    key = np.zeros(len(before) + len(after), dtype=np.int64)
+    for col in KEYS:
+        values = pd.concat([before[col].astype(str), after[col].astype(str)], ignore_index=True)
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        key = key * len(uniques) + codes
+    return key[:len(before)], key[len(before):]
+
+
+def _collapse(keys, processed_inventory):
+    """按批次键整理一个快照：返回 (键, 首行位置, 数量, 风险代码, 批次价值)
+
+    同键多行（同批号拆行）合并数量与价值，风险等级取最高。
+    """
+    quantity = processed_inventory['数量'].to_numpy(dtype=float)
+    codes = risk_codes(processed_inventory['风险等级']).astype(np.int64)
+    value = processed_inventory['批次价值'].to_numpy(dtype=float)
+    if pd.Index(keys).is_unique:
+        return keys, np.arange(len(keys)), quantity, codes, value
+    unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    top = np.full(len(unique), -1, dtype=np.int64)
+    np.maximum.at(top, inverse, codes)
+    return (unique, first, np.bincount(inverse, quantity, len(unique)), top,
+            np.bincount(inverse, value, len(unique)))
+
+
+def _stack(first, second):
+    """纵向拼接两列（分类列合并类别，避免退化为 object）"""
+    if isinstance(first.dtype, pd.CategoricalDtype) and isinstance(second.dtype, pd.CategoricalDtype):
+        return pd.Series(union_categoricals([first.array, second.array], ignore_order=True))
+    return pd.concat([first, second], ignore_index=True)
+
+
+def _gather(values, pos, fill=np.nan):
+    """按位置取值，位置为 -1 时填充 fill"""
+    return np.where(pos >= 0, values[np.maximum(pos, 0)], fill) if len(values) else np.full(len(pos), fill)
+
+
+@timed('快照对比')
+def diff_snapshots(before, after):
+    """对比两个已处理快照（process_inventory 输出），每个批次一行：先为前一快照的批次，再为新增批次
+
+    以整数批次键建哈希索引连接两个快照。变动类型：新增（仅在后一快照）、清空（仅在前一快照）、
+    部分消耗 / 增加（数量减少 / 增加）、未变动；风险升级：两个快照都有该批次且风险等级升高。
+    价值变化为后减前（缺失按 0）。
+    """
+    key_before, key_after = batch_keys(before, after)
+    key_b, row_b, qty_b, code_b, value_b = _collapse(key_before, before)
+    key_a, row_a, qty_a, code_a, value_a = _collapse(key_after, after)
+
+    # 前一快照每个批次在后一快照中的位置（-1 为已清空），其后追加仅在后一快照中的批次
+    match = pd.Index(key_a).get_indexer(key_b)
+    added = np.ones(len(key_a), dtype=bool)
+    added[match[match >= 0]] = False
+    added = np.flatnonzero(added)
+    pos_b = np.concatenate([np.arange(len(key_b)), np.full(len(added), -1)])
+    pos_a = np.concatenate([match, added])
+
+    in_before, in_after = pos_b >= 0, pos_a >= 0
+    quantity_before = _gather(qty_b, pos_b)
+    quantity_after = _gather(qty_a, pos_a)
+    level_before = _gather(code_b, pos_b, -1).astype(int)
+    level_after = _gather(code_a, pos_a, -1).astype(int)
+    value_before = _gather(value_b, pos_b)
+    value_after = _gather(value_a, pos_a)
+    kind = np.select(
+        [~in_before, ~in_after, quantity_after < quantity_before, quantity_after > quantity_before],
+        [0, 1, 2, 3], default=4)
+
+    result = pd.DataFrame({col: _stack(before[col].iloc[row_b], after[col].iloc[row_a[added]])
+                           for col in KEYS + ['产品名称']})
+    result['变动类型'] = pd.Categorical.from_codes(kind, categories=DIFF_TYPES)
+    result['风险升级'] = in_before & in_after & (level_after > level_before)
+    result['数量_前'] = quantity_before
+    result['数量_后'] = quantity_after
+    result['数量变化'] = np.nan_to_num(quantity_after) - np.nan_to_num(quantity_before)
+    result['风险等级_前'] = pd.Categorical.from_codes(level_before, dtype=RISK_DTYPE)
+    result['风险等级_后'] = pd.Categorical.from_codes(level_after, dtype=RISK_DTYPE)
+    result['批次价值_前'] = value_before
+    result['批次价值_后'] = value_after
+    result['价值变化'] = np.nan_to_num(value_after) - np.nan_to_num(value_before)
+    return result
+
+
+def diff_summary(diff):
+    """按变动类型汇总批次数、数量变化与价值变化，另附风险升级行（与变动类型有重叠）"""
+    summary = diff.groupby('变动类型', observed=False).agg(
+        批次数=('价值变化', 'size'), 数量变化=('数量变化', 'sum'), 价值变化=('价值变化', 'sum')).reset_index()
+    summary['变动类型'] = summary['变动类型'].astype(str)
+    escalated = diff[diff['风险升级']]
+    summary.loc[len(summary)] = ['风险升级', len(escalated), escalated['数量变化'].sum(), escalated['价值变化'].sum()]
+    return summary
@@ -0,0 +1,106 @@
+# analytics/errors.py - 预测误差分布与偏差趋势：绝对误差分位数草图 + 带符号偏差的可加汇总
+# 两部分均可按月分区累加、跨进程合并，撤回某月时相减即可，不保留逐行残差。
+import pandas as pd
+
+from .accuracy import _ratio
+from .config import ACTUAL_COL, FORECAST_COL
+from .instrument import timed
+from .sketch import QuantileSketch
+
+# 分别维护分位数草图与按月偏差汇总的分析维度（全国由区域上卷）
+PROFILE_DIMS = ['所属区域', '产品代码']
+
+ERROR_QUANTILES = (0.5, 0.9)
+
+SUM_COLUMNS = ['实际', '预测', '误差', '样本数']
+
+# 分位数草图的默认相对误差上限
+RELATIVE_ACCURACY = 0.01
+
+
+class ErrorProfile:
+    """预测误差画像：每个月分区调用 update() 累加，merge() 合并其他分区/进程的结果"""
+
+    def __init__(self, forecast_col=FORECAST_COL, relative_accuracy=RELATIVE_ACCURACY, sketches=None, sums=None):
+        self.forecast_col = forecast_col
+        self.relative_accuracy = relative_accuracy
+        if sketches is None:
+            sketches = {dim: QuantileSketch([dim], relative_accuracy) for dim in PROFILE_DIMS}
+        if sums is None:
+            sums = {dim: pd.DataFrame({'所属年月': pd.Series(dtype=object), dim: pd.Series(dtype=object),
+                                       **{c: pd.Series(dtype=float) for c in SUM_COLUMNS[:-1]},
+                                       '样本数': pd.Series(dtype='int64')}) for dim in PROFILE_DIMS}
+        self.sketches = sketches
+        self.sums = sums
+
+    @classmethod
+    @timed('误差画像')
+    def build(cls, merged, forecast_col=FORECAST_COL, relative_accuracy=RELATIVE_ACCURACY):
+        """由 process_forecast_data() 结果一次构建（与逐月 update() 累加的结果相同）"""
+        return cls(forecast_col, relative_accuracy).update(merged)
+
+    def _frame(self, merged):
+        """对比明细转为逐行误差表"""
+        actual = merged[ACTUAL_COL].to_numpy(dtype=float)
+        forecast = merged[self.forecast_col].to_numpy(dtype=float)
+        return merged[['所属年月'] + PROFILE_DIMS].assign(实际=actual, 预测=forecast, 误差=forecast - actual,
+                                                        绝对误差=abs(forecast - actual), 样本数=1)
+
+    def _sketch(self, frame):
+        return {dim: QuantileSketch([dim], self.relative_accuracy).update(frame, '绝对误差') for dim in PROFILE_DIMS}
+
+    @staticmethod
+    def _sums(frame):
+        return {dim: frame.groupby(['所属年月', dim], sort=True)[SUM_COLUMNS].sum().reset_index()
+                for dim in PROFILE_DIMS}
+
+    def _partial(self, merged):
+        """单个分区的草图与汇总"""
+        frame = self._frame(merged)
+        return ErrorProfile(self.forecast_col, self.relative_accuracy, self._sketch(frame), self._sums(frame))
+
+    def merge(self, other):
+        """合并另一个分区/进程的误差画像"""
+        sums = {}
+        for dim in PROFILE_DIMS:
+            table = pd.concat([self.sums[dim], other.sums[dim]], ignore_index=True)
+            table = table.groupby(['所属年月', dim], sort=True)[SUM_COLUMNS].sum().reset_index()
+            sums[dim] = table[table['样本数'] != 0].reset_index(drop=True)
+        sketches = {dim: self.sketches[dim].merge(other.sketches[dim]) for dim in PROFILE_DIMS}
+        return ErrorProfile(self.forecast_col, self.relative_accuracy, sketches, sums)
+
+    def update(self, merged):
+        """累加一个分区（如新导入月份）的对比明细"""
+        if merged.empty:
+            return self
+        return self.merge(self._partial(merged))
+
+    def subtract(self, merged):
+        """撤回一个分区（重算某月时先撤回旧数据再 update 新数据）"""
+        if merged.empty:
+            return self
+        partial = self._partial(merged)
+        sketches = {dim: QuantileSketch([dim], self.relative_accuracy).subtract(sketch)
+                    for dim, sketch in partial.sketches.items()}
+        sums = {dim: table.assign(**{c: -table[c] for c in SUM_COLUMNS}) for dim, table in partial.sums.items()}
+        return self.merge(ErrorProfile(self.forecast_col, self.relative_accuracy, sketches, sums))
+
+    def error_quantiles(self, by='所属区域', qs=ERROR_QUANTILES):
+        """按维度的绝对误差分位数（箱），by=None 为全国"""
+        sketch = self.sketches[by or PROFILE_DIMS[0]]
+        table = sketch.quantiles(qs, by=() if by is None else None)
+        return table.rename(columns={f'P{q * 100:g}': f'P{q * 100:g}绝对误差' for q in qs})
+
+    def bias_trend(self, by='所属区域'):
+        """按月的带符号偏差趋势：偏差 = (预测 - 实际) / 实际 × 100，正值为高估；by=None 为全国"""
+        dims = ['所属年月'] if by is None else ['所属年月', by]
+        table = self.sums[by or PROFILE_DIMS[0]].groupby(dims, sort=True)[SUM_COLUMNS].sum().reset_index()
+        table['偏差'] = _ratio(table['误差'], table['实际']) * 100
+        return table
+
+    def summary(self, by='所属区域', qs=ERROR_QUANTILES):
+        """分位数与整体偏差并列的汇总表"""
+        quantiles = self.error_quantiles(by, qs)
+        sums = self.sums[by].groupby(by, sort=True)[['实际', '预测', '误差']].sum().reset_index()
+        sums['偏差'] = _ratio(sums['误差'], sums['实际']) * 100
+        return quantiles.merge(sums[[by, '实际', '预测', '偏差']], on=by, how='left')
@@ -0,0 +1,148 @@
+# analytics/export.py - 筛选结果的分块流式导出（CSV / XLSX / Parquet）
+import os
+import tempfile
+import weakref
+from contextlib import suppress
+
+import numpy as np
+
+from .query import DISPLAY_COLUMNS
+
+CHUNK_SIZE = 50_000
+
+# Excel 单个工作表最多 1,048,576 行（含表头）
+XLSX_MAX_ROWS = 1_048_575
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', '.csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', '.xlsx'),
+    'parquet': ('application/octet-stream', '.parquet')
+}
+
+
+def iter_chunks(query, positions, chunk_size=CHUNK_SIZE, formatted=True, columns=DISPLAY_COLUMNS):
+    """按展示顺序分块取出筛选结果；formatted=True 时与页面表格格式一致"""
+    for start in range(0, len(positions), chunk_size):
+        block = positions[start:start + chunk_size]
+        if formatted:
+            yield query.page(block, 1, len(block), columns)
+        else:
+            yield query.rows(block, columns)
+
+
+def iter_csv(query, positions, chunk_size=CHUNK_SIZE, columns=DISPLAY_COLUMNS):
+    """逐块生成 UTF-8-SIG 编码的 CSV 字节，首块带 BOM 与表头，行尾统一为 \\n"""
+    yield (','.join(columns) + '\n').encode('utf-8-sig')
+    for chunk in iter_chunks(query, positions, chunk_size, columns=columns):
+        yield chunk.to_csv(index=False, header=False, lineterminator='\n').encode('utf-8')
+
+
+def _write_csv(query, positions, path, chunk_size, columns):
+    with open(path, 'wb') as f:
+        for data in iter_csv(query, positions, chunk_size, columns):
+            f.write(data)
+
+
+def _write_xlsx(query, positions, path, chunk_size, columns):
+    """openpyxl 只写模式逐行写入，超过单表行数上限时自动分表"""
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet, rows_in_sheet = None, XLSX_MAX_ROWS
+    for chunk in iter_chunks(query, positions, chunk_size, columns=columns):
+        for row in chunk.itertuples(index=False, name=None):
+            if rows_in_sheet >= XLSX_MAX_ROWS:
+                sheet = workbook.create_sheet(f'筛选结果{len(workbook.worksheets) + 1}')
+                sheet.append(list(chunk.columns))
+                rows_in_sheet = 0
+            sheet.append([None if isinstance(v, float) and np.isnan(v) else v for v in row])
+            rows_in_sheet += 1
+    if sheet is None:
+        workbook.create_sheet('筛选结果1').append(list(columns))
+    workbook.save(path)
+
+
+def _write_parquet(query, positions, path, chunk_size, columns):
+    """每块写为一个行组，保留数值与日期类型"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    writer = None
+    try:
+        for chunk in iter_chunks(query, positions, chunk_size, formatted=False, columns=columns):
+            for col in chunk.columns:
+                if chunk[col].dtype == object:
+                    chunk[col] = chunk[col].where(chunk[col].isna(), chunk[col].astype(str))
+            if writer is None:
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                schema = pa.schema([pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f
+                                    for f in schema])
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        if writer is None:
+            empty = query.rows(positions[:0], columns)
+            pq.write_table(pa.Table.from_pandas(empty, preserve_index=False), path)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+_WRITERS = {
+    'csv': _write_csv,
+    'xlsx': _write_xlsx,
+    'parquet': _write_parquet
+}
+
+
+def _remove(path):
+    with suppress(FileNotFoundError):
+        os.remove(path)
+
+
+class FrameQuery:
+    """普通数据表的导出源：与 BatchQuery 相同的 rows()/page() 接口，按位置取行"""
+
+    def __init__(self, frame):
+        self.frame = frame
+
+    @property
+    def columns(self):
+        return list(self.frame.columns)
+
+    def rows(self, positions, columns=None):
+        return self.frame.iloc[positions][list(columns or self.columns)].reset_index(drop=True)
+
+    def page(self, positions, page=1, page_size=50, columns=None):
+        start = (page - 1) * page_size
+        return self.rows(positions[start:start + page_size], columns)
+
+
+class ExportFile:
+    """已生成的导出文件：调用 discard()、对象被回收（如会话结束）或进程退出时删除文件"""
+
+    def __init__(self, path, key=None):
+        self.path = path
+        self.key = key
+        self._finalizer = weakref.finalize(self, _remove, path)
+
+    def read(self):
+        """读取文件内容（供下载时按需调用）"""
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def discard(self):
+        """删除文件（可重复调用）"""
+        self._finalizer()
+
+
+def write_export(query, positions, fmt='csv', path=None, chunk_size=CHUNK_SIZE, columns=DISPLAY_COLUMNS,
+                 prefix='库存分析_'):
+    """将筛选结果分块写入文件（默认写入以 prefix 开头的临时文件），返回文件路径
+
+    query 为 BatchQuery 或 FrameQuery，positions 为要导出的行位置。
+    """
+    if fmt not in _WRITERS:
+        raise ValueError(f'不支持的导出格式: {fmt}')
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix=prefix, suffix=EXPORT_FORMATS[fmt][1])
+        os.close(fd)
+    _WRITERS[fmt](query, positions, path, chunk_size, columns)
+    return path
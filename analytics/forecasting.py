@@ -0,0 +1,138 @@
+# analytics/forecasting.py - 向量化统计预测引擎（季节性朴素 / 指数平滑 / Croston）
+# 所有方法以 (序列数 × 月份数) 矩阵为输入，只在时间维度上循环，序列维度全部向量化。
+import numpy as np
+import pandas as pd
+
+from .config import ACTUAL_COL
+
+SERIES_KEYS = ['所属区域', '产品代码']
+MACHINE_COL = '机器预测'
+
+# 平均需求间隔超过该值视为间歇性需求（Syntetos-Boylan 分类）
+INTERMITTENT_ADI = 1.32
+ALPHA_GRID = np.array([0.1, 0.2, 0.3, 0.5, 0.7, 0.9])
+
+
+def series_matrix(actual_monthly, keys=SERIES_KEYS):
+    """月度汇总转为序列矩阵，返回 (序列索引, 月份列表, 矩阵)，缺失月份补 0"""
+    periods = pd.PeriodIndex(pd.unique(actual_monthly['所属年月']), freq='M')
+    months = pd.period_range(periods.min(), periods.max(), freq='M').strftime('%Y-%m').tolist()
+    pivot = actual_monthly.pivot_table(index=keys, columns='所属年月', values=ACTUAL_COL,
+                                       aggfunc='sum', fill_value=0)
+    pivot = pivot.reindex(columns=months, fill_value=0)
+    return pivot.index, months, pivot.to_numpy(dtype=float)
+
+
+def seasonal_naive(Y, horizon=0, season=12):
+    """季节性朴素：取上一季同月；历史不足一季时退化为朴素（上月值）"""
+    n, T = Y.shape
+    fitted = np.full((n, T), np.nan)
+    if T > 1:
+        fitted[:, 1:] = Y[:, :-1]
+    if T > season:
+        fitted[:, season:] = Y[:, :-season]
+    if T >= season:
+        future = Y[:, T - season + np.arange(horizon) % season]
+    else:
+        future = np.repeat(Y[:, -1:], horizon, axis=1)
+    return fitted, future
+
+
+def ses(Y, horizon=0, alphas=ALPHA_GRID):
+    """简单指数平滑：每条序列从 alphas 中选样本内一步误差最小的平滑系数"""
+    n, T = Y.shape
+    alphas = np.asarray(alphas, dtype=float)[:, None]
+    level = np.repeat(Y[None, :, 0], len(alphas), axis=0)
+    fitted = np.full((len(alphas), n, T), np.nan)
+    for t in range(1, T):
+        fitted[:, :, t] = level
+        level = alphas * Y[None, :, t] + (1 - alphas) * level
+
+    sse = np.nansum((fitted - Y[None]) ** 2, axis=2)
+    best = np.argmin(sse, axis=0)
+    rows = np.arange(n)
+    future = np.repeat(level[best, rows][:, None], horizon, axis=1)
+    return fitted[best, rows], future
+
+
+def croston(Y, horizon=0, alpha=0.1, sba=True):
+    """Croston 间歇需求预测（默认 SBA 偏差修正），无需求历史前预测为 0"""
+    n, T = Y.shape
+    size = np.full(n, np.nan)
+    interval = np.full(n, np.nan)
+    since = np.zeros(n)
+    factor = 1 - alpha / 2 if sba else 1.0
+    fitted = np.full((n, T), np.nan)
+
+    def current():
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(np.isnan(size), 0.0, factor * size / interval)
+
+    for t in range(T):
+        if t > 0:
+            fitted[:, t] = current()
+        since += 1
+        demand = Y[:, t] > 0
+        first = demand & np.isnan(size)
+        update = demand & ~first
+        size[first] = Y[first, t]
+        interval[first] = since[first]
+        size[update] += alpha * (Y[update, t] - size[update])
+        interval[update] += alpha * (since[update] - interval[update])
+        since[demand] = 0
+
+    future = np.repeat(current()[:, None], horizon, axis=1)
+    return fitted, future
+
+
+METHODS = {
+    'seasonal_naive': seasonal_naive,
+    'ses': ses,
+    'croston': croston
+}
+
+
+def classify_series(Y):
+    """按平均需求间隔区分平稳与间歇序列，返回每条序列的推荐方法"""
+    nonzero = (Y > 0).sum(axis=1)
+    with np.errstate(divide='ignore'):
+        adi = np.where(nonzero > 0, Y.shape[1] / np.maximum(nonzero, 1), np.inf)
+    return np.where(adi > INTERMITTENT_ADI, 'croston', 'ses')
+
+
+def fit_forecast(Y, method='auto', horizon=0):
+    """对全部序列一次性拟合，返回 (样本内一步预测, 未来 horizon 期预测, 每条序列所用方法)"""
+    if method != 'auto':
+        fitted, future = METHODS[method](Y, horizon)
+        return fitted, future, np.full(len(Y), method, dtype=object)
+
+    chosen = classify_series(Y)
+    fitted = np.full(Y.shape, np.nan)
+    future = np.zeros((len(Y), horizon))
+    for name in np.unique(chosen):
+        rows = chosen == name
+        fitted[rows], future[rows] = METHODS[name](Y[rows], horizon)
+    return fitted, future, chosen.astype(object)
+
+
+def machine_forecasts(actual_monthly, method='auto', until=None, keys=SERIES_KEYS):
+    """按区域×产品生成机器预测：历史月份为一步滚动预测，until 之前的未来月份为外推预测"""
+    if actual_monthly.empty:
+        return pd.DataFrame(columns=['所属年月'] + list(keys) + [MACHINE_COL, '预测方法'])
+    index, months, Y = series_matrix(actual_monthly, keys)
+    horizon = 0
+    if until is not None:
+        horizon = max(0, (pd.Period(until, freq='M') - pd.Period(months[-1], freq='M')).n)
+    fitted, future, chosen = fit_forecast(Y, method, horizon)
+
+    future_months = pd.period_range(pd.Period(months[-1], freq='M') + 1, periods=horizon,
+                                    freq='M').strftime('%Y-%m').tolist()
+    all_months = months + future_months
+    values = np.hstack([fitted, future])
+
+    result = index.to_frame(index=False).loc[np.repeat(np.arange(len(index)), len(all_months))]
+    result = result.reset_index(drop=True)
+    result.insert(0, '所属年月', np.tile(all_months, len(index)))
+    result[MACHINE_COL] = np.maximum(values.ravel(), 0)
+    result['预测方法'] = np.repeat(chosen, len(all_months))
+    return result[result[MACHINE_COL].notna()].reset_index(drop=True)
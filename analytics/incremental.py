@@ -0,0 +1,192 @@
+# analytics/incremental.py - 出货数据增量汇总：按月分区物化 (所属年月, 所属区域, 产品代码) 汇总
+# 追加增量工作簿: python -m analytics.incremental append 新增出货.xlsx
+# 同步完整导出:   python -m analytics.incremental sync 2409~250224出货数据.xlsx
+import argparse
+import json
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from .cache import file_digest, file_version, frame_suffix, read_frame, write_frame
+from .config import ACTUAL_COL, SHIPMENT_STORE_DIR
+from .instrument import timed
+from .schema import read_source
+
+KEYS = ['所属年月', '所属区域', '产品代码']
+QTY = ACTUAL_COL
+MONTHLY_COLUMNS = KEYS + [QTY]
+
+# 存储格式版本：2 起月度汇总保留所属区域为空的出货行；打开旧版本存储时由原始分区重算汇总
+STORE_FORMAT = 2
+
+
+def with_month(shipment_df):
+    """追加字符串格式的所属年月列（返回新表）"""
+    result = shipment_df.copy()
+    result['订单日期'] = pd.to_datetime(result['订单日期'])
+    result['所属年月'] = result['订单日期'].dt.strftime('%Y-%m')
+    return result
+
+
+@timed('出货月度汇总')
+def monthly_actuals(shipment_df):
+    """按月份、区域、产品码汇总实际出货（所属区域为空的行保留为空区域，按产品汇总时不丢失）"""
+    if '所属年月' not in shipment_df.columns:
+        shipment_df = with_month(shipment_df)
+    return shipment_df.groupby(KEYS, dropna=False).agg({QTY: 'sum'}).reset_index()
+
+
+def month_fingerprints(shipment_df):
+    """各月份原始行的内容指纹（与行顺序无关）"""
+    rows = shipment_df.drop(columns=['所属年月'])
+    hashes = pd.util.hash_pandas_object(rows, index=False)
+    return {month: str(int(h.sum())) for month, h in hashes.groupby(shipment_df['所属年月'].to_numpy())}
+
+
+class ShipmentStore:
+    """出货月度汇总存储：完整导出与追加的增量行分别按月分区，汇总表只重算受影响的月份
+
+    默认存储在数据目录下，不同数据目录互不影响。
+    """
+
+    def __init__(self, root=None, data_dir='.'):
+        self.root = Path(root) if root is not None else Path(data_dir) / SHIPMENT_STORE_DIR
+        self.manifest_path = self.root / 'manifest.json'
+        self.monthly_path = self.root / f'monthly{frame_suffix()}'
+        self.manifest = {'export': None, 'months': {}, 'deltas': {}, 'sources': {}}
+        if self.manifest_path.exists():
+            with open(self.manifest_path, encoding='utf-8') as f:
+                self.manifest.update(json.load(f))
+        if self.manifest.get('format') != STORE_FORMAT:
+            self.manifest['format'] = STORE_FORMAT
+            if self.months:
+                self._refresh(self.months)
+
+    def _partition_path(self, month):
+        return self.root / 'raw' / f'{month}{frame_suffix()}'
+
+    def _delta_path(self, month):
+        return self.root / 'delta' / f'{month}{frame_suffix()}'
+
+    def _save_manifest(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+
+    @property
+    def months(self):
+        return sorted(set(self.manifest['months']) | set(self.manifest['deltas']))
+
+    def monthly(self):
+        """物化的月度汇总表"""
+        if not self.monthly_path.exists():
+            return pd.DataFrame(columns=MONTHLY_COLUMNS)
+        return read_frame(self.monthly_path)
+
+    def shipments(self, months=None):
+        """读取原始出货行（完整导出与增量行，可指定月份）"""
+        months = self.months if months is None else months
+        parts = [read_frame(self._partition_path(m)) for m in months if m in self.manifest['months']]
+        parts += [read_frame(self._delta_path(m)) for m in months if m in self.manifest['deltas']]
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat(parts, ignore_index=True)
+
+    def _refresh(self, months):
+        """只重算指定月份的汇总，保存清单并返回这些月份"""
+        months = sorted(set(months))
+        if months:
+            monthly = self.monthly()
+            monthly = monthly[~monthly['所属年月'].isin(months)]
+            rows = self.shipments(months)
+            if not rows.empty:
+                monthly = pd.concat([monthly, monthly_actuals(rows)], ignore_index=True)
+            write_frame(monthly.sort_values(KEYS, ignore_index=True), self.monthly_path)
+        self._save_manifest()
+        return months
+
+    def _absorb(self, month, export_rows):
+        """删除已被完整导出包含的增量行，避免重复计入"""
+        delta = read_frame(self._delta_path(month))
+        exported = set(pd.util.hash_pandas_object(
+            export_rows[delta.columns].astype(delta.dtypes.to_dict()), index=False))
+        delta = delta[~pd.util.hash_pandas_object(delta, index=False).isin(exported).to_numpy()]
+        if delta.empty:
+            self._delta_path(month).unlink(missing_ok=True)
+            del self.manifest['deltas'][month]
+        else:
+            write_frame(delta.reset_index(drop=True), self._delta_path(month))
+            self.manifest['deltas'][month] = len(delta)
+
+    @timed('出货分区同步')
+    def sync(self, shipment_df, version=None):
+        """同步完整导出，返回受影响月份
+
+        只重写内容指纹变化或新增的月份，删除导出中已不存在的月份（连同其增量行）；追加的增量行
+        单独保存，同步时保留，已被新导出包含的增量行不再重复计入。version 为导出文件的版本标识
+        （如大小与修改时间），与上次同步相同时直接返回，不复制或哈希任何行。
+        """
+        if version is not None and version == self.manifest['export']:
+            return []
+        shipment_df = with_month(shipment_df)
+        fingerprints = month_fingerprints(shipment_df)
+        changed = [m for m, fp in fingerprints.items()
+                   if self.manifest['months'].get(m, {}).get('fingerprint') != fp]
+        removed = [m for m in self.manifest['months'] if m not in fingerprints]
+
+        self.root.joinpath('raw').mkdir(parents=True, exist_ok=True)
+        affected = shipment_df[shipment_df['所属年月'].isin(changed)]
+        for month, rows in affected.groupby('所属年月'):
+            rows = rows.reset_index(drop=True)
+            write_frame(rows, self._partition_path(month))
+            self.manifest['months'][month] = {'rows': len(rows), 'fingerprint': fingerprints[month]}
+            if month in self.manifest['deltas']:
+                self._absorb(month, rows)
+        for month in removed:
+            self._partition_path(month).unlink(missing_ok=True)
+            self._delta_path(month).unlink(missing_ok=True)
+            del self.manifest['months'][month]
+            self.manifest['deltas'].pop(month, None)
+        self.manifest['export'] = version
+        return self._refresh(changed + removed)
+
+    def append(self, delta_df, source=None):
+        """追加增量出货行（与完整导出的行累加），同一来源文件只导入一次，返回受影响月份"""
+        if source is not None:
+            digest = file_digest(source)
+            if digest in self.manifest['sources']:
+                return []
+        delta_df = with_month(delta_df)
+        self.root.joinpath('delta').mkdir(parents=True, exist_ok=True)
+        for month, rows in delta_df.groupby('所属年月'):
+            if month in self.manifest['deltas']:
+                rows = pd.concat([read_frame(self._delta_path(month)), rows], ignore_index=True)
+            write_frame(rows.reset_index(drop=True), self._delta_path(month))
+            self.manifest['deltas'][month] = len(rows)
+        affected = sorted(delta_df['所属年月'].unique())
+        if source is not None:
+            self.manifest['sources'][digest] = {'file': str(source), 'rows': len(delta_df), 'months': affected}
+        return self._refresh(affected)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='出货数据增量汇总')
+    parser.add_argument('mode', choices=['sync', 'append'], help='sync=完整导出，append=增量工作簿')
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--data-dir', default='.', help='数据目录（存储默认位于其下）')
+    parser.add_argument('--store', help=f'存储目录（默认为 数据目录/{SHIPMENT_STORE_DIR}）')
+    args = parser.parse_args(argv)
+
+    store = ShipmentStore(args.store, args.data_dir)
+    for path in args.files:
+        start = time.perf_counter()
+        df = read_source(path, 'shipment')[0]
+        affected = store.sync(df, file_version(path)) if args.mode == 'sync' else store.append(df, source=path)
+        elapsed = time.perf_counter() - start
+        print(f"{path}: {len(df)} 行，重算月份 {affected or '无'}，耗时 {elapsed:.3f}s")
+    print(f'存储共 {len(store.months)} 个月，汇总 {len(store.monthly())} 行')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+# analytics/instrument.py - 流水线各阶段的轻量计时：耗时、输入/输出行数、峰值内存（可选）
+# 未开启记录时 @timed 只多一次上下文变量查询；开启后各阶段按调用顺序记录，可写入 JSON。
+import cProfile
+import functools
+import inspect
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+_active = ContextVar('timings', default=None)
+
+
+def count_rows(value):
+    """DataFrame/Series/数组取行数；元组取第一个元素的行数；标量（含 0 维数组）及其他返回 None"""
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    if isinstance(value, (pd.DataFrame, pd.Series)) or (hasattr(value, 'shape') and getattr(value, 'ndim', 1) > 0):
+        return int(len(value))
+    return None
+
+
+class Timings:
+    """一次运行的阶段记录（memory=True 时用 tracemalloc 统计各阶段峰值内存，约有 1.5~3 倍开销）"""
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.records = []
+        self._stack = []
+        self._token = None
+        self._tracing = False
+        self.started = time.perf_counter()
+
+    def start(self):
+        """设为当前上下文的记录器"""
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self._token = _active.set(self)
+        self.started = time.perf_counter()
+        return self
+
+    def stop(self):
+        """停止记录（恢复上一个记录器）；只停止由本记录器开启的 tracemalloc"""
+        if self._token is not None:
+            _active.reset(self._token)
+            self._token = None
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _sync_peak(self):
+        """把当前峰值计入所有未结束的阶段，再重置峰值"""
+        peak = tracemalloc.get_traced_memory()[1]
+        for frame in self._stack:
+            frame['_peak'] = max(frame['_peak'], peak)
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """记录一个阶段；可在 with 块内设置 record['输出行数']"""
+        record = {'阶段': name, '层级': len(self._stack), '输入行数': rows_in, '输出行数': None}
+        self.records.append(record)
+        if self.memory:
+            self._sync_peak()
+            record['_base'] = record['_peak'] = tracemalloc.get_traced_memory()[0]
+        self._stack.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['耗时(s)'] = round(time.perf_counter() - start, 4)
+            if self.memory:
+                self._sync_peak()
+                record['峰值内存(MB)'] = round((record.pop('_peak') - record.pop('_base')) / 1024 ** 2, 2)
+            self._stack.pop()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def to_frame(self):
+        """阶段记录表（按调用顺序，层级表示嵌套深度）"""
+        columns = ['阶段', '层级', '耗时(s)', '输入行数', '输出行数'] + (['峰值内存(MB)'] if self.memory else [])
+        return pd.DataFrame(self.records, columns=columns).astype({'输入行数': 'Int64', '输出行数': 'Int64'})
+
+    def to_dict(self):
+        return {
+            '时间': datetime.now().isoformat(timespec='seconds'),
+            '总耗时(s)': round(self.elapsed, 4),
+            '阶段': [{k: v for k, v in r.items() if not k.startswith('_')} for r in self.records]
+        }
+
+    def write_json(self, path):
+        """写入 JSON 文件"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+
+def current():
+    """当前上下文的记录器（未开启时为 None）"""
+    return _active.get()
+
+
+@contextmanager
+def stage(name, rows_in=None):
+    """在当前记录器中记录一个阶段；未开启记录时为空操作"""
+    timings = _active.get()
+    if timings is None:
+        yield {}
+        return
+    with timings.stage(name, rows_in) as record:
+        yield record
+
+
+def timed(name=None):
+    """函数级阶段装饰器：输入行数取第一个参数（方法跳过 self/cls），输出行数取返回值"""
+    def decorate(func):
+        label = name or func.__qualname__
+        params = list(inspect.signature(func).parameters)
+        skip = 1 if params and params[0] in ('self', 'cls') else 0
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = _active.get()
+            if timings is None:
+                return func(*args, **kwargs)
+            rows_in = count_rows(args[skip]) if len(args) > skip else None
+            with timings.stage(label, rows_in) as record:
+                result = func(*args, **kwargs)
+                record['输出行数'] = count_rows(result)
+            return result
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def profiled(path):
+    """用 cProfile 剖析 with 块并把统计结果写入 path（可用 snakeviz / pstats 查看）"""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(path)
@@ -0,0 +1,39 @@
+# analytics/metrics.py - 关键指标
+from .instrument import timed
+
+
+@timed('关键指标')
+def calculate_key_metrics(processed_inventory, forecast_accuracy):
+    """计算关键指标"""
+    total_batches = len(processed_inventory)
+    high_risk_batches = len(processed_inventory[processed_inventory['风险等级'].isin(['极高风险', '高风险'])])
+    high_risk_ratio = (high_risk_batches / total_batches * 100) if total_batches > 0 else 0
+    
+    total_inventory_value = processed_inventory['批次价值'].sum() / 1000000
+    high_risk_value = processed_inventory[
+        processed_inventory['风险等级'].isin(['极高风险', '高风险'])
+    ]['批次价值'].sum()
+    high_risk_value_ratio = (high_risk_value / processed_inventory['批次价值'].sum() * 100) if processed_inventory['批次价值'].sum() > 0 else 0
+    
+    avg_age = processed_inventory['库龄'].mean()
+    forecast_acc = forecast_accuracy['预测准确率'].mean() * 100 if not forecast_accuracy.empty else 0
+    
+    risk_counts = processed_inventory['风险等级'].value_counts().to_dict()
+    
+    return {
+        'total_batches': int(total_batches),
+        'high_risk_batches': int(high_risk_batches),
+        'high_risk_ratio': round(high_risk_ratio, 1),
+        'total_inventory_value': round(total_inventory_value, 2),
+        'high_risk_value_ratio': round(high_risk_value_ratio, 1),
+        'avg_age': round(avg_age, 0),
+        'forecast_accuracy': round(forecast_acc, 1) if forecast_acc > 0 else 0,
+        'high_risk_value': round(high_risk_value / 1000000, 1),
+        'risk_counts': {
+            'extreme': risk_counts.get('极高风险', 0),
+            'high': risk_counts.get('高风险', 0),
+            'medium': risk_counts.get('中风险', 0),
+            'low': risk_counts.get('低风险', 0),
+            'minimal': risk_counts.get('极低风险', 0)
+        }
+    }
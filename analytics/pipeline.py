@@ -0,0 +1,73 @@
+# analytics/pipeline.py - 数据加载与处理流水线（无界面、导入时无副作用）
+import hashlib
+from pathlib import Path
+
+from .accuracy import calculate_forecast_accuracy, process_forecast_data
+from .cache import file_version
+from .config import DATA_FILES, RISK_POLICY_FILE
+from .cube import AccuracyCube
+from .forecasting import MACHINE_COL
+from .incremental import ShipmentStore
+from .instrument import timed
+from .metrics import calculate_key_metrics
+from .policy import load_policy
+from .pricing import PriceIndex
+from .risk import build_product_name_map, process_inventory
+from .schema import load_sources
+from .timeline import RiskTimeline
+
+
+def data_version(data_dir='.'):
+    """数据版本标识：由四个数据源及风险策略配置的大小与修改时间生成，任一文件变化即变化"""
+    digest = hashlib.sha256()
+    for name, file_name in sorted(DATA_FILES.items()):
+        digest.update(f'{name}:{file_version(Path(data_dir) / file_name)};'.encode('utf-8'))
+    policy_path = Path(data_dir) / RISK_POLICY_FILE
+    if policy_path.exists():
+        digest.update(f'policy:{file_version(policy_path)};'.encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+@timed('加载与处理')
+def load_and_process_data(data_dir='.', policy=None, as_of=None, shipment_store=None):
+    """加载和处理所有数据（policy 默认取数据目录下风险策略配置中的默认策略，as_of 默认为当前时间）
+
+    出货月度汇总来自 shipment_store（默认为数据目录下的存储），作为最后一项返回，下游计算直接复用。
+    """
+    # 读取数据文件（只读所需列，源文件未变时直接读取列式缓存）；列名或类型不符时抛出 SchemaError
+    frames, _ = load_sources(data_dir)
+    shipment_df, forecast_df = frames['shipment'], frames['forecast']
+    inventory_df, price_df = frames['inventory'], frames['price']
+    
+    # 创建产品代码到名称的映射
+    product_name_map = build_product_name_map(inventory_df)
+    
+    # 单价索引（每次加载构建一次）
+    price_index = PriceIndex(price_df)
+    
+    # 处理库存数据（列式风险引擎）
+    policy = policy or load_policy(Path(data_dir) / RISK_POLICY_FILE)
+    processed_inventory = process_inventory(inventory_df, price_index, now=as_of, policy=policy)
+    if as_of is not None:
+        # 与页面的基准日期视图相同：晚于 as_of 生产的批次不计入
+        processed_inventory = RiskTimeline(processed_inventory, policy).at(as_of)
+    
+    # 出货月度汇总（出货文件未变时跳过同步，否则只重算内容发生变化或已移除的月份）
+    shipment_store = shipment_store or ShipmentStore(data_dir=data_dir)
+    shipment_store.sync(shipment_df, file_version(Path(data_dir) / DATA_FILES['shipment']))
+    actual_monthly = shipment_store.monthly()
+    
+    forecast_accuracy = calculate_forecast_accuracy(actual_monthly, forecast_df)
+    metrics = calculate_key_metrics(processed_inventory, forecast_accuracy)
+    
+    return (processed_inventory, forecast_accuracy, shipment_df, forecast_df, metrics, product_name_map, price_index,
+            actual_monthly)
+
+
+@timed('预测分析')
+def forecast_analysis(shipment_df, forecast_df, actual_monthly=None, machine_method='auto'):
+    """预测分析视图：合并后的预测对比表及人工/机器两套准确率立方体"""
+    merged_data = process_forecast_data(shipment_df, forecast_df, actual_monthly, machine_method)
+    if merged_data.empty:
+        return merged_data, None, None
+    return merged_data, AccuracyCube(merged_data), AccuracyCube(merged_data, forecast_col=MACHINE_COL)
@@ -0,0 +1,152 @@
+# analytics/planning.py - 补货/生产计划：按 SKU 批量计算安全库存、再订货点与建议生产量
+# 夜间批处理: python -m analytics.planning --service-level 0.95 --lead-time 1 --review-period 1 --output plan.csv
+import argparse
+import time
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from .config import FORECAST_COL
+from .forecasting import MACHINE_COL, machine_forecasts, series_matrix
+from .instrument import timed
+from .pipeline import load_and_process_data
+from .policy import RISK_DTYPE
+from .risk import risk_codes
+
+PLAN_COLUMNS = ['产品代码', '产品名称', '月均需求', '需求标准差', '提前期需求', '计划期需求', '安全库存',
+                '再订货点', '在库数量', '高风险库存', '建议生产量', '需要补货', '预测来源']
+
+# 高于该风险等级（含）的库存单独列示
+HIGH_RISK_LEVEL = '高风险'
+
+
+def month_strings(values):
+    """月份列统一为 YYYY-MM 字符串（只解析去重后的取值）"""
+    uniques = pd.unique(values)
+    labels = pd.to_datetime(uniques).strftime('%Y-%m')
+    return values.map(dict(zip(uniques, labels)))
+
+
+def plan_demand(actual_monthly, forecast_df, plan_months, machine_method='auto'):
+    """计划期各月需求（区域×产品）：有人工预测的月份取人工预测，其余取机器预测"""
+    manual = forecast_df.copy()
+    manual['所属年月'] = month_strings(manual['所属年月'])
+    manual = manual[manual['所属年月'].isin(plan_months)]
+    manual = manual.groupby(['所属年月', '所属区域', '产品代码'])[FORECAST_COL].sum().rename('需求').reset_index()
+    manual['人工'] = True
+
+    machine = machine_forecasts(actual_monthly, machine_method, until=plan_months[-1])
+    machine = machine[machine['所属年月'].isin(plan_months)].rename(columns={MACHINE_COL: '需求'})
+    machine['人工'] = False
+
+    # 同一 (月份, 区域, 产品) 人工预测优先
+    demand = pd.concat([manual, machine[manual.columns]], ignore_index=True)
+    demand = demand.drop_duplicates(['所属年月', '所属区域', '产品代码'], keep='first')
+    return demand
+
+
+@timed('补货计划')
+def compute_plan(actual_monthly, forecast_df, processed_inventory, start=None, service_level=0.95,
+                 lead_time=1, review_period=1, lot_size=1, history=12, machine_method='auto'):
+    """全部 SKU 一次性计算补货计划（需求单位：箱/月）
+
+    安全库存 = z × 汇总需求标准差 × √(提前期 + 盘点周期)，区域间需求视为独立（方差相加）；
+    定期盘点下一次补货要到下个盘点日才能下达，风险期覆盖提前期与盘点周期；
+    再订货点 = 提前期预测需求 + 安全库存；在库不高于再订货点时，建议生产量补足至
+    计划期（提前期 + 盘点周期）预测需求 + 安全库存，并按 lot_size 向上取整。
+    """
+    index, months, Y = series_matrix(actual_monthly)
+    Y = Y[:, -history:]
+    if start is None:
+        start = pd.Period(months[-1], freq='M') + 1
+    horizon = lead_time + review_period
+    plan_months = pd.period_range(pd.Period(start, freq='M'), periods=horizon, freq='M').strftime('%Y-%m').tolist()
+
+    # 区域×产品的历史需求均值与方差，汇总到产品
+    stats = index.to_frame(index=False)
+    stats['月均需求'] = Y.mean(axis=1)
+    stats['方差'] = Y.var(axis=1, ddof=1) if Y.shape[1] > 1 else 0.0
+    stats = stats.groupby('产品代码')[['月均需求', '方差']].sum()
+
+    # 计划期需求矩阵（产品 × 月份）及人工预测覆盖比例
+    demand = plan_demand(actual_monthly, forecast_df, plan_months, machine_method)
+    matrix = demand.pivot_table(index='产品代码', columns='所属年月', values='需求', aggfunc='sum', fill_value=0)
+    matrix = matrix.reindex(columns=plan_months, fill_value=0)
+    manual_share = demand.assign(人工需求=demand['需求'] * demand['人工'])
+    manual_share = manual_share.groupby('产品代码')[['人工需求', '需求']].sum()
+
+    # 在库与高风险库存
+    codes = risk_codes(processed_inventory['风险等级'])
+    high = codes >= RISK_DTYPE.categories.get_loc(HIGH_RISK_LEVEL)
+    quantity = processed_inventory['数量'].to_numpy(dtype=float)
+    materials = processed_inventory['物料'].to_numpy()
+    stock = pd.DataFrame({'在库数量': quantity, '高风险库存': np.where(high, quantity, 0.0)}).groupby(materials).sum()
+    names = processed_inventory.groupby('物料', observed=True)['产品名称'].first()
+
+    products = stats.index.union(matrix.index).union(stock.index)
+    stats = stats.reindex(products, fill_value=0.0)
+    matrix = matrix.reindex(products, fill_value=0.0).to_numpy(dtype=float)
+    stock = stock.reindex(products, fill_value=0.0)
+    manual_share = manual_share.reindex(products, fill_value=0.0)
+
+    z = NormalDist().inv_cdf(service_level)
+    sigma = np.sqrt(stats['方差'].to_numpy())
+    safety = z * sigma * np.sqrt(horizon)
+    lead_demand = matrix[:, :lead_time].sum(axis=1)
+    plan_total = matrix.sum(axis=1)
+    reorder_point = lead_demand + safety
+    on_hand = stock['在库数量'].to_numpy()
+    replenish = (on_hand <= reorder_point) & (plan_total + safety > on_hand)
+    suggested = np.where(replenish, np.ceil((plan_total + safety - on_hand) / lot_size) * lot_size, 0.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        share = manual_share['人工需求'].to_numpy() / manual_share['需求'].to_numpy()
+    source = np.select([np.isnan(share), share >= 1, share <= 0], ['无预测', '人工预测', '机器预测'], '混合')
+
+    return pd.DataFrame({
+        '产品代码': products,
+        '产品名称': names.reindex(products).to_numpy(),
+        '月均需求': stats['月均需求'].to_numpy(),
+        '需求标准差': sigma,
+        '提前期需求': lead_demand,
+        '计划期需求': plan_total,
+        '安全库存': safety,
+        '再订货点': reorder_point,
+        '在库数量': on_hand,
+        '高风险库存': stock['高风险库存'].to_numpy(),
+        '建议生产量': suggested,
+        '需要补货': replenish,
+        '预测来源': source
+    }, columns=PLAN_COLUMNS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='补货/生产计划')
+    parser.add_argument('--data-dir', default='.', help='工作簿所在目录')
+    parser.add_argument('--start', help='计划起始月份（默认为出货数据末月的下一月）')
+    parser.add_argument('--service-level', type=float, default=0.95)
+    parser.add_argument('--lead-time', type=int, default=1, help='生产提前期（月）')
+    parser.add_argument('--review-period', type=int, default=1, help='计划盘点周期（月）')
+    parser.add_argument('--lot-size', type=float, default=1, help='生产批量取整单位（箱）')
+    parser.add_argument('--history', type=int, default=12, help='需求波动统计使用的历史月数')
+    parser.add_argument('--output', default='生产计划.csv', help='计划表输出路径（.csv 或 .parquet）')
+    args = parser.parse_args(argv)
+
+    processed_inventory, _, _, forecast_df, _, _, _, actual_monthly = load_and_process_data(args.data_dir)
+
+    began = time.perf_counter()
+    plan = compute_plan(actual_monthly, forecast_df, processed_inventory, args.start, args.service_level,
+                        args.lead_time, args.review_period, args.lot_size, args.history)
+    elapsed = time.perf_counter() - began
+
+    if args.output.endswith('.parquet'):
+        plan.to_parquet(args.output, index=False)
+    else:
+        plan.to_csv(args.output, index=False, encoding='utf-8-sig')
+    print(f"{len(plan):,} 个 SKU，{int(plan['需要补货'].sum()):,} 个需要补货，"
+          f"建议生产 {plan['建议生产量'].sum():,.0f} 箱，耗时 {elapsed:.2f}s -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
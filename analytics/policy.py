@@ -0,0 +1,145 @@
+# analytics/policy.py - 库龄风险策略：阈值从配置文件加载，多策略一次分箱，预计算升级日期
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .config import COLOR_SCHEME, RISK_POLICY_FILE, RISK_THRESHOLDS
+
+# 风险等级词表与配色固定（按风险由低到高），策略只配置各等级的起始库龄、处理建议与损失率
+RISK_LEVELS = np.array([row[1] for row in RISK_THRESHOLDS], dtype=object)
+RISK_COLORS = np.array([COLOR_SCHEME[row[2]] for row in RISK_THRESHOLDS], dtype=object)
+RISK_DTYPE = pd.CategoricalDtype(RISK_LEVELS.tolist(), ordered=True)
+
+DEFAULT_POLICY_NAME = '标准'
+
+
+class RiskPolicy:
+    """库龄风险策略：按起始库龄升序排列的 (起始库龄, 风险等级, 处理建议, 损失率)"""
+
+    def __init__(self, name, thresholds):
+        thresholds = sorted(thresholds, key=lambda row: row[0])
+        if not thresholds or thresholds[0][0] != 0:
+            raise ValueError(f'策略 {name}: 首档起始库龄必须为 0')
+        starts = [row[0] for row in thresholds]
+        if len(set(starts)) != len(starts):
+            raise ValueError(f'策略 {name}: 起始库龄重复')
+        levels = [row[1] for row in thresholds]
+        unknown = [level for level in levels if level not in RISK_DTYPE.categories]
+        if unknown:
+            raise ValueError(f'策略 {name}: 未知风险等级 {unknown}')
+        codes = pd.Categorical(levels, dtype=RISK_DTYPE).codes
+        if (np.diff(codes) <= 0).any():
+            raise ValueError(f'策略 {name}: 风险等级须随库龄递增')
+
+        self.name = name
+        self.starts = np.array(starts)
+        self.bins = self.starts[1:]
+        self.levels = np.array(levels, dtype=object)
+        self.codes = codes
+        self.advice = np.array([row[2] for row in thresholds], dtype=object)
+        self.loss_rates = np.array([row[3] for row in thresholds], dtype=float)
+
+        # 按全局等级下标查处理建议（末位对应未知等级 -1）
+        self.advice_by_code = np.full(len(RISK_LEVELS) + 1, None, dtype=object)
+        self.advice_by_code[codes] = self.advice
+
+    def __repr__(self):
+        return f'RiskPolicy({self.name!r}, {self.starts.tolist()})'
+
+    @classmethod
+    def from_config(cls, name, rows):
+        """由配置项构建：[{'风险等级', '起始库龄', '处理建议', '损失率'}, ...]"""
+        return cls(name, [(int(row['起始库龄']), row['风险等级'], row['处理建议'], float(row['损失率']))
+                          for row in rows])
+
+    def to_config(self):
+        return [{'风险等级': level, '起始库龄': int(start), '处理建议': advice, '损失率': float(rate)}
+                for start, level, advice, rate in zip(self.starts, self.levels, self.advice, self.loss_rates)]
+
+    def classify(self, age_days):
+        """库龄分箱，返回策略内档位下标"""
+        return np.digitize(np.asarray(age_days), self.bins)
+
+    def level_codes(self, bucket):
+        """策略档位转为全局风险等级下标"""
+        return self.codes[bucket]
+
+    def categorical(self, bucket):
+        return pd.Categorical.from_codes(self.level_codes(bucket), dtype=RISK_DTYPE)
+
+    def crossing_dates(self, prod_date):
+        """每个批次进入各后续档位的日期矩阵 (批次数 × 档位边界数)"""
+        prod_date = np.asarray(prod_date, dtype='datetime64[ns]')
+        return prod_date[:, None] + self.bins.astype('timedelta64[D]')[None, :]
+
+    def next_crossing(self, prod_date, bucket):
+        """进入下一档位的日期，已在最高档的批次为 NaT"""
+        prod_date = np.asarray(prod_date, dtype='datetime64[ns]')
+        bucket = np.asarray(bucket)
+        crossing = np.full(len(prod_date), np.datetime64('NaT'), dtype='datetime64[ns]')
+        rising = bucket < len(self.bins)
+        crossing[rising] = prod_date[rising] + self.bins[bucket[rising]].astype('timedelta64[D]')
+        return crossing
+
+    @staticmethod
+    def bucket_as_of(crossings, as_of):
+        """由预计算的升级日期矩阵得到某日的档位：已跨过的边界数"""
+        return (crossings <= np.datetime64(as_of, 'ns')).sum(axis=1)
+
+
+DEFAULT_POLICY = RiskPolicy(DEFAULT_POLICY_NAME, [(row[0], row[1], row[3], row[4]) for row in RISK_THRESHOLDS])
+
+
+def load_policies(path=RISK_POLICY_FILE):
+    """读取策略配置文件，返回 {策略名: RiskPolicy}，默认策略排在首位；文件不存在时只含内置标准策略"""
+    path = Path(path)
+    if not path.exists():
+        return {DEFAULT_POLICY.name: DEFAULT_POLICY}
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    policies = {name: RiskPolicy.from_config(name, rows) for name, rows in config['policies'].items()}
+    default = config.get('default', next(iter(policies)))
+    if default not in policies:
+        raise ValueError(f'默认策略 {default} 未在配置中定义')
+    return {default: policies[default], **policies}
+
+
+def load_policy(path=RISK_POLICY_FILE, name=None):
+    """读取单个策略，name 为空时取配置中的默认策略"""
+    policies = load_policies(path)
+    return policies[name] if name is not None else next(iter(policies.values()))
+
+
+def evaluate_policies(age_days, policies):
+    """多个策略一次分箱：按全部策略边界的并集分箱一次，再经小查找表映射为各策略档位
+
+    返回 {策略名: 策略内档位下标}。
+    """
+    policies = list(policies)
+    age_days = np.asarray(age_days)
+    edges = np.unique(np.concatenate([policy.bins for policy in policies]))
+    union = np.digitize(age_days, edges)
+    lower = np.concatenate([[np.iinfo(np.int64).min], edges])
+    return {policy.name: policy.classify(lower)[union] for policy in policies}
+
+
+def compare_policies(processed_inventory, policies):
+    """各策略下按风险等级汇总批次数、批次价值与预期损失"""
+    policies = list(policies)
+    buckets = evaluate_policies(processed_inventory['库龄'].to_numpy(), policies)
+    values = processed_inventory['批次价值'].to_numpy(dtype=float)
+    frames = []
+    for policy in policies:
+        bucket = buckets[policy.name]
+        n = len(policy.levels)
+        frames.append(pd.DataFrame({
+            '策略': policy.name,
+            '风险等级': policy.levels,
+            '起始库龄': policy.starts,
+            '批次数': np.bincount(bucket, minlength=n),
+            '批次价值': np.bincount(bucket, weights=values, minlength=n),
+            '预期损失': np.bincount(bucket, weights=values * policy.loss_rates[bucket], minlength=n)
+        }))
+    return pd.concat(frames, ignore_index=True)
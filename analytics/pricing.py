@@ -0,0 +1,39 @@
+# analytics/pricing.py - 单价解析层：产品代码 → 单价 的哈希索引
+import numpy as np
+import pandas as pd
+
+from .config import DEFAULT_PRICE
+
+
+class PriceIndex:
+    """每次加载构建一次的单价索引，记录回退到默认单价的物料"""
+
+    def __init__(self, price_df, default=DEFAULT_PRICE):
+        # 与原逻辑一致：同一产品代码取首条单价
+        first = price_df[price_df['产品代码'].notna()].drop_duplicates('产品代码', keep='first')
+        self.index = pd.Index(first['产品代码'].to_numpy())
+        self.prices = first['单价'].to_numpy(dtype=float)
+        self.default = default
+        self.fallbacks = set()
+
+    def __len__(self):
+        return len(self.index)
+
+    def lookup(self, codes):
+        """批量查询单价，未匹配的产品代码使用默认单价并登记"""
+        codes = np.asarray(codes, dtype=object)
+        if len(self.index) == 0:
+            self.fallbacks.update(pd.unique(codes).tolist())
+            return np.full(len(codes), self.default, dtype=float)
+        pos = self.index.get_indexer(codes)
+        found = pos >= 0
+        if not found.all():
+            self.fallbacks.update(pd.unique(codes[~found]).tolist())
+        return np.where(found, self.prices[pos], self.default)
+
+    def fallback_report(self):
+        """回退到默认单价的物料清单"""
+        return pd.DataFrame({
+            '产品代码': sorted(self.fallbacks),
+            '单价': self.default
+        })
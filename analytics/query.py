@@ -0,0 +1,117 @@
+# analytics/query.py - 批次明细查询层：预建排序键与索引，服务端分页
+import numpy as np
+import pandas as pd
+
+from .config import RISK_THRESHOLDS
+from .instrument import timed
+from .policy import RISK_DTYPE
+from .risk import RISK_LABELS, risk_codes, risk_label
+
+DISPLAY_COLUMNS = ['物料', '产品名称', '生产日期', '生产批号', '数量', '库龄', '风险等级', '批次价值', '处理建议']
+
+# 风险排序：极高风险在前
+RISK_ORDER = {row[1]: rank for rank, row in enumerate(reversed(RISK_THRESHOLDS))}
+
+
+class BatchQuery:
+    """每个数据版本构建一次：按 (风险排序, 库龄降序) 预排序，并按风险等级与批次价值建立索引
+
+    查询返回预排序表中的行号（升序即为展示顺序），渲染时只格式化当前页。
+    """
+
+    @timed('批次查询索引')
+    def __init__(self, processed_inventory, policy=None):
+        self.policy = policy
+        # 风险排序按等级下标换算（极高风险为 0，未知等级排最后），全程不转为字符串
+        codes = risk_codes(processed_inventory['风险等级'])
+        rank = np.where(codes < 0, len(RISK_ORDER), len(RISK_ORDER) - 1 - codes)
+        age = processed_inventory['库龄'].to_numpy()
+        order = np.lexsort((-age, rank))
+        self.frame = processed_inventory.iloc[order].reset_index(drop=True)
+
+        self.values = self.frame['批次价值'].to_numpy(dtype=float)
+        self.ages = self.frame['库龄'].to_numpy()
+        self.codes = codes[order]
+
+        # 预排序后每个风险等级占一段连续行号
+        sorted_rank = rank[order]
+        self.by_risk = {}
+        for level_rank in np.unique(sorted_rank[sorted_rank < len(RISK_ORDER)]):
+            lo, hi = np.searchsorted(sorted_rank, [level_rank, level_rank + 1])
+            self.by_risk[RISK_DTYPE.categories[len(RISK_ORDER) - 1 - level_rank]] = np.arange(lo, hi)
+
+        # 批次价值索引：价值升序的行号及对应价值，用于范围查询
+        self.value_order = np.argsort(self.values, kind='stable')
+        self.sorted_values = self.values[self.value_order]
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def risk_levels(self):
+        """按风险排序的风险等级"""
+        return sorted(self.by_risk, key=lambda level: RISK_ORDER.get(level, len(RISK_ORDER)))
+
+    def filter(self, risk=None, min_value=None, max_value=None, max_age=None):
+        """按风险等级、批次价值区间、最大库龄筛选，返回升序行号"""
+        if risk is not None:
+            positions = self.by_risk.get(risk, np.array([], dtype=np.int64))
+        else:
+            positions = None
+
+        if min_value is not None or max_value is not None:
+            lo = 0 if min_value is None else np.searchsorted(self.sorted_values, min_value, side='left')
+            hi = len(self) if max_value is None else np.searchsorted(self.sorted_values, max_value, side='right')
+            # 价值区间更窄时从价值索引出发，否则直接在候选行上比较
+            if positions is None or hi - lo < len(positions):
+                candidates = np.sort(self.value_order[lo:hi])
+                if positions is not None:
+                    candidates = candidates[self.codes[candidates] == RISK_DTYPE.categories.get_loc(risk)]
+                positions = candidates
+            else:
+                values = self.values[positions]
+                keep = np.ones(len(positions), dtype=bool)
+                if min_value is not None:
+                    keep &= values >= min_value
+                if max_value is not None:
+                    keep &= values <= max_value
+                positions = positions[keep]
+
+        if positions is None:
+            positions = np.arange(len(self))
+        if max_age is not None:
+            positions = positions[self.ages[positions] <= max_age]
+        return positions
+
+    def summary(self, positions):
+        """筛选结果统计：批次数、总价值、平均库龄"""
+        count = len(positions)
+        return {
+            'count': count,
+            'total_value': float(self.values[positions].sum()),
+            'avg_age': float(self.ages[positions].mean()) if count else 0.0
+        }
+
+    def rows(self, positions, columns=DISPLAY_COLUMNS):
+        """取筛选结果的原始行（按展示顺序），风险颜色/处理建议按风险等级查表生成"""
+        stored = [c for c in columns if c in self.frame.columns]
+        data = self.frame.iloc[positions][stored].reset_index(drop=True)
+        for column in columns:
+            if column not in stored and column in RISK_LABELS:
+                data[column] = risk_label(pd.Categorical.from_codes(self.codes[positions], dtype=RISK_DTYPE), column, self.policy)
+        return data[list(columns)]
+
+    def page(self, positions, page=1, page_size=50, columns=DISPLAY_COLUMNS):
+        """取第 page 页（从 1 开始）并格式化用于展示"""
+        start = (page - 1) * page_size
+        data = self.rows(positions[start:start + page_size], columns)
+        if '批次价值' in data.columns:
+            data['批次价值'] = [f"¥{x:,.0f}" for x in data['批次价值']]
+        if '生产日期' in data.columns:
+            data['生产日期'] = data['生产日期'].dt.strftime('%Y-%m-%d')
+        data.index = np.arange(start + 1, start + 1 + len(data))
+        return data
+
+    @staticmethod
+    def page_count(positions, page_size=50):
+        return max(1, -(-len(positions) // page_size))
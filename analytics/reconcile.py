@@ -0,0 +1,174 @@
+# analytics/reconcile.py - 全国 / 区域 / 产品 / 区域×产品 四层预测调和（稀疏汇总矩阵）
+# 各层级独立拟合机器预测后调和，使区域×产品预测之和与区域、产品、全国预测一致。
+# 夜间批处理: python -m analytics.reconcile --methods bottom_up top_down wls mint --horizon 3
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
+from .accuracy import error_metrics
+from .config import DATA_FILES
+from .forecasting import MACHINE_COL, fit_forecast, series_matrix
+from .incremental import monthly_actuals
+from .instrument import timed
+from .schema import read_source
+
+RECONCILE_METHODS = ('bottom_up', 'top_down', 'wls', 'mint')
+BASE_METHOD = 'base'
+LEVELS = ['全国', '区域', '产品', '区域×产品']
+
+
+class Hierarchy:
+    """由底层 (所属区域, 产品代码) 序列索引构建的分组层级
+
+    汇总矩阵 S = [C; I]：C 的各行依次为全国、各区域、各产品，对应底层序列求和。
+    """
+
+    def __init__(self, index):
+        bottom = index.to_frame(index=False)
+        region_codes, regions = pd.factorize(bottom['所属区域'], sort=True)
+        product_codes, products = pd.factorize(bottom['产品代码'], sort=True)
+        n = len(bottom)
+        cols = np.arange(n)
+        rows = np.concatenate([np.zeros(n, dtype=int), 1 + region_codes, 1 + len(regions) + product_codes])
+        self.C = sparse.csr_matrix((np.ones(3 * n), (rows, np.tile(cols, 3))),
+                                   shape=(1 + len(regions) + len(products), n))
+        self.S = sparse.vstack([self.C, sparse.identity(n, format='csr')], format='csr')
+        self.n_bottom = n
+        self.n_aggregate = self.C.shape[0]
+
+        self.labels = pd.DataFrame({
+            '层级': np.repeat(LEVELS, [1, len(regions), len(products), n]),
+            '所属区域': np.concatenate([['全部'], regions, np.full(len(products), '全部', dtype=object),
+                                    bottom['所属区域'].to_numpy()]),
+            '产品代码': np.concatenate([['全部'], np.full(len(regions), '全部', dtype=object), products,
+                                    bottom['产品代码'].to_numpy()])
+        })
+
+    def aggregate(self, Y_bottom):
+        """底层矩阵汇总为全部层级（行顺序同 labels）"""
+        return self.S @ Y_bottom
+
+    def reconcile(self, base, method='mint', weights=None, proportions=None):
+        """调和全部层级的基础预测 base（层级序列数 × 期数），返回一致的全部层级预测
+
+        bottom_up 只取底层预测；top_down 按 proportions（底层占全国的历史比例）拆分全国预测；
+        wls / mint 为 MinT 广义最小二乘调和，权重分别为各序列包含的底层序列数与样本内误差方差（weights）。
+        """
+        base_a, base_b = base[:self.n_aggregate], base[self.n_aggregate:]
+        if method == 'bottom_up':
+            bottom = base_b
+        elif method == 'top_down':
+            bottom = np.outer(proportions, base_a[0])
+        elif method in ('wls', 'mint'):
+            w = np.asarray(self.S.sum(axis=1)).ravel() if method == 'wls' else weights
+            # Woodbury：b = ŷ_b + W_b C' (W_a + C W_b C')⁻¹ (ŷ_a - C ŷ_b)，只需分解 聚合序列数 阶的稀疏矩阵
+            w_a, w_b = w[:self.n_aggregate], w[self.n_aggregate:]
+            system = sparse.diags(w_a) + self.C @ sparse.diags(w_b) @ self.C.T
+            gap = splu(system.tocsc()).solve(np.ascontiguousarray(base_a - self.C @ base_b))
+            bottom = base_b + w_b[:, None] * (self.C.T @ gap)
+        else:
+            raise ValueError(f'未知调和方法: {method}')
+        return self.aggregate(bottom)
+
+
+def _variance_weights(actual, fitted):
+    """各序列样本内一步误差方差（MinT 对角权重），方差为 0 的序列取全体方差均值的万分之一"""
+    residual = actual - fitted
+    with np.errstate(invalid='ignore'):
+        variance = np.nanmean(residual ** 2, axis=1)
+    floor = max(np.nanmean(variance) * 1e-4, 1e-9) if np.isfinite(variance).any() else 1.0
+    return np.where(np.isfinite(variance) & (variance > floor), variance, floor)
+
+
+@timed('层级调和')
+def reconcile_forecasts(actual_monthly, methods=RECONCILE_METHODS, forecast_method='auto', horizon=0):
+    """各层级独立拟合机器预测并按 methods 调和
+
+    返回 (hierarchy, months, actual, forecasts)：actual 为全部层级的实际矩阵，forecasts[方法] 为
+    (样本内一步预测, 未来 horizon 期预测)，其中 'base' 为调和前的基础预测。
+    """
+    index, months, Y = series_matrix(actual_monthly)
+    hierarchy = Hierarchy(index)
+    actual = hierarchy.aggregate(Y)
+    fitted, future, _ = fit_forecast(actual, forecast_method, horizon)
+    fitted = np.maximum(fitted, 0)
+    future = np.maximum(future, 0)
+
+    # 首月无一步预测，调和从第二个月起
+    valid = ~np.isnan(fitted).any(axis=0)
+    weights = _variance_weights(actual[:, valid], fitted[:, valid])
+    total = actual[0].sum()
+    proportions = Y.sum(axis=1) / total if total > 0 else np.full(len(Y), 1 / max(len(Y), 1))
+
+    forecasts = {BASE_METHOD: (fitted, future)}
+    for method in methods:
+        reconciled = np.full(fitted.shape, np.nan)
+        reconciled[:, valid] = hierarchy.reconcile(fitted[:, valid], method, weights, proportions)
+        projected = hierarchy.reconcile(future, method, weights, proportions) if horizon else future
+        forecasts[method] = (reconciled, projected)
+    return hierarchy, months, actual, forecasts
+
+
+def reconciliation_accuracy(hierarchy, months, actual, forecasts, start=None):
+    """调和前后各层级的样本内一步预测误差指标（%）：准确率、MAPE、WMAPE、偏差"""
+    window = np.ones(len(months), dtype=bool) if start is None else np.asarray(months) >= start
+    level = hierarchy.labels['层级'].to_numpy()
+    rows = []
+    for method, (fitted, _) in forecasts.items():
+        valid = window & ~np.isnan(fitted).any(axis=0)
+        for name in LEVELS:
+            mask = level == name
+            metrics = error_metrics(actual[mask][:, valid], fitted[mask][:, valid])
+            rows.append({'方法': method, '层级': name, '序列数': int(mask.sum()),
+                         **{key: value * 100 for key, value in metrics.items()}})
+    return pd.DataFrame(rows)
+
+
+def coherence_gap(hierarchy, values):
+    """聚合层级与底层求和之差的最大绝对值（0 表示完全一致）"""
+    values = values[:, ~np.isnan(values).any(axis=0)]
+    return float(np.abs(hierarchy.C @ values[hierarchy.n_aggregate:] - values[:hierarchy.n_aggregate]).max(initial=0))
+
+
+def forecast_table(hierarchy, months, forecasts, method):
+    """某调和方法的未来各期预测长表（全部层级）"""
+    future = forecasts[method][1]
+    future_months = pd.period_range(pd.Period(months[-1], freq='M') + 1, periods=future.shape[1],
+                                    freq='M').strftime('%Y-%m').tolist()
+    result = hierarchy.labels.loc[np.repeat(np.arange(len(hierarchy.labels)), len(future_months))]
+    result = result.reset_index(drop=True)
+    result.insert(0, '所属年月', np.tile(future_months, len(hierarchy.labels)))
+    result[MACHINE_COL] = future.ravel()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='层级预测调和')
+    parser.add_argument('--shipment', default=DATA_FILES['shipment'], help='出货数据工作簿')
+    parser.add_argument('--methods', nargs='+', default=list(RECONCILE_METHODS), choices=RECONCILE_METHODS)
+    parser.add_argument('--start', help='准确率评估起始月份（默认全部历史）')
+    parser.add_argument('--horizon', type=int, default=3)
+    parser.add_argument('--output', help='调和后未来预测输出路径（.csv 或 .parquet，取 --methods 中的第一个方法）')
+    args = parser.parse_args(argv)
+
+    actual_monthly = monthly_actuals(read_source(args.shipment, 'shipment')[0])
+    began = time.perf_counter()
+    hierarchy, months, actual, forecasts = reconcile_forecasts(actual_monthly, args.methods, horizon=args.horizon)
+    elapsed = time.perf_counter() - began
+
+    print(reconciliation_accuracy(hierarchy, months, actual, forecasts, args.start).round(2).to_string(index=False))
+    print(f'{hierarchy.n_bottom:,} 条底层序列，{hierarchy.n_aggregate:,} 条聚合序列，耗时 {elapsed:.2f}s')
+    if args.output:
+        table = forecast_table(hierarchy, months, forecasts, args.methods[0])
+        if args.output.endswith('.csv'):
+            table.to_csv(args.output, index=False, encoding='utf-8-sig')
+        else:
+            table.to_parquet(args.output, index=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+# analytics/risk.py - 列式批次风险引擎
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .instrument import timed
+from .policy import DEFAULT_POLICY, RISK_COLORS, RISK_DTYPE
+from .pricing import PriceIndex
+
+BATCH_COLUMNS = ['物料', '产品名称', '生产日期', '生产批号', '数量', '库龄',
+                 '风险等级', '单价', '批次价值', '预期损失', '下次升级日期']
+
+# 颜色与处理建议不落表，渲染时按风险等级查表
+RISK_LABELS = ('风险颜色', '处理建议')
+
+
+def header_mask(inventory_df):
+    """标记物料表头行（物料列为以F开头的字符串）"""
+    material = inventory_df['物料']
+    if not (pd.api.types.is_object_dtype(material) or pd.api.types.is_string_dtype(material)):
+        return np.zeros(len(material), dtype=bool)
+    return material.str.startswith('F', na=False).to_numpy(dtype=bool)
+
+
+def build_product_name_map(inventory_df):
+    """创建产品代码到名称的映射"""
+    mask = header_mask(inventory_df) & inventory_df['描述'].notna().to_numpy()
+    return dict(zip(inventory_df['物料'].to_numpy()[mask], inventory_df['描述'].to_numpy()[mask]))
+
+
+def classify_age(age_days, policy=None):
+    """按风险策略将库龄分箱，返回各批次所在档位下标"""
+    return (policy or DEFAULT_POLICY).classify(age_days)
+
+
+def risk_codes(levels):
+    """风险等级转为档位下标，未知等级为 -1"""
+    if isinstance(levels, pd.Series) and levels.dtype == RISK_DTYPE:
+        return levels.cat.codes.to_numpy()
+    if isinstance(levels, pd.Categorical) and levels.dtype == RISK_DTYPE:
+        return levels.codes
+    return pd.Categorical(np.asarray(levels, dtype=object), dtype=RISK_DTYPE).codes
+
+
+def risk_label(levels, column, policy=None):
+    """按风险等级查表得到风险颜色或（所用策略的）处理建议"""
+    codes = risk_codes(levels)
+    if column == '风险颜色':
+        table = np.append(RISK_COLORS, None)
+    else:
+        table = (policy or DEFAULT_POLICY).advice_by_code
+    return table[codes]
+
+
+def with_risk_labels(processed_inventory, policy=None):
+    """追加风险颜色与处理建议列（用于导出完整明细，返回新表）"""
+    result = processed_inventory.copy()
+    position = result.columns.get_loc('风险等级') + 1
+    for offset, column in enumerate(RISK_LABELS):
+        result.insert(position + offset, column, risk_label(result['风险等级'], column, policy))
+    return result
+
+
+def compact_dtypes(processed):
+    """窄化批次表：物料/产品名称/风险等级转分类，数量与单价降为 float32，库龄降为最小整数类型
+
+    批次价值与预期损失保持 float64，汇总金额不受精度影响。
+    """
+    processed['物料'] = processed['物料'].astype('category')
+    processed['产品名称'] = processed['产品名称'].astype('category')
+    processed['数量'] = processed['数量'].astype(np.float32)
+    processed['库龄'] = pd.to_numeric(processed['库龄'], downcast='integer')
+    processed['单价'] = processed['单价'].astype(np.float32)
+    return processed
+
+
+@timed('库存风险计算')
+def process_inventory(inventory_df, prices, now=None, policy=None, keep=()):
+    """处理库存数据：表头行前向填充物料，批次行一次性计算库龄、风险、损失与下次升级日期
+
+    prices 可为单价表或已构建的 PriceIndex；policy 默认为内置标准策略；
+    keep 中的列（如仓库、快照日期）从批次行原样带入结果。
+    """
+    now = now or datetime.now()
+    policy = policy or DEFAULT_POLICY
+    if not isinstance(prices, PriceIndex):
+        prices = PriceIndex(prices)
+    is_header = header_mask(inventory_df)
+
+    # 每行归属的表头序号（0 表示出现在首个表头之前）
+    group = np.cumsum(is_header)
+    header_pos = np.flatnonzero(is_header)
+    is_batch = ~is_header & inventory_df['生产日期'].notna().to_numpy() & (group > 0)
+    if not is_batch.any():
+        return pd.DataFrame(columns=BATCH_COLUMNS + list(keep)).astype({'风险等级': RISK_DTYPE})
+
+    header_materials = inventory_df['物料'].to_numpy()[header_pos]
+    header_desc = inventory_df['描述'].to_numpy()[header_pos]
+    header_price = prices.lookup(header_materials)
+
+    owner = group[is_batch] - 1
+    batches = inventory_df.loc[is_batch]
+    prod_date = pd.to_datetime(batches['生产日期'])
+    quantity = batches['数量'].fillna(0)
+    price = header_price[owner]
+
+    age_days = (now - prod_date).dt.days.to_numpy()
+    bucket = policy.classify(age_days)
+    value = quantity.to_numpy() * price
+
+    processed = pd.DataFrame({
+        '物料': header_materials[owner],
+        '产品名称': header_desc[owner],
+        '生产日期': prod_date.to_numpy(),
+        '生产批号': batches['生产批号'].fillna('').to_numpy(),
+        '数量': quantity.to_numpy(),
+        '库龄': age_days,
+        '风险等级': policy.categorical(bucket),
+        '单价': price,
+        '批次价值': value,
+        '预期损失': value * policy.loss_rates[bucket],
+        '下次升级日期': policy.next_crossing(prod_date.to_numpy(), bucket)
+    })
+    for col in keep:
+        processed[col] = batches[col].array
+    return compact_dtypes(processed)
@@ -0,0 +1,155 @@
+# analytics/schema.py - 数据源结构校验：只读取所需列，一次性校验列名与类型，错误信息给出行号与数量
+# 检查数据目录: python -m analytics.schema --data-dir .
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from .cache import read_excel_cached
+from .config import ACTUAL_COL, CACHE_DIR, DATA_FILES, FORECAST_COL
+from .instrument import stage
+
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = 'calamine'
+except ImportError:
+    EXCEL_ENGINE = None
+
+# 各数据源所需列及类型：string / number / datetime / month（YYYY-MM）
+SCHEMAS = {
+    'shipment': {'订单日期': 'datetime', '所属区域': 'string', '产品代码': 'string', ACTUAL_COL: 'number'},
+    'forecast': {'所属年月': 'month', '所属区域': 'string', '产品代码': 'string', FORECAST_COL: 'number'},
+    'inventory': {'物料': 'string', '描述': 'string', '生产日期': 'datetime', '生产批号': 'string', '数量': 'number'},
+    'price': {'产品代码': 'string', '单价': 'number'}
+}
+
+KIND_LABELS = {'string': '文本', 'number': '数值', 'datetime': '日期', 'month': '年月(YYYY-MM)'}
+
+# 错误信息中列出的示例行数
+MAX_EXAMPLES = 5
+
+
+class SchemaError(ValueError):
+    """数据源结构不符：汇总全部问题后一次性抛出"""
+
+    def __init__(self, source, path, problems, rows=None):
+        self.source = source
+        self.path = str(path) if path is not None else None
+        self.problems = problems
+        self.rows = rows
+        where = f'{source}（{self.path}）' if self.path else source
+        counted = f'，共 {rows:,} 行' if rows is not None else ''
+        super().__init__(f'{where}{counted}：' + '；'.join(problems))
+
+
+def _coerce(values, kind):
+    """按类型转换一列，无法转换的值变为空值"""
+    if kind == 'number':
+        return pd.to_numeric(values, errors='coerce')
+    if kind == 'datetime':
+        return pd.to_datetime(values, errors='coerce')
+    if kind == 'month':
+        return pd.to_datetime(values.astype('string'), format='%Y-%m', errors='coerce') \
+            if not pd.api.types.is_datetime64_any_dtype(values) else values
+    if pd.api.types.is_string_dtype(values) or pd.api.types.is_object_dtype(values):
+        return values.where(values.isna(), values.astype(str))
+    return values.astype('string')
+
+
+def validate_frame(df, source, path=None):
+    """校验并转换为 SCHEMAS[source] 的列与类型（返回新表），不符时抛出 SchemaError
+
+    缺失列与各列无法转换的行一并报告，行号为 Excel 行号（含表头）。
+    """
+    schema = SCHEMAS[source]
+    missing = [col for col in schema if col not in df.columns]
+    if missing:
+        raise SchemaError(source, path, [f'缺少列 {missing}（现有列 {list(df.columns)}）'], len(df))
+
+    result = pd.DataFrame(index=df.index)
+    problems = []
+    for col, kind in schema.items():
+        values = df[col]
+        result[col] = converted = _coerce(values, kind)
+        bad = converted.isna().to_numpy() & values.notna().to_numpy()
+        if bad.any():
+            rows = (df.index[bad][:MAX_EXAMPLES] + 2).tolist()
+            examples = values[bad].head(MAX_EXAMPLES).tolist()
+            problems.append(f"列 '{col}' 有 {int(bad.sum()):,} 行无法转为{KIND_LABELS[kind]}（Excel 行 {rows}，值 {examples}）")
+    if problems:
+        raise SchemaError(source, path, problems, len(df))
+    return result.reset_index(drop=True)
+
+
+def source_read_kwargs(source):
+    """数据源的 read_excel 参数：只读所需列，文本列显式按字符串读取"""
+    schema = SCHEMAS[source]
+    read_kwargs = {'usecols': list(schema), 'dtype': {col: str for col, kind in schema.items() if kind == 'string'}}
+    if EXCEL_ENGINE:
+        read_kwargs['engine'] = EXCEL_ENGINE
+    return read_kwargs
+
+
+def read_source(path, source, cache_dir=None):
+    """只读取所需列并校验，返回 (数据表, 加载记录)；cache_dir 默认为工作簿所在目录下的缓存目录"""
+    schema = SCHEMAS[source]
+    if not Path(path).exists():
+        raise SchemaError(source, path, ['文件不存在'])
+    read_kwargs = source_read_kwargs(source)
+
+    start = time.perf_counter()
+    try:
+        raw = read_excel_cached(path, cache_dir, **read_kwargs)
+    except ValueError as error:
+        # usecols 与表头不符：只读表头以报告确切的缺失列
+        header = pd.read_excel(path, nrows=0)
+        missing = [col for col in schema if col not in header.columns]
+        if not missing:
+            raise
+        raise SchemaError(source, path, [f'缺少列 {missing}（现有列 {list(header.columns)}）']) from error
+    read_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    df = validate_frame(raw, source, path)
+    validate_time = time.perf_counter() - start
+    return df, {
+        '数据源': source,
+        '文件': Path(path).name,
+        '行数': len(df),
+        '列数': len(df.columns),
+        '读取(s)': round(read_time, 3),
+        '校验(s)': round(validate_time, 3),
+        '内存(MB)': round(df.memory_usage(deep=True).sum() / 1024 ** 2, 2)
+    }
+
+
+def load_sources(data_dir='.', cache_dir=None, files=None):
+    """读取并校验全部数据源，返回 ({数据源: 数据表}, 加载记录表)"""
+    frames, report = {}, []
+    for source, file_name in (files or DATA_FILES).items():
+        with stage(f'读取数据源:{source}') as timing:
+            frames[source], record = read_source(Path(data_dir) / file_name, source, cache_dir)
+            timing['输出行数'] = len(frames[source])
+        report.append(record)
+    return frames, pd.DataFrame(report)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='校验数据源结构')
+    parser.add_argument('--data-dir', default='.', help='工作簿所在目录')
+    parser.add_argument('--cache-dir', help=f'缓存目录（默认为 数据目录/{CACHE_DIR}）')
+    args = parser.parse_args(argv)
+
+    try:
+        _, report = load_sources(args.data_dir, args.cache_dir)
+    except SchemaError as error:
+        print(f'校验失败 - {error}', file=sys.stderr)
+        return 1
+    print(report.to_string(index=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+# analytics/sketch.py - 可合并的分组分位数草图（对数分桶，分位数相对误差不超过 relative_accuracy）
+# 每组只保存 (桶号, 计数)：分区或并行结果相加即可合并，去掉维度即上卷，计数相减即可撤回某个分区。
+import numpy as np
+import pandas as pd
+
+# 绝对值不超过该值的样本计入 0 号桶
+MIN_VALUE = 1e-6
+
+
+class QuantileSketch:
+    """按 dims 分组的对数分桶分位数草图（支持带符号数值）
+
+    桶号 k 覆盖绝对值 (MIN_VALUE·γ^(k-1), MIN_VALUE·γ^k]，γ = (1 + α) / (1 - α)，负数取 -k，
+    桶号与数值同序；以桶中点回代时分位数的相对误差不超过 α。
+    """
+
+    def __init__(self, dims=(), relative_accuracy=0.01, counts=None):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f'relative_accuracy 须在 (0, 1) 内: {relative_accuracy}')
+        self.dims = list(dims)
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        if counts is None:
+            counts = pd.DataFrame({**{d: pd.Series(dtype=object) for d in self.dims},
+                                   '桶': pd.Series(dtype='int64'), '计数': pd.Series(dtype='int64')})
+        self.counts = counts
+
+    def _keys(self, values):
+        """数值转为有序桶号"""
+        values = np.asarray(values, dtype=float)
+        magnitude = np.abs(values)
+        with np.errstate(divide='ignore'):
+            k = np.ceil(np.log(magnitude / MIN_VALUE) / np.log(self.gamma))
+        k = np.where(magnitude > MIN_VALUE, np.maximum(k, 1), 0).astype('int64')
+        return np.sign(values).astype('int64') * k
+
+    def _values(self, keys):
+        """桶号回代为桶中点"""
+        keys = np.asarray(keys, dtype='int64')
+        magnitude = MIN_VALUE * 2 * self.gamma ** np.abs(keys).astype(float) / (self.gamma + 1)
+        return np.where(keys == 0, 0.0, np.sign(keys) * magnitude)
+
+    def _like(self, counts):
+        return QuantileSketch(self.dims, self.relative_accuracy, counts)
+
+    def update(self, frame, value_col):
+        """加入 frame[value_col] 的样本（NaN 忽略），返回合并后的新草图"""
+        values = frame[value_col].to_numpy(dtype=float)
+        valid = ~np.isnan(values)
+        batch = frame.loc[valid, self.dims].reset_index(drop=True)
+        batch['桶'] = self._keys(values[valid])
+        batch['计数'] = 1
+        return self.merge(self._like(batch))
+
+    def merge(self, other):
+        """合并另一个同参数草图（各桶计数相加）"""
+        if other.dims != self.dims or other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('只能合并维度与精度相同的草图')
+        return self._like(self._collapse(pd.concat([self.counts, other.counts], ignore_index=True), self.dims))
+
+    def subtract(self, other):
+        """撤回 other 中的样本（如重算某月前先扣除旧分区）"""
+        return self.merge(self._like(other.counts.assign(计数=-other.counts['计数'])))
+
+    @staticmethod
+    def _collapse(counts, dims):
+        """按 (dims, 桶) 汇总计数并去掉计数为 0 的桶"""
+        counts = counts.groupby(list(dims) + ['桶'], sort=True, observed=True)['计数'].sum().reset_index()
+        return counts[counts['计数'] != 0].reset_index(drop=True)
+
+    def rollup(self, dims=()):
+        """上卷到 dims（dims 须为当前维度的子集）"""
+        dims = [dims] if isinstance(dims, str) else list(dims)
+        unknown = set(dims) - set(self.dims)
+        if unknown:
+            raise KeyError(f'未知维度: {sorted(unknown)}')
+        dims = [d for d in self.dims if d in dims]
+        return QuantileSketch(dims, self.relative_accuracy, self._collapse(self.counts, dims))
+
+    def quantiles(self, qs=(0.5, 0.9), by=None):
+        """各组分位数表：by 缺省为全部维度，列为 by + 样本数 + 'P50' 等"""
+        sketch = self if by is None else self.rollup(by)
+        counts = sketch.counts
+        if counts.empty:
+            return pd.DataFrame(columns=sketch.dims + ['样本数'] + [f'P{q * 100:g}' for q in qs])
+
+        # 桶已按 (dims, 桶) 排序：全局累计计数单调，第 q 分位为组内累计计数首次超过 q·(n-1) 的桶
+        count = counts['计数'].to_numpy()
+        cum = np.cumsum(count)
+        if sketch.dims:
+            group = counts.groupby(sketch.dims, sort=True, observed=True).ngroup().to_numpy()
+            starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+        else:
+            starts = np.array([0])
+        ends = np.r_[starts[1:], len(counts)]
+        offset = np.r_[0, cum][starts]
+        total = cum[ends - 1] - offset
+
+        result = counts.iloc[starts][sketch.dims].reset_index(drop=True)
+        result['样本数'] = total
+        keys = counts['桶'].to_numpy()
+        for q in qs:
+            position = np.searchsorted(cum, offset + q * (total - 1), side='right')
+            result[f'P{q * 100:g}'] = sketch._values(keys[np.minimum(position, ends - 1)])
+        return result
@@ -0,0 +1,167 @@
+# analytics/synthetic.py - 按工作簿结构生成合成数据（基准测试用）
+# 生成四个工作簿: python -m analytics.synthetic --output-dir synthetic --batches 20000 --shipments 200000
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .config import ACTUAL_COL, DATA_FILES, FORECAST_COL
+
+
+def make_materials(n_materials, seed=0):
+    """生成 F 开头的产品代码"""
+    rng = np.random.default_rng(seed)
+    codes = rng.choice(np.arange(36 ** 5), size=n_materials, replace=False)
+    digits = np.array(list('0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'))
+    chars = [digits[(codes // 36 ** k) % 36] for k in range(4, -1, -1)]
+    return ['F' + ''.join(parts) for parts in zip(*chars)]
+
+
+def make_inventory(n_batches, n_materials=None, seed=0, now=None):
+    """生成含批次库存表：每个物料一行表头，其后为该物料的批次行"""
+    rng = np.random.default_rng(seed)
+    now = now or datetime.now()
+    n_materials = n_materials or max(1, n_batches // 20)
+    materials = make_materials(n_materials, seed)
+
+    # 批次随机归属物料，按物料排序后在每组前插入表头行
+    owner = np.sort(rng.integers(0, n_materials, size=n_batches))
+    counts = np.bincount(owner, minlength=n_materials)
+    n_rows = n_batches + n_materials
+    header_rows = np.arange(n_materials) + np.concatenate([[0], np.cumsum(counts)[:-1]])
+    is_header = np.zeros(n_rows, dtype=bool)
+    is_header[header_rows] = True
+
+    age = rng.integers(0, 180, size=n_batches)
+    prod_date = pd.Timestamp(now.date()) - pd.to_timedelta(age, unit='D')
+
+    material_col = np.full(n_rows, np.nan, dtype=object)
+    material_col[is_header] = materials
+    desc_col = np.full(n_rows, np.nan, dtype=object)
+    desc_col[is_header] = [f'产品{m}' for m in materials]
+    date_col = pd.Series(pd.NaT, index=range(n_rows), dtype='datetime64[ns]')
+    date_col[~is_header] = prod_date
+    batch_col = np.full(n_rows, np.nan, dtype=object)
+    batch_col[~is_header] = [f'B{i:08d}' for i in range(n_batches)]
+    qty_col = np.full(n_rows, np.nan)
+    qty_col[~is_header] = rng.integers(1, 500, size=n_batches)
+
+    return pd.DataFrame({
+        '物料': material_col,
+        '描述': desc_col,
+        '生产日期': date_col,
+        '生产批号': batch_col,
+        '数量': qty_col
+    })
+
+
+def make_prices(materials, coverage=0.9, seed=0):
+    """生成单价表，约 coverage 比例的物料有单价"""
+    rng = np.random.default_rng(seed)
+    materials = np.asarray(materials, dtype=object)
+    priced = materials[rng.random(len(materials)) < coverage]
+    return pd.DataFrame({
+        '产品代码': priced,
+        '单价': np.round(rng.uniform(80, 200, size=len(priced)), 2)
+    })
+
+
+def inventory_materials(inventory_df):
+    """取出库存表中的全部表头物料"""
+    material = inventory_df['物料']
+    return material[material.notna()].tolist()
+
+
+def make_monthly_grid(n_months, n_regions, n_products, seed=0):
+    """生成 月份×区域×产品 的实际/预测网格（process_forecast_data 输出结构）"""
+    rng = np.random.default_rng(seed)
+    months = pd.period_range('2024-09', periods=n_months, freq='M').strftime('%Y-%m')
+    regions = [f'区域{i}' for i in range(n_regions)]
+    products = make_materials(n_products, seed)
+    grid = pd.MultiIndex.from_product([months, regions, products],
+                                      names=['所属年月', '所属区域', '产品代码']).to_frame(index=False)
+    actual = rng.poisson(rng.gamma(2.0, 20.0, size=len(grid)))
+    grid[ACTUAL_COL] = actual.astype(float)
+    grid[FORECAST_COL] = np.round(actual * rng.lognormal(0, 0.3, size=len(grid)))
+    return grid
+
+
+def make_forecast(materials, start='2024-09', n_months=6, n_regions=5, seed=0):
+    """生成人工预测表（所属年月, 所属区域, 产品代码, 预计销售量），月份为 YYYY-MM 字符串"""
+    rng = np.random.default_rng(seed)
+    months = pd.period_range(start, periods=n_months, freq='M').strftime('%Y-%m')
+    regions = [f'区域{i}' for i in range(n_regions)]
+    grid = pd.MultiIndex.from_product([months, regions, list(materials)],
+                                      names=['所属年月', '所属区域', '产品代码']).to_frame(index=False)
+    level = rng.gamma(2.0, 60.0, size=len(materials))
+    grid[FORECAST_COL] = rng.poisson(np.tile(level, n_months * n_regions) / n_regions)
+    return grid
+
+
+def make_shipments(materials, n_rows, start='2024-09', n_months=6, n_regions=5, seed=0):
+    """生成出货明细表（订单日期, 所属区域, 申请人, 产品代码, 数量），订单日期为 YYYY-MM-DD 字符串
+
+    产品按与 make_forecast 相同的需求水平加权抽取，每行箱数使各月总量与预测相当；区域名称与 make_forecast 一致。
+    """
+    rng = np.random.default_rng(seed)
+    level = rng.gamma(2.0, 60.0, size=len(materials))
+    mean_quantity = max(n_months * level.sum() / n_rows, 1.0)
+    first = pd.Timestamp(f'{start}-01')
+    n_days = ((first + pd.DateOffset(months=n_months)) - first).days
+    dates = first + pd.to_timedelta(rng.integers(0, n_days, n_rows), unit='D')
+    return pd.DataFrame({
+        '订单日期': dates.strftime('%Y-%m-%d'),
+        '所属区域': rng.choice([f'区域{i}' for i in range(n_regions)], n_rows),
+        '申请人': rng.choice([f'申请人{i}' for i in range(50)], n_rows),
+        '产品代码': rng.choice(np.asarray(materials, dtype=object), n_rows, p=level / level.sum()),
+        ACTUAL_COL: 1 + rng.poisson(mean_quantity - 1, n_rows)
+    })
+
+
+def make_workbooks(n_batches=2_000, n_shipments=20_000, n_materials=None, n_months=6, n_regions=5,
+                   start='2024-09', seed=0, now=None):
+    """生成四个数据源（同一组物料），返回 {数据源: 数据表}"""
+    inventory_df = make_inventory(n_batches, n_materials, seed, now)
+    materials = inventory_materials(inventory_df)
+    return {
+        'shipment': make_shipments(materials, n_shipments, start, n_months, n_regions, seed),
+        'forecast': make_forecast(materials, start, n_months, n_regions, seed),
+        'inventory': inventory_df,
+        'price': make_prices(materials, seed=seed)
+    }
+
+
+def write_workbooks(data_dir, files=None, **kwargs):
+    """按 DATA_FILES 文件名把 make_workbooks 的四个数据源写入 data_dir，返回 {数据源: 路径}"""
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    paths = {}
+    for source, df in make_workbooks(**kwargs).items():
+        paths[source] = data_dir / (files or DATA_FILES)[source]
+        df.to_excel(paths[source], index=False)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='生成合成数据工作簿')
+    parser.add_argument('--output-dir', default='synthetic')
+    parser.add_argument('--batches', type=int, default=2_000, help='库存批次数')
+    parser.add_argument('--shipments', type=int, default=20_000, help='出货明细行数')
+    parser.add_argument('--materials', type=int, help='物料数（默认批次数的 1/20）')
+    parser.add_argument('--months', type=int, default=6)
+    parser.add_argument('--regions', type=int, default=5)
+    parser.add_argument('--start', default='2024-09', help='首个月份')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    paths = write_workbooks(args.output_dir, n_batches=args.batches, n_shipments=args.shipments,
+                            n_materials=args.materials, n_months=args.months, n_regions=args.regions,
+                            start=args.start, seed=args.seed)
+    for source, path in paths.items():
+        print(f'{source:<10} {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,286 @@
+# analytics/warehouse.py - 多仓库 / 多快照库存：并行解析工作簿，按 (仓库, 快照日期) 分区存储
+# 导入快照: python -m analytics.warehouse ingest '库存快照/*.xlsx' --workers 4
+# 分仓指标: python -m analytics.warehouse metrics --warehouse 北京仓 上海仓
+# 快照对比: python -m analytics.warehouse diff 2025-01-31 2025-02-21 --output 批次变动.csv
+# 文件名形如 北京仓_20250221.xlsx：日期取文件名中的 YYYYMMDD / YYYY-MM-DD，其余部分为仓库名；
+# 文件名中没有仓库名时取所在目录名，没有日期时取文件修改日期。
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .cache import default_cache_dir, file_digest, frame_suffix, read_frame, write_frame
+from .config import DATA_FILES, INVENTORY_STORE_DIR
+from .diff import diff_snapshots, diff_summary
+from .instrument import timed
+from .metrics import calculate_key_metrics
+from .policy import DEFAULT_POLICY
+from .pricing import PriceIndex
+from .risk import compact_dtypes, process_inventory
+from .schema import SCHEMAS, read_source
+
+TAGS = ['仓库', '快照日期']
+DATE_PATTERN = re.compile(r'(20\d{2})-?(\d{2})-?(\d{2})')
+
+
+def snapshot_key(path):
+    """由文件路径推断 (仓库, 快照日期 YYYY-MM-DD)"""
+    path = Path(path)
+    match = DATE_PATTERN.search(path.stem)
+    if match:
+        snapshot = '-'.join(match.groups())
+        warehouse = (path.stem[:match.start()] + path.stem[match.end():]).strip(' _-')
+    else:
+        snapshot = date.fromtimestamp(path.stat().st_mtime).isoformat()
+        warehouse = path.stem
+    return warehouse or path.resolve().parent.name, snapshot
+
+
+def expand_sources(sources):
+    """目录展开为其中的 .xlsx 文件，其余按 glob 展开；返回去重排序后的路径"""
+    paths = set()
+    for source in sources:
+        if Path(source).is_dir():
+            paths.update(Path(source).rglob('*.xlsx'))
+        else:
+            paths.update(Path(p) for p in glob.glob(source, recursive=True))
+    return sorted(p for p in paths if not p.name.startswith('~$'))
+
+
+def _parse_snapshot(path, cache_dir):
+    """工作进程：读取并校验一个库存工作簿"""
+    return read_source(path, 'inventory', cache_dir)[0]
+
+
+class InventoryStore:
+    """库存快照分区存储：每个 (仓库, 快照日期) 一个列式文件，保留表头行/批次行结构
+
+    按仓库或快照过滤时只读取对应分区，不重新解析工作簿；内容未变的工作簿不重复导入。
+    存储与导入时的列式缓存默认位于数据目录下，不同数据目录互不影响。
+    """
+
+    def __init__(self, root=None, data_dir='.'):
+        self.data_dir = Path(data_dir)
+        self.root = Path(root) if root is not None else self.data_dir / INVENTORY_STORE_DIR
+        self.manifest_path = self.root / 'manifest.json'
+        if self.manifest_path.exists():
+            with open(self.manifest_path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {'partitions': {}}
+
+    def _partition_path(self, warehouse, snapshot):
+        return self.root / 'raw' / warehouse / f'{snapshot}{frame_suffix()}'
+
+    def _save_manifest(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+
+    def partitions(self):
+        """分区清单：仓库、快照日期、文件、行数、批次数"""
+        columns = TAGS + ['文件', '行数', '批次数']
+        rows = [dict(zip(TAGS, key.split('/', 1)), **info) for key, info in self.manifest['partitions'].items()]
+        return pd.DataFrame(rows, columns=columns).sort_values(TAGS, ignore_index=True)
+
+    @property
+    def version(self):
+        """分区内容标识：任一分区导入或更新即变化"""
+        partitions = json.dumps(self.manifest['partitions'], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(partitions.encode('utf-8')).hexdigest()[:16]
+
+    @property
+    def warehouses(self):
+        return sorted({key.split('/', 1)[0] for key in self.manifest['partitions']})
+
+    def snapshots(self, warehouse=None):
+        """全部快照日期（可指定仓库），升序"""
+        return sorted({key.split('/', 1)[1] for key in self.manifest['partitions']
+                       if warehouse is None or key.split('/', 1)[0] == warehouse})
+
+    @timed('库存快照导入')
+    def ingest(self, paths, workers=None, cache_dir=None, warehouse=None, snapshot=None):
+        """并行解析库存工作簿并写入分区，返回导入的 [(仓库, 快照日期)]
+
+        warehouse / snapshot 指定时覆盖由文件名推断的值；内容哈希与已导入分区相同的文件跳过。
+        多个文件对应同一 (仓库, 快照日期) 时抛出 ValueError，不导入任何文件。
+        """
+        todo, sources = {}, {}
+        for path in map(Path, paths):
+            inferred = snapshot_key(path)
+            key = (warehouse or inferred[0], snapshot or inferred[1])
+            if key in sources:
+                raise ValueError(f'{sources[key]} 与 {path} 对应同一分区 {key[0]}/{key[1]}')
+            sources[key] = path
+            digest = file_digest(path)
+            if self.manifest['partitions'].get('/'.join(key), {}).get('sha256') != digest:
+                todo[key] = (path, digest)
+        if not todo:
+            return []
+        cache_dir = cache_dir or default_cache_dir(self.data_dir)
+
+        workers = min(workers or os.cpu_count() or 1, len(todo))
+        items = list(todo.items())
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                frames = list(pool.map(_parse_snapshot, [path for _, (path, _) in items],
+                                       [cache_dir] * len(items)))
+        else:
+            frames = [_parse_snapshot(path, cache_dir) for _, (path, _) in items]
+
+        for ((name, day), (path, digest)), df in zip(items, frames):
+            data_path = self._partition_path(name, day)
+            data_path.parent.mkdir(parents=True, exist_ok=True)
+            write_frame(df, data_path)
+            self.manifest['partitions'][f'{name}/{day}'] = {
+                '文件': str(path), '行数': len(df), '批次数': int(df['生产日期'].notna().sum()), 'sha256': digest
+            }
+        self._save_manifest()
+        return sorted(todo)
+
+    def latest(self, warehouses=None):
+        """各仓库的最新快照 {仓库: 快照日期}"""
+        return {name: self.snapshots(name)[-1] for name in (warehouses or self.warehouses)
+                if self.snapshots(name)}
+
+    def load(self, warehouses=None, snapshots=None):
+        """读取分区并加上仓库、快照日期列（均为分类）；snapshots 默认为各仓库的最新快照"""
+        if snapshots is None:
+            keys = list(self.latest(warehouses).items())
+        else:
+            keys = [(name, day) for name in (warehouses or self.warehouses) for day in snapshots
+                    if f'{name}/{day}' in self.manifest['partitions']]
+        parts = [read_frame(self._partition_path(name, day)).assign(仓库=name, 快照日期=day) for name, day in keys]
+        if not parts:
+            return pd.DataFrame(columns=list(SCHEMAS['inventory']) + TAGS)
+        result = pd.concat(parts, ignore_index=True)
+        result['仓库'] = result['仓库'].astype('category')
+        result['快照日期'] = pd.to_datetime(result['快照日期']).astype('category')
+        return result
+
+    def process(self, prices, now=None, policy=None, warehouses=None, snapshots=None):
+        """对选定分区运行批次风险引擎，结果带仓库、快照日期列；now 默认为各分区自身的快照日期
+
+        逐个 (仓库, 快照日期) 分区处理，表头行的物料不会前向填充到下一个分区的批次行。
+        """
+        inventory = self.load(warehouses, snapshots)
+        prices = prices if isinstance(prices, PriceIndex) else PriceIndex(prices)
+        if inventory.empty:
+            return process_inventory(inventory, prices, now, policy, keep=TAGS)
+        parts = [process_inventory(rows, prices, day if now is None else now, policy, keep=TAGS)
+                 for (_, day), rows in inventory.groupby(TAGS, observed=True, sort=True)]
+        return compact_dtypes(pd.concat(parts, ignore_index=True))
+
+    def _diff_key(self, keys, prices, policy):
+        """快照对缓存键：各分区内容哈希、单价表与风险策略"""
+        digest = hashlib.sha256()
+        for name, day in keys:
+            digest.update(f"{name}/{day}:{self.manifest['partitions'][f'{name}/{day}']['sha256']};".encode('utf-8'))
+        digest.update(pd.util.hash_array(np.asarray(prices.index, dtype=object)).tobytes())
+        digest.update(np.asarray(prices.prices, dtype=float).tobytes() + repr(prices.default).encode('utf-8'))
+        digest.update(json.dumps((policy or DEFAULT_POLICY).to_config(), ensure_ascii=False).encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    def diff(self, prices, before, after, warehouses=None, policy=None):
+        """两个快照日期之间各仓库的批次变动（diff_snapshots 结果加仓库列），按快照对缓存
+
+        任一分区重新导入、单价表或风险策略变化时缓存失效；只在一侧有快照的仓库按全部新增或全部清空处理。
+        """
+        prices = prices if isinstance(prices, PriceIndex) else PriceIndex(prices)
+        names = [name for name in (warehouses or self.warehouses)
+                 if {before, after} & set(self.snapshots(name))]
+        if not names:
+            raise ValueError(f'没有快照 {before} 或 {after} 的分区')
+        keys = [(name, day) for name in names for day in (before, after)
+                if f'{name}/{day}' in self.manifest['partitions']]
+        cache_path = self.root / 'diff' / f'{before}_{after}-{self._diff_key(keys, prices, policy)}{frame_suffix()}'
+        if cache_path.exists():
+            return read_frame(cache_path)
+
+        parts = [diff_snapshots(self.process(prices, policy=policy, warehouses=[name], snapshots=[before]),
+                                self.process(prices, policy=policy, warehouses=[name], snapshots=[after]))
+                 .assign(仓库=name) for name in names]
+        result = pd.concat(parts, ignore_index=True)
+        result.insert(0, '仓库', result.pop('仓库').astype('category'))
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        write_frame(result, cache_path)
+        return result
+
+
+def warehouse_metrics(processed_inventory, forecast_accuracy):
+    """各仓库（及合计）的关键指标表"""
+    rows = []
+    groups = list(processed_inventory.groupby('仓库', observed=True)) + [('合计', processed_inventory)]
+    for name, data in groups:
+        metrics = calculate_key_metrics(data, forecast_accuracy)
+        risk_counts = metrics.pop('risk_counts')
+        rows.append({'仓库': name, **metrics, **{f'{k}_batches': v for k, v in risk_counts.items()}})
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='多仓库库存快照')
+    parser.add_argument('--store', help=f'存储目录（默认为 数据目录/{INVENTORY_STORE_DIR}）')
+    commands = parser.add_subparsers(dest='command', required=True)
+    ingest = commands.add_parser('ingest', help='导入目录或 glob 匹配的库存工作簿')
+    ingest.add_argument('sources', nargs='+')
+    ingest.add_argument('--workers', type=int, help='解析进程数（默认 CPU 数）')
+    ingest.add_argument('--warehouse', help='覆盖由文件名推断的仓库名')
+    ingest.add_argument('--snapshot', help='覆盖由文件名推断的快照日期（YYYY-MM-DD）')
+    ingest.add_argument('--data-dir', default='.', help='数据目录（存储与缓存默认位于其下）')
+    metrics = commands.add_parser('metrics', help='按仓库输出最新快照的关键指标')
+    metrics.add_argument('--warehouse', nargs='+', help='只计算这些仓库')
+    metrics.add_argument('--data-dir', default='.', help='单价工作簿所在目录（存储默认位于其下）')
+    diff = commands.add_parser('diff', help='对比两个快照日期的批次变动')
+    diff.add_argument('before', nargs='?', help='前一快照日期（默认倒数第二个）')
+    diff.add_argument('after', nargs='?', help='后一快照日期（默认最新）')
+    diff.add_argument('--warehouse', nargs='+', help='只对比这些仓库')
+    diff.add_argument('--data-dir', default='.', help='单价工作簿所在目录（存储默认位于其下）')
+    diff.add_argument('--output', help='批次变动明细输出路径（.csv 或 .parquet）')
+    args = parser.parse_args(argv)
+
+    store = InventoryStore(args.store, args.data_dir)
+    if args.command == 'ingest':
+        paths = expand_sources(args.sources)
+        start = time.perf_counter()
+        try:
+            imported = store.ingest(paths, args.workers, warehouse=args.warehouse, snapshot=args.snapshot)
+        except ValueError as error:
+            parser.error(str(error))
+        print(f'{len(paths)} 个文件，导入 {len(imported)} 个分区，耗时 {time.perf_counter() - start:.2f}s')
+        print(store.partitions().to_string(index=False))
+    elif args.command == 'metrics':
+        prices = read_source(Path(args.data_dir) / DATA_FILES['price'], 'price')[0]
+        processed = store.process(prices, warehouses=args.warehouse)
+        print(warehouse_metrics(processed, pd.DataFrame()).to_string(index=False))
+    else:
+        snapshots = store.snapshots()
+        if not (args.before and args.after) and len(snapshots) < 2:
+            print('存储中不足两个快照日期', file=sys.stderr)
+            return 1
+        before, after = args.before or snapshots[-2], args.after or snapshots[-1]
+        prices = read_source(Path(args.data_dir) / DATA_FILES['price'], 'price')[0]
+        start = time.perf_counter()
+        result = store.diff(prices, before, after, args.warehouse)
+        print(f'{before} → {after}：{len(result):,} 个批次，耗时 {time.perf_counter() - start:.2f}s')
+        print(diff_summary(result).round(1).to_string(index=False))
+        if args.output:
+            if args.output.endswith('.csv'):
+                result.to_csv(args.output, index=False, encoding='utf-8-sig')
+            else:
+                result.to_parquet(args.output, index=False)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+# benchmarks/bench_accuracy.py - 向量化准确率内核 vs 原 DataFrame.apply(axis=1)
+# 用法: python -m benchmarks.bench_accuracy --products 100 1000 5000
+import argparse
+import time
+
+import numpy as np
+
+from analytics.accuracy import accuracy_table, quantity_accuracy
+from analytics.synthetic import make_monthly_grid
+
+
+def legacy_row_accuracy(merged):
+    """原 process_forecast_data() 的逐行准确率"""
+    return merged.apply(
+        lambda row: max(0, 1 - abs(row['求和项:数量（箱）'] - row['预计销售量']) / (row['求和项:数量（箱）'] + 1)),
+        axis=1
+    )
+
+
+def legacy_rollup(merged, dim):
+    """原 create_forecast_dashboard() 的汇总 + 逐行准确率"""
+    table = merged.groupby(dim).agg({'求和项:数量（箱）': 'sum', '预计销售量': 'sum'}).reset_index()
+    table['准确率'] = table.apply(
+        lambda row: max(0, 1 - abs(row['求和项:数量（箱）'] - row['预计销售量']) / (row['求和项:数量（箱）'] + 1)) * 100,
+        axis=1
+    )
+    return table
+
+
+def legacy_all(merged):
+    merged = merged.copy()
+    merged['数量准确率'] = legacy_row_accuracy(merged)
+    return [legacy_rollup(merged, dim) for dim in ('所属年月', '所属区域', '产品代码')], merged
+
+
+def kernel_all(merged):
+    merged = merged.copy()
+    merged['数量准确率'] = quantity_accuracy(merged['求和项:数量（箱）'], merged['预计销售量'])
+    return [accuracy_table(merged, dim) for dim in ('所属年月', '所属区域', '产品代码')], merged
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='准确率内核基准测试')
+    parser.add_argument('--months', type=int, default=6)
+    parser.add_argument('--regions', type=int, default=8)
+    parser.add_argument('--products', type=int, nargs='+', default=[100, 1000, 5000])
+    args = parser.parse_args(argv)
+
+    print(f"{'网格行数':>10} {'向量化(s)':>10} {'apply(s)':>10} {'加速比':>8}")
+    for n_products in args.products:
+        merged = make_monthly_grid(args.months, args.regions, n_products)
+        (fast_tables, fast), fast_time = timed(kernel_all, merged)
+        (slow_tables, slow), slow_time = timed(legacy_all, merged)
+
+        np.testing.assert_allclose(fast['数量准确率'], slow['数量准确率'])
+        for a, b in zip(fast_tables, slow_tables):
+            np.testing.assert_allclose(a['准确率'], b['准确率'])
+        print(f'{len(merged):>10,} {fast_time:>10.3f} {slow_time:>10.2f} {slow_time / fast_time:>7.0f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/bench_charts.py - 仪表盘数据量：服务端分箱/散点汇总 vs 原始样本直方图
+# 用法: python -m benchmarks.bench_charts --sizes 10000 100000 1000000
+# 页面每次重跑都把图表序列化为 JSON 发往浏览器，这里比较 JSON 字节数与序列化耗时
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+import plotly.graph_objects as go
+
+from analytics.charts import create_forecast_dashboard, create_risk_analysis_dashboard
+from analytics.config import COLOR_SCHEME
+from analytics.risk import process_inventory, risk_label
+from analytics.synthetic import inventory_materials, make_inventory, make_monthly_grid, make_prices
+
+
+def replace_trace(fig, position, trace):
+    """替换第 position 个图层（沿用其子图坐标轴）"""
+    old = fig.data[position]
+    trace.update(xaxis=old.xaxis, yaxis=old.yaxis)
+    data = list(fig.data)
+    data[position] = trace
+    return go.Figure(data=data, layout=fig.layout)
+
+
+def legacy_risk_dashboard(processed_inventory):
+    """原实现：库龄直方图发送全部批次的原始库龄，散点取前 20 个高风险批次（仅作对照）"""
+    fig = replace_trace(create_risk_analysis_dashboard(processed_inventory), 2, go.Histogram(
+        x=processed_inventory['库龄'], nbinsx=15, marker_color=COLOR_SCHEME['primary'], opacity=0.7,
+        showlegend=False))
+    high_risk_data = processed_inventory[processed_inventory['风险等级'].isin(['极高风险', '高风险'])].head(20)
+    if len(fig.data) > 3:
+        fig = replace_trace(fig, 3, go.Scatter(
+            x=high_risk_data['库龄'], y=high_risk_data['批次价值'], mode='markers', text=high_risk_data['产品名称'],
+            marker=dict(size=np.clip(high_risk_data['数量'] / 15, 8, 30),
+                        color=risk_label(high_risk_data['风险等级'], '风险颜色'), opacity=0.8,
+                        line=dict(width=1, color='white')),
+            showlegend=False))
+    return fig
+
+
+def legacy_forecast_dashboard(merged_data):
+    """原实现：准确率直方图发送每一行的准确率（仅作对照）"""
+    fig = create_forecast_dashboard(merged_data)
+    return replace_trace(fig, len(fig.data) - 1, go.Histogram(
+        x=merged_data['数量准确率'] * 100, nbinsx=20, marker_color=COLOR_SCHEME['secondary'], opacity=0.7,
+        showlegend=False))
+
+
+def serialize(fig):
+    """返回 (序列化耗时, JSON 字节数)"""
+    start = time.perf_counter()
+    payload = fig.to_json()
+    return time.perf_counter() - start, len(payload.encode('utf-8'))
+
+
+def report(label, n, build, legacy_build, data):
+    start = time.perf_counter()
+    fig = build(data)
+    build_time = time.perf_counter() - start
+    current_time, current_bytes = serialize(fig)
+    legacy_time, legacy_bytes = serialize(legacy_build(data))
+    print(f"{label:<6} {n:>10,} {legacy_bytes / 1024:>12,.1f} {current_bytes / 1024:>12,.1f} "
+          f"{legacy_bytes / current_bytes:>8.1f}x {legacy_time:>12.3f} {current_time:>12.3f} {build_time:>10.3f}  "
+          + '/'.join(trace.type for trace in fig.data))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='仪表盘数据量基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--regions', type=int, default=5)
+    parser.add_argument('--months', type=int, default=12)
+    args = parser.parse_args(argv)
+
+    now = datetime.now()
+    print(f"{'图表':<6} {'行数':>10} {'原始(KB)':>12} {'分箱(KB)':>12} {'缩小':>9} {'原始序列化(s)':>12} "
+          f"{'分箱序列化(s)':>12} {'构建(s)':>10}  图层")
+    for n in args.sizes:
+        inventory_df = make_inventory(n, now=now)
+        processed = process_inventory(inventory_df, make_prices(inventory_materials(inventory_df)), now)
+        report('风险', len(processed), create_risk_analysis_dashboard, legacy_risk_dashboard, processed)
+
+        grid = make_monthly_grid(args.months, args.regions, max(1, n // (args.months * args.regions)))
+        grid['数量准确率'] = np.clip(1 - np.abs(grid['预计销售量'] - grid['求和项:数量（箱）'])
+                                / grid['求和项:数量（箱）'].clip(lower=1), 0, 1)
+        report('预测', len(grid), create_forecast_dashboard, legacy_forecast_dashboard, grid)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_depletion.py - 先进先出消耗推演：向量化实现 vs 逐批次循环
+# 用法: python -m benchmarks.bench_depletion --sizes 10000 100000 1000000 --horizon 6
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from analytics.depletion import monthly_demand, simulate_depletion
+from analytics.risk import process_inventory
+from analytics.synthetic import inventory_materials, make_forecast, make_inventory, make_prices
+
+
+def loop_remaining(processed_inventory, demand, materials):
+    """逐物料、逐月、逐批次消耗的对照实现，返回按 (物料, 生产日期) 排序后各月末剩余数量"""
+    index = {material: i for i, material in enumerate(materials)}
+    ordered = processed_inventory.assign(_m=processed_inventory['物料'].map(index).astype(int))
+    ordered = ordered.sort_values(['_m', '生产日期'], kind='stable')
+    result = np.zeros((len(ordered), demand.shape[1]))
+    row = 0
+    for m_code, group in ordered.groupby('_m', sort=True):
+        stock = group['数量'].to_numpy(dtype=float).copy()
+        for month in range(demand.shape[1]):
+            left = demand[m_code, month]
+            for i in range(len(stock)):
+                if left <= 0:
+                    break
+                used = min(stock[i], left)
+                stock[i] -= used
+                left -= used
+            result[row:row + len(stock), month] = stock
+        row += len(stock)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='先进先出消耗推演基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--horizon', type=int, default=6)
+    parser.add_argument('--loop-max', type=int, default=100_000, help='超过该批次数时跳过逐批次循环')
+    args = parser.parse_args(argv)
+
+    now = datetime.now()
+    print(f"{'批次数':>10} {'推演(s)':>10} {'月度汇总(s)':>12} {'循环(s)':>10} {'将转高风险':>10}")
+    for n in args.sizes:
+        inventory_df = make_inventory(n, now=now)
+        materials = inventory_materials(inventory_df)
+        processed = process_inventory(inventory_df, make_prices(materials), now)
+        forecast_df = make_forecast(materials, start=now.strftime('%Y-%m'), n_months=args.horizon)
+
+        start = time.perf_counter()
+        projection = simulate_depletion(processed, forecast_df, as_of=now, horizon=args.horizon)
+        sim_time = time.perf_counter() - start
+        start = time.perf_counter()
+        projection.summary()
+        summary_time = time.perf_counter() - start
+
+        loop_time = '-'
+        if n <= args.loop_max:
+            codes, uniques = pd.factorize(processed['物料'].to_numpy())
+            demand = monthly_demand(forecast_df, uniques, projection.months)
+            as_of = pd.Timestamp(now).normalize()
+            demand[:, 0] *= ((projection.month_ends[0] - as_of).days + 1) / projection.months[0].days_in_month
+            start = time.perf_counter()
+            expected = loop_remaining(processed, demand, uniques)
+            loop_time = f'{time.perf_counter() - start:.2f}'
+            actual = np.column_stack([projection._remaining(m) for m in range(args.horizon)])
+            np.testing.assert_allclose(actual, expected, atol=1e-6)
+        print(f"{n:>10,} {sim_time:>10.3f} {summary_time:>12.3f} {loop_time:>10} "
+              f"{int(projection.batches['将转高风险'].sum()):>10,}")
+
+
+if __name__ == '__main__':
+    main()
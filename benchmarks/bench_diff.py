@@ -0,0 +1,72 @@
+# benchmarks/bench_diff.py - 库存快照对比：64 位批次键哈希连接 vs 按 (物料, 生产批号) 两列合并
+# 用法: python -m benchmarks.bench_diff --sizes 10000 100000 500000
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from analytics.diff import KEYS, diff_snapshots
+from analytics.risk import process_inventory
+from analytics.synthetic import inventory_materials, make_inventory, make_prices
+from analytics.timeline import RiskTimeline
+
+
+def next_snapshot(before, days, seed=0, depleted=0.1, consumed=0.3, new=0.1):
+    """由已处理快照推演 days 天后的快照：清空、部分消耗部分批次并新增批次，风险按新日期重算"""
+    rng = np.random.default_rng(seed)
+    after = before[rng.random(len(before)) >= depleted].reset_index(drop=True)
+    partial = rng.random(len(after)) < consumed
+    quantity = after['数量'].to_numpy(dtype=np.float32, copy=True)
+    quantity[partial] = np.floor(quantity[partial] * rng.uniform(0.2, 0.9, partial.sum()))
+    after['数量'] = quantity
+
+    added = before.sample(int(len(before) * new), random_state=seed).reset_index(drop=True)
+    added['生产批号'] = [f'N{i:08d}' for i in range(len(added))]
+    added['生产日期'] = before['生产日期'].max() + pd.to_timedelta(rng.integers(1, days + 1, len(added)), unit='D')
+    after = pd.concat([after, added], ignore_index=True)
+    after['批次价值'] = after['数量'].astype(float) * after['单价'].astype(float)
+    return RiskTimeline(after).at(after['生产日期'].max())
+
+
+def two_column_diff(before, after):
+    """对照：直接按两列键外连接后分类"""
+    columns = KEYS + ['数量', '风险等级', '批次价值']
+    merged = before[columns].merge(after[columns], on=KEYS, how='outer', suffixes=('_前', '_后'))
+    qty_before, qty_after = merged['数量_前'].fillna(0), merged['数量_后'].fillna(0)
+    merged['变动类型'] = np.select([merged['数量_前'].isna(), merged['数量_后'].isna(), qty_after < qty_before,
+                                qty_after > qty_before], ['新增', '清空', '部分消耗', '增加'], '未变动')
+    merged['价值变化'] = merged['批次价值_后'].fillna(0) - merged['批次价值_前'].fillna(0)
+    return merged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='库存快照对比基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 500_000])
+    parser.add_argument('--days', type=int, default=21)
+    args = parser.parse_args(argv)
+
+    now = datetime(2025, 1, 31)
+    print(f"{'批次数':>10} {'哈希连接(s)':>12} {'两列合并(s)':>12} {'新增':>8} {'清空':>8} {'部分消耗':>8} {'风险升级':>8} "
+          f"{'价值变化(M)':>12}")
+    for n in args.sizes:
+        inventory_df = make_inventory(n, now=now)
+        before = process_inventory(inventory_df, make_prices(inventory_materials(inventory_df)), now)
+        after = next_snapshot(before, args.days)
+
+        start = time.perf_counter()
+        diff = diff_snapshots(before, after)
+        hash_time = time.perf_counter() - start
+        start = time.perf_counter()
+        expected = two_column_diff(before, after)
+        merge_time = time.perf_counter() - start
+        assert len(expected) == len(diff)
+
+        counts = diff['变动类型'].value_counts()
+        print(f"{n:>10,} {hash_time:>12.3f} {merge_time:>12.3f} {counts['新增']:>8,} {counts['清空']:>8,} "
+              f"{counts['部分消耗']:>8,} {int(diff['风险升级'].sum()):>8,} {diff['价值变化'].sum() / 1e6:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+# benchmarks/bench_errors.py - 误差分位数草图：逐月累加 vs 保留全部残差的精确分位数
+# 用法: python -m benchmarks.bench_errors --products 100 1000 5000 --months 24
+import argparse
+import time
+
+import numpy as np
+
+from analytics.errors import ErrorProfile
+from analytics.synthetic import make_monthly_grid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='误差分位数草图基准测试')
+    parser.add_argument('--products', type=int, nargs='+', default=[100, 1_000, 5_000])
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--regions', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'产品数':>8} {'残差行数':>10} {'精确(s)':>9} {'逐月草图(s)':>12} {'合并(s)':>9} "
+          f"{'残差(KB)':>10} {'草图(KB)':>10} {'最大相对误差':>12}")
+    for n in args.products:
+        merged = make_monthly_grid(args.months, args.regions, n)
+        residual = (merged['预计销售量'] - merged['求和项:数量（箱）']).abs()
+
+        start = time.perf_counter()
+        exact = residual.groupby(merged['所属区域']).quantile([0.5, 0.9], interpolation='lower').unstack()
+        exact_time = time.perf_counter() - start
+
+        # 逐月分区各自构建后依次累加，任一时刻只持有一个月的残差
+        start = time.perf_counter()
+        partials = [ErrorProfile.build(part) for _, part in merged.groupby('所属年月', sort=True)]
+        build_time = time.perf_counter() - start
+        start = time.perf_counter()
+        profile = partials[0]
+        for partial in partials[1:]:
+            profile = profile.merge(partial)
+        merge_time = time.perf_counter() - start
+
+        sketched = profile.error_quantiles('所属区域').set_index('所属区域')
+        approx = sketched[['P50绝对误差', 'P90绝对误差']].to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rel = np.abs(approx - exact.to_numpy()) / np.where(exact.to_numpy() > 0, exact.to_numpy(), np.nan)
+        residual_kb = merged[['所属年月', '所属区域', '产品代码']].memory_usage(deep=True).sum() / 1024 \
+            + residual.memory_usage(index=False) / 1024
+        sketch_kb = sum(s.counts.memory_usage(deep=True).sum() for s in profile.sketches.values()) / 1024
+        print(f"{n:>8,} {len(merged):>10,} {exact_time:>9.3f} {build_time:>12.3f} {merge_time:>9.3f} "
+              f"{residual_kb:>10,.0f} {sketch_kb:>10,.0f} {np.nanmax(rel):>12.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+# benchmarks/bench_forecasting.py - 统计预测引擎吞吐量（序列/秒）
+# 用法: python -m benchmarks.bench_forecasting --series 1000 10000 100000 --months 24
+import argparse
+import time
+
+import numpy as np
+
+from analytics.forecasting import METHODS, fit_forecast
+
+
+def make_series(n_series, n_months, seed=0):
+    """生成平稳与间歇需求混合的序列矩阵"""
+    rng = np.random.default_rng(seed)
+    level = rng.gamma(2.0, 20.0, size=(n_series, 1))
+    season = 1 + 0.2 * np.sin(2 * np.pi * np.arange(n_months) / 12)
+    Y = rng.poisson(level * season).astype(float)
+    intermittent = rng.random(n_series) < 0.4
+    Y[intermittent] *= rng.random((intermittent.sum(), n_months)) < 0.3
+    return Y
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='统计预测引擎吞吐量')
+    parser.add_argument('--series', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--horizon', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    methods = list(METHODS) + ['auto']
+    print(f"{'序列数':>10} " + ' '.join(f'{m:>16}' for m in methods) + '   (序列/秒)')
+    for n in args.series:
+        Y = make_series(n, args.months)
+        rates = []
+        for method in methods:
+            start = time.perf_counter()
+            fit_forecast(Y, method, args.horizon)
+            rates.append(n / (time.perf_counter() - start))
+        print(f'{n:>10,} ' + ' '.join(f'{r:>16,.0f}' for r in rates))
+
+
+if __name__ == '__main__':
+    main()
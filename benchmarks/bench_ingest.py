@@ -0,0 +1,56 @@
+# benchmarks/bench_ingest.py - 出货工作簿解析：读取全部列 vs 只读所需列并显式指定类型（含校验）
+# 用法: python -m benchmarks.bench_ingest --rows 20000 100000 --extra-columns 8
+# 安装 python-calamine 时“所需列”使用 calamine 引擎，否则与“全部列”同为 openpyxl
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analytics.schema import EXCEL_ENGINE, SCHEMAS, validate_frame
+from analytics.synthetic import make_materials, make_shipments
+
+
+def make_shipment_workbook(path, n_rows, extra_columns, seed=0):
+    """生成出货工作簿：所需四列之外附带 extra_columns 个无关文本/数值列"""
+    rng = np.random.default_rng(seed)
+    df = make_shipments(make_materials(200, seed), n_rows, seed=seed)
+    for i in range(extra_columns):
+        df[f'备注{i}'] = rng.choice([f'备注{j}' for j in range(100)], n_rows) if i % 2 else rng.random(n_rows)
+    df.to_excel(path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='工作簿解析基准测试')
+    parser.add_argument('--rows', type=int, nargs='+', default=[20_000, 100_000])
+    parser.add_argument('--extra-columns', type=int, default=8)
+    args = parser.parse_args(argv)
+
+    schema = SCHEMAS['shipment']
+    strings = {col: str for col, kind in schema.items() if kind == 'string'}
+    print(f"{'行数':>10} {'全部列(s)':>10} {'所需列(s)':>10} {'校验(s)':>9} {'全部列(MB)':>11} {'所需列(MB)':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.rows:
+            path = Path(tmp) / f'shipment_{n}.xlsx'
+            make_shipment_workbook(path, n, args.extra_columns)
+
+            start = time.perf_counter()
+            full = pd.read_excel(path)
+            full_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            narrow = pd.read_excel(path, usecols=list(schema), dtype=strings, engine=EXCEL_ENGINE)
+            narrow_time = time.perf_counter() - start
+            start = time.perf_counter()
+            validated = validate_frame(narrow, 'shipment', path)
+            validate_time = time.perf_counter() - start
+
+            print(f"{n:>10,} {full_time:>10.2f} {narrow_time:>10.2f} {validate_time:>9.3f} "
+                  f"{full.memory_usage(deep=True).sum() / 1024 ** 2:>11.1f} "
+                  f"{validated.memory_usage(deep=True).sum() / 1024 ** 2:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
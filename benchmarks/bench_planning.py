@@ -0,0 +1,38 @@
+# benchmarks/bench_planning.py - 补货计划批量计算耗时（SKU 数 × 区域数）
+# 用法: python -m benchmarks.bench_planning --skus 1000 5000 20000 --regions 5 --months 18
+import argparse
+import time
+from datetime import datetime
+
+from analytics.planning import compute_plan
+from analytics.risk import process_inventory
+from analytics.synthetic import inventory_materials, make_inventory, make_monthly_grid, make_prices
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='补货计划基准测试')
+    parser.add_argument('--skus', type=int, nargs='+', default=[1_000, 5_000, 20_000])
+    parser.add_argument('--regions', type=int, default=5)
+    parser.add_argument('--months', type=int, default=18)
+    parser.add_argument('--batches-per-sku', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    now = datetime.now()
+    print(f"{'SKU数':>8} {'序列数':>10} {'批次数':>10} {'计划(s)':>10} {'SKU/秒':>10} {'需补货':>8}")
+    for n in args.skus:
+        # 同一随机种子下网格与库存使用相同的产品代码
+        grid = make_monthly_grid(args.months, args.regions, n)
+        actual_monthly = grid[['所属年月', '所属区域', '产品代码', '求和项:数量（箱）']]
+        forecast_df = grid[['所属年月', '所属区域', '产品代码', '预计销售量']]
+        inventory_df = make_inventory(n * args.batches_per_sku, n, now=now)
+        processed = process_inventory(inventory_df, make_prices(inventory_materials(inventory_df)), now)
+
+        start = time.perf_counter()
+        plan = compute_plan(actual_monthly, forecast_df, processed, start=grid['所属年月'].iloc[-1])
+        elapsed = time.perf_counter() - start
+        print(f"{n:>8,} {n * args.regions:>10,} {len(processed):>10,} {elapsed:>10.3f} {n / elapsed:>10,.0f} "
+              f"{int(plan['需要补货'].sum()):>8,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/bench_pricing.py - 单价索引的规模测试：单价表增长时耗时应线性增长
+# 用法: python -m benchmarks.bench_pricing --sizes 10000 100000 1000000
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from analytics.pricing import PriceIndex
+from analytics.synthetic import make_materials, make_prices
+
+
+def legacy_lookup(price_df, materials):
+    """原逻辑：每个物料对单价表做一次布尔扫描"""
+    prices = []
+    for material in materials:
+        price_match = price_df[price_df['产品代码'] == material]
+        prices.append(price_match['单价'].iloc[0] if len(price_match) > 0 else 100)
+    return np.array(prices, dtype=float)
+
+
+def best_of(func, repeat=3):
+    """取多次运行的最短耗时"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='单价索引规模测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--legacy-materials', type=int, default=200,
+                        help='原逻辑对照时查询的物料数')
+    parser.add_argument('--tolerance', type=float, default=3.0,
+                        help='单位耗时允许的最大放大倍数')
+    args = parser.parse_args(argv)
+
+    print(f"{'单价行数':>10} {'索引+查询(s)':>14} {'ns/行':>8} {'原扫描(s)':>10}")
+    per_row = []
+    for n in args.sizes:
+        # 物料数与单价表同规模增长，约一成物料回退默认单价
+        materials = make_materials(n, seed=1)
+        price_df = make_prices(materials, coverage=0.9, seed=1)
+
+        elapsed = best_of(lambda: PriceIndex(price_df).lookup(materials))
+        per_row.append(elapsed / n * 1e9)
+
+        sample = materials[:args.legacy_materials]
+        index = PriceIndex(price_df)
+        np.testing.assert_array_equal(index.lookup(sample), legacy_lookup(price_df, sample))
+        legacy = best_of(lambda: legacy_lookup(price_df, sample), repeat=1) * n / len(sample)
+        print(f'{n:>10,} {elapsed:>14.3f} {per_row[-1]:>8.0f} {legacy:>9.1f}*')
+
+    print('* 原扫描耗时按抽样物料外推到全部物料')
+    growth = max(per_row) / min(per_row)
+    print(f'单位耗时最大放大 {growth:.2f}x（阈值 {args.tolerance}x）')
+    if growth > args.tolerance:
+        sys.exit('单价解析耗时随单价表规模超线性增长')
+
+
+if __name__ == '__main__':
+    main()
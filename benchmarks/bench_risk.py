@@ -0,0 +1,123 @@
+# benchmarks/bench_risk.py - 列式批次风险引擎 vs 原 iterrows 循环
+# 用法: python -m benchmarks.bench_risk --sizes 10000 100000 1000000
+import argparse
+import pickle
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from analytics.config import COLOR_SCHEME
+from analytics.risk import process_inventory, with_risk_labels
+from analytics.synthetic import inventory_materials, make_inventory, make_prices
+
+
+def legacy_process_inventory(inventory_df, price_df, now):
+    """原 load_and_process_data() 中的逐行循环（仅作对照）"""
+    batch_data = []
+    current_material = None
+    current_desc = None
+    current_price = 0
+
+    for idx, row in inventory_df.iterrows():
+        if pd.notna(row['物料']) and isinstance(row['物料'], str) and row['物料'].startswith('F'):
+            current_material = row['物料']
+            current_desc = row['描述']
+            price_match = price_df[price_df['产品代码'] == current_material]
+            current_price = price_match['单价'].iloc[0] if len(price_match) > 0 else 100
+        elif pd.notna(row['生产日期']) and current_material:
+            prod_date = pd.to_datetime(row['生产日期'])
+            quantity = row['数量'] if pd.notna(row['数量']) else 0
+            batch_no = row['生产批号'] if pd.notna(row['生产批号']) else ''
+
+            age_days = (now - prod_date).days
+
+            if age_days >= 120:
+                risk_level, risk_color, risk_advice = '极高风险', COLOR_SCHEME['risk_extreme'], '🚨 立即7折清库'
+            elif age_days >= 90:
+                risk_level, risk_color, risk_advice = '高风险', COLOR_SCHEME['risk_high'], '⚠️ 建议8折促销'
+            elif age_days >= 60:
+                risk_level, risk_color, risk_advice = '中风险', COLOR_SCHEME['risk_medium'], '📢 适度9折促销'
+            elif age_days >= 30:
+                risk_level, risk_color, risk_advice = '低风险', COLOR_SCHEME['risk_low'], '✅ 正常销售'
+            else:
+                risk_level, risk_color, risk_advice = '极低风险', COLOR_SCHEME['risk_minimal'], '🌟 新鲜库存'
+
+            if age_days >= 120:
+                expected_loss = quantity * current_price * 0.3
+            elif age_days >= 90:
+                expected_loss = quantity * current_price * 0.2
+            elif age_days >= 60:
+                expected_loss = quantity * current_price * 0.1
+            else:
+                expected_loss = 0
+
+            batch_data.append({
+                '物料': current_material,
+                '产品名称': current_desc,
+                '生产日期': prod_date,
+                '生产批号': batch_no,
+                '数量': quantity,
+                '库龄': age_days,
+                '风险等级': risk_level,
+                '风险颜色': risk_color,
+                '处理建议': risk_advice,
+                '单价': current_price,
+                '批次价值': quantity * current_price,
+                '预期损失': expected_loss
+            })
+
+    return pd.DataFrame(batch_data)
+
+
+def wide_schema(processed):
+    """还原为紧凑化之前的宽表结构：字符串列逐行存储，数值列为 64 位"""
+    wide = with_risk_labels(processed).drop(columns=['下次升级日期'])
+    for col in wide.columns:
+        if isinstance(wide[col].dtype, pd.CategoricalDtype):
+            wide[col] = wide[col].astype(object)
+    return wide.astype({'数量': 'float64', '库龄': 'int64', '单价': 'float64'})
+
+
+def bytes_per_batch(frame):
+    """(内存字节/批次, pickle 字节/批次)"""
+    n = max(len(frame), 1)
+    return frame.memory_usage(deep=True).sum() / n, len(pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL)) / n
+
+
+def timed(func, *args):
+    """返回 (结果, 耗时秒)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='批次风险引擎基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--legacy-max', type=int, default=1_000_000,
+                        help='超过该批次数时跳过原循环')
+    args = parser.parse_args(argv)
+
+    now = datetime.now()
+    print(f"{'批次数':>10} {'列式(s)':>10} {'原循环(s)':>10} {'加速比':>8} "
+          f"{'宽表(B/批)':>12} {'紧凑(B/批)':>12} {'宽表pickle':>12} {'紧凑pickle':>12}")
+    for n in args.sizes:
+        inventory_df = make_inventory(n, now=now)
+        price_df = make_prices(inventory_materials(inventory_df))
+
+        fast, fast_time = timed(process_inventory, inventory_df, price_df, now)
+        wide = wide_schema(fast)
+        wide_mem, wide_pickle = bytes_per_batch(wide)
+        fast_mem, fast_pickle = bytes_per_batch(fast)
+        memory = f'{wide_mem:>12.0f} {fast_mem:>12.0f} {wide_pickle:>12.0f} {fast_pickle:>12.0f}'
+        if n <= args.legacy_max:
+            slow, slow_time = timed(legacy_process_inventory, inventory_df, price_df, now)
+            pd.testing.assert_frame_equal(wide, slow, check_dtype=False, rtol=1e-6)
+            print(f'{n:>10,} {fast_time:>10.3f} {slow_time:>10.2f} {slow_time / fast_time:>7.0f}x {memory}')
+        else:
+            print(f"{n:>10,} {fast_time:>10.3f} {'-':>10} {'-':>8} {memory}")
+
+
+if __name__ == '__main__':
+    main()
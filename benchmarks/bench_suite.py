@@ -0,0 +1,163 @@
+# benchmarks/bench_suite.py - 页面主流程各阶段耗时回归测试（合成工作簿，与基线比较）
+# 用法: python -m benchmarks.bench_suite --scales small medium [--save-baseline]
+# 基线按固定校准负载的耗时之比换算到本机；任一阶段最短耗时超过换算后基线 (1 + tolerance) 倍
+# 且多出 min-delta 秒以上时判为回归，退出码为 1
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analytics.accuracy import calculate_forecast_accuracy, process_forecast_data
+from analytics.charts import create_forecast_dashboard, create_risk_analysis_dashboard
+from analytics.config import CACHE_DIR, SHIPMENT_STORE_DIR
+from analytics.metrics import calculate_key_metrics
+from analytics.pipeline import load_and_process_data
+from analytics.synthetic import write_workbooks
+
+BASELINE_FILE = Path(__file__).with_name('baseline.json')
+
+# 规模：库存批次数、出货明细行数、物料数
+SCALES = {
+    'small': {'n_batches': 2_000, 'n_shipments': 20_000, 'n_materials': 100},
+    'medium': {'n_batches': 20_000, 'n_shipments': 100_000, 'n_materials': 500},
+    'large': {'n_batches': 100_000, 'n_shipments': 500_000, 'n_materials': 2_000}
+}
+
+
+def clear_caches(data_dir):
+    """删除数据目录下的列式缓存与出货分区存储（下一次加载为冷启动）"""
+    shutil.rmtree(Path(data_dir) / CACHE_DIR, ignore_errors=True)
+    shutil.rmtree(Path(data_dir) / SHIPMENT_STORE_DIR, ignore_errors=True)
+
+
+def measure(func, repeat, setup=None):
+    """重复 repeat 次，返回 (最短耗时, 中位耗时, 最后一次结果)；setup 在每次计时前执行且不计时"""
+    times, result = [], None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times), result
+
+
+def calibrate(repeat=5):
+    """固定的 numpy/pandas 参考负载耗时，用于抵消机器整体快慢（如降频、共享主机）造成的漂移"""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'key': rng.integers(0, 1_000, 500_000), 'value': rng.random(500_000)})
+    best, _, _ = measure(lambda: df.groupby('key')['value'].agg(['sum', 'mean']).sort_values('sum'), repeat)
+    return best
+
+
+def run_scale(data_dir, repeat):
+    """在 data_dir 中依次测量各阶段，返回 [{阶段, 最短(s), 中位(s)}]"""
+    rows = []
+
+    def record(name, func, setup=None, times=repeat):
+        best, median, result = measure(func, times, setup)
+        rows.append({'阶段': name, '最短(s)': round(best, 4), '中位(s)': round(median, 4)})
+        return result
+
+    # 冷启动包含 Excel 解析与出货分区重建，次数减半
+    record('加载与处理(冷)', lambda: load_and_process_data(data_dir), lambda: clear_caches(data_dir),
+           max(1, repeat // 2))
+    processed_inventory, _, shipment_df, forecast_df, _, _, _, actual_monthly = \
+        record('加载与处理(热)', lambda: load_and_process_data(data_dir))
+
+    forecast_accuracy = record('预测准确率', lambda: calculate_forecast_accuracy(actual_monthly, forecast_df))
+    record('关键指标', lambda: calculate_key_metrics(processed_inventory, forecast_accuracy))
+    merged_data = record('预测对比合并', lambda: process_forecast_data(shipment_df, forecast_df, actual_monthly))
+    record('风险仪表盘', lambda: create_risk_analysis_dashboard(processed_inventory))
+    record('预测仪表盘', lambda: create_forecast_dashboard(merged_data))
+    return rows
+
+
+def run_suite(scales, repeat, data_dir=None):
+    """在各规模的合成工作簿上运行 run_scale，返回带 规模 列的结果行；data_dir 为空时使用临时目录"""
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            scale_dir = Path(data_dir or tmp) / scale
+            if not scale_dir.exists():
+                start = time.perf_counter()
+                write_workbooks(scale_dir, **SCALES[scale])
+                print(f'已生成 {scale} 规模工作簿（{time.perf_counter() - start:.1f}s）', file=sys.stderr)
+            rows += [{'规模': scale, **row} for row in run_scale(scale_dir, repeat)]
+    return rows
+
+
+def load_baseline(path=BASELINE_FILE):
+    """读取基线文件，不存在时返回空基线"""
+    if not Path(path).exists():
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def environment():
+    """基线记录的运行环境（不同环境的耗时不宜直接比较）"""
+    return {'python': platform.python_version(), 'pandas': pd.__version__, 'machine': platform.machine(),
+            'processor': platform.processor(), 'cpus': os.cpu_count()}
+
+
+def compare(results, baseline, calibration, tolerance, min_delta):
+    """与基线比较：加入 基线(s)（按校准负载耗时之比换算到本机）、变化 与 回归 列"""
+    base = {(row['规模'], row['阶段']): row['最短(s)'] for row in baseline.get('结果', [])}
+    speed = calibration / baseline['校准(s)'] if baseline.get('校准(s)') else 1.0
+    results['基线(s)'] = [base.get(key) for key in zip(results['规模'], results['阶段'])]
+    results['基线(s)'] = (results['基线(s)'].astype(float) * speed).round(4)
+    reference = results['基线(s)']
+    results['变化'] = (results['最短(s)'] / reference - 1).map(lambda x: '-' if pd.isna(x) else f'{x:+.0%}')
+    results['回归'] = (results['最短(s)'] > reference * (1 + tolerance)) & \
+                    (results['最短(s)'] - reference > min_delta)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='页面主流程回归基准测试')
+    parser.add_argument('--scales', nargs='+', default=['small', 'medium'], choices=list(SCALES))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=BASELINE_FILE, type=Path)
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果写为基线')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='允许的相对变慢比例')
+    parser.add_argument('--min-delta', type=float, default=0.01, help='低于该秒数的变慢不计为回归')
+    parser.add_argument('--data-dir', type=Path, help='合成工作簿目录（保留以便复用，默认用临时目录）')
+    args = parser.parse_args(argv)
+
+    calibration = calibrate()
+    rows = run_suite(args.scales, args.repeat, args.data_dir)
+
+    results = pd.DataFrame(rows)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'环境': environment(), '校准(s)': round(calibration, 4), '结果': rows}, f, ensure_ascii=False, indent=2)
+        print(results.to_string(index=False))
+        print(f'基线已写入 {args.baseline}')
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline and baseline.get('环境') != environment():
+        print(f"注意：基线环境 {baseline.get('环境')} 与当前 {environment()} 不同，比较仅供参考", file=sys.stderr)
+    results = compare(results, baseline, calibration, args.tolerance, args.min_delta)
+    print(results.to_string(index=False))
+    if baseline.get('校准(s)'):
+        print(f"校准负载 {calibration:.3f}s（基线 {baseline['校准(s)']:.3f}s），基线耗时已按比例换算")
+    regressions = results[results['回归']]
+    if len(regressions):
+        print(f"{len(regressions)} 个阶段变慢超过 {args.tolerance:.0%}：{', '.join(regressions['阶段'])}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
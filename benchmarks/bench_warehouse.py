@@ -0,0 +1,68 @@
+# benchmarks/bench_warehouse.py - 多仓库快照导入：逐个解析 vs 多进程并行解析，分区读取 vs 重新解析
+# 用法: python -m benchmarks.bench_warehouse --warehouses 4 --snapshots 2 --batches 20000 --workers 4
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from analytics.metrics import calculate_key_metrics
+from analytics.pricing import PriceIndex
+from analytics.risk import process_inventory
+from analytics.schema import read_source
+from analytics.synthetic import inventory_materials, make_inventory, make_prices
+from analytics.warehouse import InventoryStore, warehouse_metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='多仓库快照导入基准测试')
+    parser.add_argument('--warehouses', type=int, default=4)
+    parser.add_argument('--snapshots', type=int, default=2)
+    parser.add_argument('--batches', type=int, default=20_000, help='每个快照的批次数')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        days = pd.date_range('2025-01-31', periods=args.snapshots, freq='21D')
+        paths = []
+        for w in range(args.warehouses):
+            for day in days:
+                path = tmp / 'snapshots' / f'仓库{w}_{day:%Y%m%d}.xlsx'
+                path.parent.mkdir(exist_ok=True)
+                make_inventory(args.batches, seed=w, now=day.to_pydatetime()).to_excel(path, index=False)
+                paths.append(path)
+        prices = PriceIndex(make_prices(inventory_materials(make_inventory(args.batches, seed=0))))
+        print(f'{len(paths)} 个快照 × {args.batches:,} 批次，{args.workers} 个进程（CPU {os.cpu_count()}）')
+
+        timings = {}
+        for label, workers in [('逐个解析', 1), ('并行解析', args.workers)]:
+            store = InventoryStore(tmp / f'store_{workers}')
+            start = time.perf_counter()
+            store.ingest(paths, workers, cache_dir=tmp / f'cache_{workers}')
+            timings[label] = time.perf_counter() - start
+        start = time.perf_counter()
+        store.ingest(paths, args.workers, cache_dir=tmp / f'cache_{args.workers}')
+        timings['重复导入(跳过)'] = time.perf_counter() - start
+
+        # 单个仓库的风险与指标：从分区读取 vs 重新解析该仓库的最新工作簿
+        warehouse = store.warehouses[0]
+        start = time.perf_counter()
+        processed = store.process(prices, datetime.now(), warehouses=[warehouse])
+        warehouse_metrics(processed, pd.DataFrame())
+        timings['单仓风险+指标(分区)'] = time.perf_counter() - start
+        start = time.perf_counter()
+        inventory_df = read_source(paths[args.snapshots - 1], 'inventory', tmp / 'cache_reparse')[0]
+        calculate_key_metrics(process_inventory(inventory_df, prices, datetime.now()), pd.DataFrame())
+        timings['单仓风险+指标(重新解析)'] = time.perf_counter() - start
+
+        for label, seconds in timings.items():
+            print(f'{label:<16} {seconds:>8.2f}s')
+        print(f"并行加速比 {timings['逐个解析'] / timings['并行解析']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
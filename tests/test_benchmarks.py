@@ -0,0 +1,29 @@
+# tests/test_benchmarks.py - 页面主流程性能回归：small 规模各阶段与 benchmarks/baseline.json 比较
+# 判定与 python -m benchmarks.bench_suite 相同：按校准负载换算基线，最短耗时变慢超过 TOLERANCE
+# 且多出 MIN_DELTA 秒以上时失败
+import pandas as pd
+import pytest
+
+from benchmarks.bench_suite import calibrate, compare, load_baseline, run_suite
+
+SCALE = 'small'
+REPEAT = 3
+TOLERANCE = 0.5
+MIN_DELTA = 0.01
+
+BASELINE = load_baseline()
+STAGES = [row['阶段'] for row in BASELINE.get('结果', []) if row['规模'] == SCALE]
+
+
+@pytest.fixture(scope='module')
+def results(tmp_path_factory):
+    calibration = calibrate()
+    rows = run_suite([SCALE], REPEAT, tmp_path_factory.mktemp('suite'))
+    return compare(pd.DataFrame(rows), BASELINE, calibration, TOLERANCE, MIN_DELTA).set_index('阶段')
+
+
+@pytest.mark.skipif(not STAGES, reason='没有 small 规模的基线')
+@pytest.mark.parametrize('stage', STAGES)
+def test_no_regression(results, stage):
+    row = results.loc[stage]
+    assert not row['回归'], f"{stage} 最短 {row['最短(s)']:.4f}s，换算基线 {row['基线(s)']:.4f}s（{row['变化']}）"
@@ -0,0 +1,66 @@
+# tests/test_pricing.py - PriceIndex 与原逐行单价查询逻辑的一致性
+# 用法: python -m pytest tests
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.config import DEFAULT_PRICE
+from analytics.pricing import PriceIndex
+from analytics.synthetic import make_materials, make_prices
+
+
+def legacy_lookup(price_df, materials, default=DEFAULT_PRICE):
+    """原逻辑：每个物料对单价表做一次布尔扫描，取首条匹配，否则用默认单价"""
+    prices = []
+    for material in materials:
+        price_match = price_df[price_df['产品代码'] == material]
+        prices.append(price_match['单价'].iloc[0] if len(price_match) > 0 else default)
+    return np.array(prices, dtype=float)
+
+
+@pytest.mark.parametrize('coverage', [0.0, 0.5, 0.9, 1.0])
+def test_lookup_matches_legacy(coverage):
+    materials = make_materials(500, seed=3)
+    price_df = make_prices(materials, coverage=coverage, seed=3)
+    index = PriceIndex(price_df)
+
+    np.testing.assert_array_equal(index.lookup(materials), legacy_lookup(price_df, materials))
+    assert index.fallbacks == set(materials) - set(price_df['产品代码'])
+
+
+def test_duplicate_codes_take_first_price():
+    price_df = pd.DataFrame({'产品代码': ['F0001', 'F0002', 'F0001'], '单价': [120.0, 90.0, 150.0]})
+    materials = ['F0001', 'F0002', 'F0001']
+
+    np.testing.assert_array_equal(PriceIndex(price_df).lookup(materials), legacy_lookup(price_df, materials))
+
+
+def test_missing_codes_fall_back_to_default():
+    price_df = pd.DataFrame({'产品代码': ['F0001', None, 'F0003'], '单价': [120.0, 80.0, 130.0]})
+    materials = ['F0001', 'F0002', 'F0003', 'F0004', 'F0002']
+    index = PriceIndex(price_df)
+
+    np.testing.assert_array_equal(index.lookup(materials), legacy_lookup(price_df, materials))
+    assert index.fallbacks == {'F0002', 'F0004'}
+    report = index.fallback_report()
+    assert report['产品代码'].tolist() == ['F0002', 'F0004']
+    assert (report['单价'] == DEFAULT_PRICE).all()
+
+
+def test_empty_price_table_uses_custom_default():
+    price_df = pd.DataFrame({'产品代码': pd.Series([], dtype=object), '单价': pd.Series([], dtype=float)})
+    materials = ['F0001', 'F0002']
+    index = PriceIndex(price_df, default=55.0)
+
+    np.testing.assert_array_equal(index.lookup(materials), legacy_lookup(price_df, materials, default=55.0))
+    assert len(index) == 0
+    assert index.fallbacks == {'F0001', 'F0002'}
+
+
+def test_fallbacks_accumulate_across_lookups():
+    price_df = pd.DataFrame({'产品代码': ['F0001'], '单价': [120.0]})
+    index = PriceIndex(price_df)
+
+    index.lookup(['F0001', 'F0002'])
+    index.lookup(['F0003'])
+    assert index.fallbacks == {'F0002', 'F0003'}
@@ -1,13 +1,20 @@
 # pages/预测库存分析.py - 智能库存预警分析系统
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+import os
 import warnings
 
+from analytics import (EXPORT_FORMATS, BatchQuery, ExportFile, FrameQuery, ErrorProfile, RiskTimeline,
+                       calculate_key_metrics, compare_policies, create_depletion_chart, create_error_dashboard, create_forecast_dashboard,
+                       create_risk_analysis_dashboard, data_version, diff_summary, forecast_analysis,
+                       load_and_process_data, load_policies, simulate_depletion, write_export)
+from analytics.config import ADMIN_ROLE, TIMINGS_FILE
+from analytics.instrument import Timings
+from analytics.planning import compute_plan
+from analytics.schema import SchemaError
+from analytics.reconcile import reconcile_forecasts, reconciliation_accuracy
+from analytics.warehouse import InventoryStore
+
 warnings.filterwarnings('ignore')
 
 # 页面配置
@@ -23,6 +30,9 @@ if 'authenticated' not in st.session_state or not st.session_state.authenticated
     st.switch_page("登陆界面haha.py")
     st.stop()
 
+# 管理员记录本次运行各阶段耗时（页面底部展示）；带缓存的阶段只在缓存未命中时出现
+timings = Timings().start() if st.session_state.get('role') == ADMIN_ROLE else None
+
 # 统一的增强CSS样式
 st.markdown("""
 <style>
@@ -314,402 +324,116 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# 配色方案
-COLOR_SCHEME = {
-    'primary': '#667eea',
-    'secondary': '#764ba2', 
-    'risk_extreme': '#ff4757',
-    'risk_high': '#ff6348',
-    'risk_medium': '#ffa502',
-    'risk_low': '#2ed573',
-    'risk_minimal': '#5352ed',
-    'chart_colors': ['#667eea', '#ff6b9d', '#c44569', '#ffc75f', '#f8b500', '#845ec2', '#4e8397', '#00c9a7']
-}
-
-# 数据加载函数
+# 数据加载函数（计算全部在 analytics 中完成，页面只负责缓存与展示）
+# 所有缓存均以数据版本为键：控件交互不会触发任何汇总或合并，源文件变化时自动失效
 @st.cache_data
-def load_and_process_data():
+def load_data(version):
     """加载和处理所有数据"""
-    # 读取数据文件
-    shipment_df = pd.read_excel('2409~250224出货数据.xlsx')
-    forecast_df = pd.read_excel('2409~2502人工预测.xlsx') 
-    inventory_df = pd.read_excel('含批次库存0221(2).xlsx')
-    price_df = pd.read_excel('单价.xlsx')
-    
-    # 处理日期
-    shipment_df['订单日期'] = pd.to_datetime(shipment_df['订单日期'])
-    forecast_df['所属年月'] = pd.to_datetime(forecast_df['所属年月'], format='%Y-%m')
-    
-    # 创建产品代码到名称的映射
-    product_name_map = {}
-    for idx, row in inventory_df.iterrows():
-        if pd.notna(row['物料']) and pd.notna(row['描述']) and isinstance(row['物料'], str) and row['物料'].startswith('F'):
-            product_name_map[row['物料']] = row['描述']
-    
-    # 处理库存数据
-    batch_data = []
-    current_material = None
-    current_desc = None
-    current_price = 0
-    
-    for idx, row in inventory_df.iterrows():
-        if pd.notna(row['物料']) and isinstance(row['物料'], str) and row['物料'].startswith('F'):
-            current_material = row['物料']
-            current_desc = row['描述']
-            price_match = price_df[price_df['产品代码'] == current_material]
-            current_price = price_match['单价'].iloc[0] if len(price_match) > 0 else 100
-        elif pd.notna(row['生产日期']) and current_material:
-            prod_date = pd.to_datetime(row['生产日期'])
-            quantity = row['数量'] if pd.notna(row['数量']) else 0
-            batch_no = row['生产批号'] if pd.notna(row['生产批号']) else ''
-            
-            age_days = (datetime.now() - prod_date).days
-            
-            if age_days >= 120:
-                risk_level = '极高风险'
-                risk_color = COLOR_SCHEME['risk_extreme']
-                risk_advice = '🚨 立即7折清库'
-            elif age_days >= 90:
-                risk_level = '高风险'
-                risk_color = COLOR_SCHEME['risk_high'] 
-                risk_advice = '⚠️ 建议8折促销'
-            elif age_days >= 60:
-                risk_level = '中风险'
-                risk_color = COLOR_SCHEME['risk_medium']
-                risk_advice = '📢 适度9折促销'
-            elif age_days >= 30:
-                risk_level = '低风险'
-                risk_color = COLOR_SCHEME['risk_low']
-                risk_advice = '✅ 正常销售'
-            else:
-                risk_level = '极低风险'
-                risk_color = COLOR_SCHEME['risk_minimal']
-                risk_advice = '🌟 新鲜库存'
-            
-            if age_days >= 120:
-                expected_loss = quantity * current_price * 0.3
-            elif age_days >= 90:
-                expected_loss = quantity * current_price * 0.2
-            elif age_days >= 60:
-                expected_loss = quantity * current_price * 0.1
-            else:
-                expected_loss = 0
-            
-            batch_data.append({
-                '物料': current_material,
-                '产品名称': current_desc,
-                '生产日期': prod_date,
-                '生产批号': batch_no,
-                '数量': quantity,
-                '库龄': age_days,
-                '风险等级': risk_level,
-                '风险颜色': risk_color,
-                '处理建议': risk_advice,
-                '单价': current_price,
-                '批次价值': quantity * current_price,
-                '预期损失': expected_loss
-            })
-    
-    processed_inventory = pd.DataFrame(batch_data)
-    forecast_accuracy = calculate_forecast_accuracy(shipment_df, forecast_df)
-    metrics = calculate_key_metrics(processed_inventory, forecast_accuracy)
-    
-    return processed_inventory, forecast_accuracy, shipment_df, forecast_df, metrics, product_name_map
+    return load_and_process_data()
 
-def calculate_forecast_accuracy(shipment_df, forecast_df):
-    """计算预测准确率"""
-    try:
-        shipment_monthly = shipment_df.groupby([
-            shipment_df['订单日期'].dt.to_period('M'),
-            '产品代码'
-        ])['求和项:数量（箱）'].sum().reset_index()
-        shipment_monthly['年月'] = shipment_monthly['订单日期'].dt.to_timestamp()
-        
-        merged = forecast_df.merge(
-            shipment_monthly,
-            left_on=['所属年月', '产品代码'],
-            right_on=['年月', '产品代码'],
-            how='inner'
-        )
-        
-        merged['预测误差'] = abs(merged['预计销售量'] - merged['求和项:数量（箱）'])
-        merged['预测准确率'] = 1 - (merged['预测误差'] / (merged['求和项:数量（箱）'] + 1))
-        merged['预测准确率'] = merged['预测准确率'].clip(0, 1)
-        
-        return merged
-    except:
-        return pd.DataFrame()
+@st.cache_data
+def load_risk_policies(version):
+    """风险策略配置（默认策略在首位）"""
+    return load_policies()
 
-def calculate_key_metrics(processed_inventory, forecast_accuracy):
-    """计算关键指标"""
-    total_batches = len(processed_inventory)
-    high_risk_batches = len(processed_inventory[processed_inventory['风险等级'].isin(['极高风险', '高风险'])])
-    high_risk_ratio = (high_risk_batches / total_batches * 100) if total_batches > 0 else 0
-    
-    total_inventory_value = processed_inventory['批次价值'].sum() / 1000000
-    high_risk_value = processed_inventory[
-        processed_inventory['风险等级'].isin(['极高风险', '高风险'])
-    ]['批次价值'].sum()
-    high_risk_value_ratio = (high_risk_value / processed_inventory['批次价值'].sum() * 100) if processed_inventory['批次价值'].sum() > 0 else 0
-    
-    avg_age = processed_inventory['库龄'].mean()
-    forecast_acc = forecast_accuracy['预测准确率'].mean() * 100 if not forecast_accuracy.empty else 0
-    
-    risk_counts = processed_inventory['风险等级'].value_counts().to_dict()
-    
-    return {
-        'total_batches': int(total_batches),
-        'high_risk_batches': int(high_risk_batches),
-        'high_risk_ratio': round(high_risk_ratio, 1),
-        'total_inventory_value': round(total_inventory_value, 2),
-        'high_risk_value_ratio': round(high_risk_value_ratio, 1),
-        'avg_age': round(avg_age, 0),
-        'forecast_accuracy': round(forecast_acc, 1) if forecast_acc > 0 else 0,
-        'high_risk_value': round(high_risk_value / 1000000, 1),
-        'risk_counts': {
-            'extreme': risk_counts.get('极高风险', 0),
-            'high': risk_counts.get('高风险', 0),
-            'medium': risk_counts.get('中风险', 0),
-            'low': risk_counts.get('低风险', 0),
-            'minimal': risk_counts.get('极低风险', 0)
-        }
-    }
+@st.cache_resource
+def load_timeline(version):
+    """基准日期回溯引擎：预计算各批次进入每个风险档位的日期（只读，跨会话共享）"""
+    processed_inventory = load_data(version)[0]
+    policy = next(iter(load_risk_policies(version).values()))
+    return RiskTimeline(processed_inventory, policy)
 
-# 预测分析相关函数
-def process_forecast_data(shipment_df, forecast_df):
-    """处理预测数据"""
-    # 转换日期格式
-    shipment_df['所属年月'] = shipment_df['订单日期'].dt.strftime('%Y-%m')
-    forecast_df['所属年月'] = forecast_df['所属年月'].dt.strftime('%Y-%m')
-    
-    # 按月份、区域、产品码汇总数据
-    actual_monthly = shipment_df.groupby(['所属年月', '所属区域', '产品代码']).agg({
-        '求和项:数量（箱）': 'sum'
-    }).reset_index()
+@st.cache_resource(max_entries=32)
+def load_as_of_view(version, as_of):
+    """基准日期视图：只重算库龄相关列，并据此计算关键指标与批次明细查询层"""
+    timeline = load_timeline(version)
+    processed_inventory = timeline.at(as_of)
+    metrics = calculate_key_metrics(processed_inventory, load_data(version)[1])
+    return processed_inventory, metrics, BatchQuery(processed_inventory, timeline.policy)
 
-    forecast_monthly = forecast_df.groupby(['所属年月', '所属区域', '产品代码']).agg({
-        '预计销售量': 'sum'
-    }).reset_index()
+@st.cache_data(max_entries=32)
+def load_risk_dashboard(version, as_of):
+    """风险分析仪表盘"""
+    processed_inventory = load_as_of_view(version, as_of)[0]
+    policy = next(iter(load_risk_policies(version).values()))
+    return create_risk_analysis_dashboard(processed_inventory, policy)
 
-    # 合并数据
-    merged_monthly = pd.merge(
-        actual_monthly,
-        forecast_monthly,
-        on=['所属年月', '所属区域', '产品代码'],
-        how='outer'
-    ).fillna(0)
+@st.cache_data(max_entries=32)
+def load_policy_comparison(version, as_of):
+    """各风险策略下的风险分布与预期损失（一次分箱）"""
+    processed_inventory = load_as_of_view(version, as_of)[0]
+    return compare_policies(processed_inventory, load_risk_policies(version).values())
 
-    # 计算准确率
-    merged_monthly['数量准确率'] = merged_monthly.apply(
-        lambda row: max(0, 1 - abs(row['求和项:数量（箱）'] - row['预计销售量']) / (row['求和项:数量（箱）'] + 1)),
-        axis=1
-    )
+@st.cache_data(max_entries=32)
+def load_depletion_view(version, as_of, horizon=6):
+    """库龄推演：月度风险汇总、推演期末关键指标、售罄前将转高风险的批次与推演图"""
+    _, forecast_accuracy, _, forecast_df, _, _, _, _ = load_data(version)
+    processed_inventory, _, _ = load_as_of_view(version, as_of)
+    projection = simulate_depletion(processed_inventory, forecast_df, as_of, horizon,
+                                    next(iter(load_risk_policies(version).values())))
+    summary = projection.summary()
+    final_metrics = calculate_key_metrics(projection.snapshot(projection.months[-1]), forecast_accuracy)
+    at_risk = projection.batches[projection.batches['将转高风险']]
+    at_risk = at_risk.nlargest(100, '批次价值')[['物料', '产品名称', '生产批号', '数量', '库龄', '风险等级',
+                                                '预计售罄日期', '售罄前风险等级', '批次价值']], \
+        int(projection.batches['将转高风险'].sum()), float(at_risk['批次价值'].sum())
+    return summary, final_metrics, at_risk, create_depletion_chart(summary)
 
-    return merged_monthly
+@st.cache_data
+def load_forecast_view(version):
+    """预测对比表、整体指标与预测分析仪表盘"""
+    _, _, shipment_df, forecast_df, _, _, _, actual_monthly = load_data(version)
+    merged_data, accuracy_cube, machine_cube = forecast_analysis(shipment_df, forecast_df, actual_monthly)
+    if merged_data.empty:
+        return merged_data, None, None, None
+    figure = create_forecast_dashboard(merged_data, accuracy_cube, machine_cube)
+    return merged_data, accuracy_cube.total(), machine_cube.total()['准确率'], figure
 
-def create_risk_analysis_dashboard(processed_inventory):
-    """创建紧凑的风险分析仪表盘"""
-    # 风险分布数据
-    risk_counts = processed_inventory['风险等级'].value_counts()
-    risk_value = processed_inventory.groupby('风险等级')['批次价值'].sum() / 1000000
-    
-    colors = [COLOR_SCHEME['risk_extreme'], COLOR_SCHEME['risk_high'], 
-              COLOR_SCHEME['risk_medium'], COLOR_SCHEME['risk_low'], COLOR_SCHEME['risk_minimal']]
-    
-    # 创建2x2子图
-    fig = make_subplots(
-        rows=2, cols=2,
-        subplot_titles=("风险等级分布", "各风险等级价值分布", "库存批次库龄分布", "高风险批次分析"),
-        specs=[[{"type": "pie"}, {"type": "bar"}],
-               [{"type": "histogram"}, {"type": "scatter"}]],
-        vertical_spacing=0.12,
-        horizontal_spacing=0.1
-    )
-    
-    # 1. 风险等级分布饼图
-    fig.add_trace(go.Pie(
-        labels=risk_counts.index,
-        values=risk_counts.values,
-        hole=.4,
-        marker_colors=colors,
-        textinfo='label+percent',
-        showlegend=False
-    ), row=1, col=1)
-    
-    # 2. 风险等级价值分布
-    fig.add_trace(go.Bar(
-        x=risk_value.index,
-        y=risk_value.values,
-        marker_color=colors,
-        text=[f'¥{v:.1f}M' for v in risk_value.values],
-        textposition='auto',
-        showlegend=False
-    ), row=1, col=2)
-    
-    # 3. 库龄分布直方图
-    fig.add_trace(go.Histogram(
-        x=processed_inventory['库龄'],
-        nbinsx=15,
-        marker_color=COLOR_SCHEME['primary'],
-        opacity=0.7,
-        showlegend=False
-    ), row=2, col=1)
-    
-    # 4. 高风险批次散点图
-    high_risk_data = processed_inventory[
-        processed_inventory['风险等级'].isin(['极高风险', '高风险'])
-    ].head(20)
-    
-    if not high_risk_data.empty:
-        fig.add_trace(go.Scatter(
-            x=high_risk_data['库龄'],
-            y=high_risk_data['批次价值'],
-            mode='markers',
-            marker=dict(
-                size=np.clip(high_risk_data['数量']/15, 8, 30),
-                color=high_risk_data['风险等级'].map({
-                    '极高风险': COLOR_SCHEME['risk_extreme'],
-                    '高风险': COLOR_SCHEME['risk_high']
-                }),
-                opacity=0.8,
-                line=dict(width=1, color='white')
-            ),
-            text=high_risk_data['产品名称'],
-            showlegend=False
-        ), row=2, col=2)
-    
-    # 更新布局
-    fig.update_layout(
-        height=700,
-        title_text="库存风险综合分析仪表盘",
-        title_x=0.5,
-        title_font=dict(size=20, color='#333'),
-        showlegend=False
-    )
-    
-    # 添加库龄阈值线
-    fig.add_vline(x=30, line_dash="dash", line_color=COLOR_SCHEME['risk_low'], row=2, col=1)
-    fig.add_vline(x=60, line_dash="dash", line_color=COLOR_SCHEME['risk_medium'], row=2, col=1)
-    fig.add_vline(x=90, line_dash="dash", line_color=COLOR_SCHEME['risk_high'], row=2, col=1)
-    fig.add_vline(x=120, line_dash="dash", line_color=COLOR_SCHEME['risk_extreme'], row=2, col=1)
-    
-    return fig
+@st.cache_data
+def load_error_view(version, by='所属区域'):
+    """误差分布与偏差：对比明细一次构建误差画像（分位数草图），返回汇总表、图表与草图相对误差上限"""
+    merged_data = load_forecast_view(version)[0]
+    if merged_data.empty:
+        return None, None, None
+    profile = ErrorProfile.build(merged_data)
+    return profile.summary(by), create_error_dashboard(profile, by), profile.relative_accuracy
 
-def create_forecast_dashboard(merged_data):
-    """创建预测分析仪表盘 - 按照附件维度"""
-    # 计算各项指标
-    # 1. 全国准确率趋势
-    monthly_national = merged_data.groupby('所属年月').agg({
-        '求和项:数量（箱）': 'sum',
-        '预计销售量': 'sum'
-    }).reset_index()
-    monthly_national['准确率'] = monthly_national.apply(
-        lambda row: max(0, 1 - abs(row['求和项:数量（箱）'] - row['预计销售量']) / (row['求和项:数量（箱）'] + 1)) * 100,
-        axis=1
-    )
-    
-    # 2. 区域准确率对比
-    regional_accuracy = merged_data.groupby('所属区域').agg({
-        '求和项:数量（箱）': 'sum',
-        '预计销售量': 'sum'
-    }).reset_index()
-    regional_accuracy['准确率'] = regional_accuracy.apply(
-        lambda row: max(0, 1 - abs(row['求和项:数量（箱）'] - row['预计销售量']) / (row['求和项:数量（箱）'] + 1)) * 100,
-        axis=1
-    )
-    
-    # 3. 产品准确率分析
-    product_accuracy = merged_data.groupby('产品代码').agg({
-        '求和项:数量（箱）': 'sum',
-        '预计销售量': 'sum'
-    }).reset_index()
-    product_accuracy['准确率'] = product_accuracy.apply(
-        lambda row: max(0, 1 - abs(row['求和项:数量（箱）'] - row['预计销售量']) / (row['求和项:数量（箱）'] + 1)) * 100,
-        axis=1
-    )
-    product_accuracy = product_accuracy.nlargest(10, '求和项:数量（箱）')
-    
-    # 4. 预测准确率分布
-    accuracy_distribution = merged_data['数量准确率'] * 100
-    
-    # 创建2x2子图布局
-    fig = make_subplots(
-        rows=2, cols=2,
-        subplot_titles=("预测准确率月度趋势", "各区域预测准确率对比", "TOP10产品预测准确率", "预测准确率分布"),
-        specs=[[{"type": "scatter"}, {"type": "bar"}],
-               [{"type": "bar"}, {"type": "histogram"}]],
-        vertical_spacing=0.12,
-        horizontal_spacing=0.1
-    )
-    
-    # 1. 月度趋势
-    fig.add_trace(go.Scatter(
-        x=monthly_national['所属年月'],
-        y=monthly_national['准确率'],
-        mode='lines+markers',
-        name='准确率',
-        line=dict(color=COLOR_SCHEME['primary'], width=3),
-        marker=dict(size=8),
-        showlegend=False
-    ), row=1, col=1)
-    
-    # 添加目标线
-    fig.add_hline(y=85, line_dash="dash", line_color="red", row=1, col=1)
-    
-    # 2. 区域对比
-    colors_regional = [COLOR_SCHEME['risk_low'] if acc > 85 else 
-                      COLOR_SCHEME['risk_medium'] if acc > 75 else 
-                      COLOR_SCHEME['risk_high'] for acc in regional_accuracy['准确率']]
-    
-    fig.add_trace(go.Bar(
-        x=regional_accuracy['所属区域'],
-        y=regional_accuracy['准确率'],
-        marker_color=colors_regional,
-        text=[f'{acc:.1f}%' for acc in regional_accuracy['准确率']],
-        textposition='auto',
-        showlegend=False
-    ), row=1, col=2)
-    
-    fig.add_hline(y=85, line_dash="dash", line_color="red", row=1, col=2)
-    
-    # 3. 产品准确率
-    colors_product = [COLOR_SCHEME['risk_low'] if acc > 85 else 
-                     COLOR_SCHEME['risk_medium'] if acc > 75 else 
-                     COLOR_SCHEME['risk_high'] for acc in product_accuracy['准确率']]
-    
-    fig.add_trace(go.Bar(
-        y=product_accuracy['产品代码'],
-        x=product_accuracy['准确率'],
-        orientation='h',
-        marker_color=colors_product,
-        text=[f'{acc:.1f}%' for acc in product_accuracy['准确率']],
-        textposition='auto',
-        showlegend=False
-    ), row=2, col=1)
-    
-    # 4. 准确率分布
-    fig.add_trace(go.Histogram(
-        x=accuracy_distribution,
-        nbinsx=20,
-        marker_color=COLOR_SCHEME['secondary'],
-        opacity=0.7,
-        showlegend=False
-    ), row=2, col=2)
-    
-    # 更新布局
-    fig.update_layout(
-        height=700,
-        title_text="销售预测准确性综合分析仪表盘",
-        title_x=0.5,
-        title_font=dict(size=20, color='#333'),
-        showlegend=False
-    )
-    
-    return fig
+@st.cache_data
+def load_reconciliation(version):
+    """各层级机器预测调和前后的样本内准确率"""
+    actual_monthly = load_data(version)[7]
+    if actual_monthly.empty:
+        return None
+    return reconciliation_accuracy(*reconcile_forecasts(actual_monthly))
+
+@st.cache_data(max_entries=16)
+def load_plan(version, service_level, lead_time, review_period, lot_size):
+    """全部 SKU 的补货计划（一次批量计算）"""
+    processed_inventory, _, _, forecast_df, _, _, _, actual_monthly = load_data(version)
+    return compute_plan(actual_monthly, forecast_df, processed_inventory, service_level=service_level,
+                        lead_time=lead_time, review_period=review_period, lot_size=lot_size)
 
-# 加载数据
+@st.cache_data(max_entries=16)
+def load_snapshot_diff(version, store_version, before, after):
+    """两个库存快照之间的批次变动（磁盘上另按快照对缓存）"""
+    price_index = load_data(version)[6]
+    return InventoryStore().diff(price_index, before, after)
+
+# 加载数据（数据源列名或类型不符时给出具体的列、行号与示例值）
 with st.spinner('🔄 正在加载数据...'):
-    processed_inventory, forecast_accuracy, shipment_df, forecast_df, metrics, product_name_map = load_and_process_data()
+    loaded = False
+    try:
+        version = data_version()
+        processed_inventory, forecast_accuracy, shipment_df, forecast_df, metrics, product_name_map, price_index, _ = \
+            load_data(version)
+        loaded = True
+    except SchemaError as error:
+        st.error(f"数据源校验失败：{error}")
+        st.stop()
+    finally:
+        # 加载失败时本次运行到此结束，先停止计时（恢复上下文，释放 tracemalloc）
+        if not loaded and timings is not None:
+            timings.stop()
 
 # 页面标题
 st.markdown("""
@@ -719,12 +443,28 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# 分析基准日期：默认为今天（跨零点自动更新），拖动时只重算库龄相关列
+today = date.today()
+as_of = st.slider(
+    "📅 分析基准日期",
+    min_value=today - timedelta(days=365),
+    max_value=today + timedelta(days=180),
+    value=today,
+    format="YYYY-MM-DD"
+)
+processed_inventory, metrics, batch_query = load_as_of_view(version, as_of)
+if as_of != today:
+    not_produced = len(load_timeline(version)) - len(processed_inventory)
+    st.caption(f"当前按 {as_of:%Y-%m-%d} 回溯/推演库龄与风险等级（今天为 {today:%Y-%m-%d}）"
+               + (f"，已排除 {not_produced:,} 个晚于基准日期生产的批次" if not_produced else ""))
+
 # 创建标签页
-tab1, tab2, tab3, tab4 = st.tabs([
+tab1, tab2, tab3, tab4, tab5 = st.tabs([
     "📊 核心指标总览",
     "🎯 风险分布分析", 
     "💡 销售预测准确性分析",
-    "📋 批次详情"
+    "📋 批次详情",
+    "🏭 生产计划"
 ])
 
 # 标签1：核心指标总览
@@ -822,7 +562,7 @@ with tab2:
     
     # 单个紧凑的仪表盘
     st.markdown('<div class="analysis-card">', unsafe_allow_html=True)
-    risk_dashboard = create_risk_analysis_dashboard(processed_inventory)
+    risk_dashboard = load_risk_dashboard(version, as_of)
     st.plotly_chart(risk_dashboard, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
     
@@ -838,6 +578,41 @@ with tab2:
         </div>
     </div>
     """, unsafe_allow_html=True)
+    
+    # 风险策略对比（配置了多个策略时显示）
+    if len(load_risk_policies(version)) > 1:
+        with st.expander("📐 风险策略对比"):
+            comparison = load_policy_comparison(version, as_of).copy()
+            comparison['批次价值'] = [f"¥{x/1000000:.2f}M" for x in comparison['批次价值']]
+            comparison['预期损失'] = [f"¥{x/1000000:.2f}M" for x in comparison['预期损失']]
+            st.dataframe(comparison, use_container_width=True, hide_index=True)
+    
+    # 库龄推演：按月度预测销量先进先出消耗批次
+    st.markdown("### 🔮 库龄推演")
+    depletion_summary, final_metrics, (at_risk, at_risk_count, at_risk_value), depletion_chart = \
+        load_depletion_view(version, as_of)
+    st.markdown('<div class="analysis-card">', unsafe_allow_html=True)
+    st.plotly_chart(depletion_chart, use_container_width=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    last_month = depletion_summary['月份'].iloc[-1]
+    st.markdown(f"""
+    <div class="insight-box">
+        <div class="insight-title">🔮 推演洞察</div>
+        <div class="insight-content">
+            • <strong>售罄前将升级：</strong>{at_risk_count:,} 个批次在预计售罄前将进入高风险及以上，当前价值 ¥{at_risk_value/1000000:.1f}M<br>
+            • <strong>{last_month} 月末：</strong>剩余 {final_metrics['total_batches']:,} 个批次，高风险占比 {final_metrics['high_risk_ratio']:.1f}%，高风险价值 ¥{final_metrics['high_risk_value']:.1f}M<br>
+            • <strong>口径：</strong>各物料批次按生产日期先进先出消耗各区域预计销售量之和；推演期内缺少预测的月份按该物料已有预测的月均值补齐
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    if at_risk_count:
+        with st.expander(f"⏳ 售罄前将转高风险的批次（按价值前 {len(at_risk)} 个）"):
+            display = at_risk.copy()
+            display['预计售罄日期'] = display['预计售罄日期'].dt.strftime('%Y-%m-%d').fillna('推演期内未售罄')
+            display['批次价值'] = [f"¥{x:,.0f}" for x in display['批次价值']]
+            st.dataframe(display, use_container_width=True, hide_index=True)
 
 # 标签3：预测准确性分析 - 完全按照附件维度
 with tab3:
@@ -845,13 +620,14 @@ with tab3:
     
     # 处理预测数据
     if not forecast_accuracy.empty and not shipment_df.empty and not forecast_df.empty:
-        merged_data = process_forecast_data(shipment_df, forecast_df)
+        # 合并结果、准确率立方体与仪表盘按数据版本缓存
+        merged_data, overall_metrics, machine_accuracy, forecast_dashboard = load_forecast_view(version)
         
         if not merged_data.empty:
             # 计算关键指标
-            total_actual = merged_data['求和项:数量（箱）'].sum()
-            total_forecast = merged_data['预计销售量'].sum()
-            overall_accuracy = max(0, 1 - abs(total_actual - total_forecast) / (total_actual + 1)) * 100
+            total_actual = overall_metrics['求和项:数量（箱）']
+            total_forecast = overall_metrics['预计销售量']
+            overall_accuracy = overall_metrics['准确率']
             
             # 关键指标展示
             col1, col2, col3, col4 = st.columns(4)
@@ -896,16 +672,37 @@ with tab3:
             
             # 预测分析仪表盘
             st.markdown('<div class="analysis-card">', unsafe_allow_html=True)
-            forecast_dashboard = create_forecast_dashboard(merged_data)
             st.plotly_chart(forecast_dashboard, use_container_width=True)
             st.markdown('</div>', unsafe_allow_html=True)
             
+            # 误差分布与偏差
+            with st.expander("📉 误差分布与偏差分析"):
+                error_by = st.radio("分析维度", options=['所属区域', '产品代码'], horizontal=True,
+                                    format_func=lambda d: d.replace('所属', ''))
+                error_summary, error_chart, error_accuracy = load_error_view(version, error_by)
+                st.plotly_chart(error_chart, use_container_width=True)
+                st.dataframe(error_summary.round(1), use_container_width=True, hide_index=True)
+                st.caption(f"P50/P90 为(月份×区域×产品)明细绝对误差的分位数（草图近似，相对误差≤{error_accuracy:.0%}）；"
+                           "偏差 = (预测 - 实际) / 实际，正值为高估")
+            
+            # 层级调和：各层级独立拟合的机器预测调和前后对比
+            with st.expander("🧮 层级预测调和"):
+                reconciliation = load_reconciliation(version)
+                if reconciliation is not None:
+                    wmape = reconciliation.pivot(index='层级', columns='方法', values='WMAPE')
+                    wmape = wmape.reindex(index=reconciliation['层级'].unique(), columns=reconciliation['方法'].unique())
+                    st.dataframe(wmape.round(1), use_container_width=True)
+                    st.caption("各层级机器预测样本内一步 WMAPE(%)：base 为各层级独立预测（不一致），bottom_up / top_down / "
+                               "wls / mint 调和后区域×产品预测之和与区域、产品、全国预测一致")
+            
             # 改进建议
             st.markdown(f"""
             <div class="insight-box">
                 <div class="insight-title">💡 预测改进建议</div>
                 <div class="insight-content">
                     • <strong>整体表现：</strong>当前准确率{overall_accuracy:.1f}%，{'已达到目标' if overall_accuracy >= 85 else '需要改进'}<br>
+                    • <strong>误差指标：</strong>WMAPE {overall_metrics['WMAPE']:.1f}%，MAPE {overall_metrics['MAPE']:.1f}%，整体偏差 {overall_metrics['偏差']:+.1f}%（正值为高估）<br>
+                    • <strong>机器基线：</strong>统计模型（指数平滑/Croston）同期准确率{machine_accuracy:.1f}%，人工预测{'领先' if overall_accuracy >= machine_accuracy else '落后'} {abs(overall_accuracy - machine_accuracy):.1f} 个百分点<br>
                     • <strong>重点关注：</strong>加强季节性因子分析，提升历史数据权重<br>
                     • <strong>区域优化：</strong>针对准确率低于75%的区域制定专项改进计划<br>
                     • <strong>产品优化：</strong>重点提升TOP10产品的预测精度，增加市场趋势调研
@@ -928,7 +725,7 @@ with tab4:
     with col1:
         risk_filter = st.selectbox(
             "选择风险等级",
-            options=['全部'] + list(processed_inventory['风险等级'].unique()),
+            options=['全部'] + batch_query.risk_levels,
             index=0
         )
     
@@ -936,67 +733,171 @@ with tab4:
         min_value = st.number_input(
             "最小批次价值",
             min_value=0,
-            max_value=int(processed_inventory['批次价值'].max()),
+            max_value=int(batch_query.values.max()) if len(batch_query) else 0,
             value=0
         )
     
     with col3:
+        max_age_limit = int(batch_query.ages.max()) if len(batch_query) else 0
         max_age = st.number_input(
             "最大库龄(天)",
             min_value=0,
-            max_value=int(processed_inventory['库龄'].max()),
-            value=int(processed_inventory['库龄'].max())
+            max_value=max_age_limit,
+            value=max_age_limit
         )
     st.markdown('</div>', unsafe_allow_html=True)
     
-    # 应用筛选
-    filtered_data = processed_inventory.copy()
-    
-    if risk_filter != '全部':
-        filtered_data = filtered_data[filtered_data['风险等级'] == risk_filter]
-    
-    filtered_data = filtered_data[
-        (filtered_data['批次价值'] >= min_value) &
-        (filtered_data['库龄'] <= max_age)
-    ]
+    # 应用筛选（基于预建索引，只返回行号）
+    positions = batch_query.filter(
+        risk=None if risk_filter == '全部' else risk_filter,
+        min_value=min_value,
+        max_age=max_age
+    )
+    summary = batch_query.summary(positions)
     
     # 筛选结果
     st.markdown(f"""
     <div class="insight-box">
         <div class="insight-title">📊 筛选结果统计</div>
         <div class="insight-content">
-            筛选出 <strong>{len(filtered_data)}</strong> 个批次，总价值 <strong>¥{filtered_data['批次价值'].sum()/1000000:.2f}M</strong>，
-            平均库龄 <strong>{filtered_data['库龄'].mean():.0f}</strong> 天
+            筛选出 <strong>{summary['count']}</strong> 个批次，总价值 <strong>¥{summary['total_value']/1000000:.2f}M</strong>，
+            平均库龄 <strong>{summary['avg_age']:.0f}</strong> 天
         </div>
     </div>
     """, unsafe_allow_html=True)
     
-    # 数据表格
-    if not filtered_data.empty:
+    if price_index.fallbacks:
+        with st.expander(f"⚠️ {len(price_index.fallbacks)} 个物料未匹配单价，按默认单价 ¥{price_index.default} 计算"):
+            st.dataframe(price_index.fallback_report(), use_container_width=True)
+    
+    # 数据表格（服务端分页，只格式化当前页）
+    if summary['count'] > 0:
         st.markdown('<div class="analysis-card">', unsafe_allow_html=True)
-        display_columns = ['物料', '产品名称', '生产日期', '生产批号', '数量', '库龄', '风险等级', '批次价值', '处理建议']
-        display_data = filtered_data[display_columns].copy()
+        page_col1, page_col2 = st.columns([1, 3])
+        with page_col1:
+            page_size = st.selectbox("每页条数", options=[50, 100, 200, 500], index=1)
+        page_count = BatchQuery.page_count(positions, page_size)
+        with page_col2:
+            page = st.number_input("页码", min_value=1, max_value=page_count, value=1)
         
-        display_data['批次价值'] = display_data['批次价值'].apply(lambda x: f"¥{x:,.0f}")
-        display_data['生产日期'] = display_data['生产日期'].dt.strftime('%Y-%m-%d')
+        st.dataframe(batch_query.page(positions, page, page_size), use_container_width=True, height=400)
+        st.caption(f"第 {page} / {page_count} 页，共 {summary['count']:,} 条")
         
-        risk_order = {'极高风险': 0, '高风险': 1, '中风险': 2, '低风险': 3, '极低风险': 4}
-        display_data['风险排序'] = display_data['风险等级'].map(risk_order)
-        display_data = display_data.sort_values(['风险排序', '库龄'], ascending=[True, False])
-        display_data = display_data.drop('风险排序', axis=1)
+        # 导出：仅在点击时分块写入临时文件，普通交互不做全量序列化
+        export_col1, export_col2 = st.columns([1, 3])
+        with export_col1:
+            export_format = st.selectbox("导出格式", options=list(EXPORT_FORMATS), format_func=str.upper)
+        export_key = (version, as_of, risk_filter, min_value, max_age, export_format)
+        # 筛选条件变化后旧导出文件即失效并删除；会话结束时 ExportFile 被回收，文件随之删除
+        export_file = st.session_state.get('export_file')
+        if export_file and export_file.key != export_key:
+            export_file.discard()
+            export_file = st.session_state['export_file'] = None
+        with export_col2:
+            st.markdown("<br>", unsafe_allow_html=True)
+            if st.button("📦 生成导出文件"):
+                if export_file:
+                    export_file.discard()
+                with st.spinner("正在分块写入导出文件..."):
+                    export_file = ExportFile(write_export(batch_query, positions, export_format), export_key)
+                    st.session_state['export_file'] = export_file
         
-        st.dataframe(display_data, use_container_width=True, height=400)
+        if export_file and os.path.exists(export_file.path):
+            mime, suffix = EXPORT_FORMATS[export_format]
+            # 延迟下载：点击时才读取文件，普通重跑不把导出内容载入内存
+            st.download_button(
+                label="📥 下载筛选结果",
+                data=export_file.read,
+                file_name=f"库存分析_{datetime.now().strftime('%Y%m%d')}{suffix}",
+                mime=mime
+            )
+        st.markdown('</div>', unsafe_allow_html=True)
+    else:
+        st.warning("没有符合筛选条件的数据")
+    
+    # 库存快照对比（python -m analytics.warehouse ingest 导入两个及以上快照日期后显示）
+    inventory_store = InventoryStore()
+    snapshot_dates = inventory_store.snapshots()
+    if len(snapshot_dates) >= 2:
+        with st.expander("🔄 库存快照对比"):
+            snap_col1, snap_col2 = st.columns(2)
+            with snap_col1:
+                before = st.selectbox("前一快照", options=snapshot_dates[:-1], index=len(snapshot_dates) - 2)
+            with snap_col2:
+                later = [d for d in snapshot_dates if d > before]
+                after = st.selectbox("后一快照", options=later, index=len(later) - 1)
+            snapshot_diff = load_snapshot_diff(version, inventory_store.version, before, after)
+            diff_table = diff_summary(snapshot_diff)
+            st.dataframe(diff_table.assign(价值变化=diff_table['价值变化'] / 1000000).rename(
+                columns={'价值变化': '价值变化(¥M)'}).round(2), use_container_width=True, hide_index=True)
+            moved = snapshot_diff[(snapshot_diff['变动类型'] != '未变动') | snapshot_diff['风险升级']]
+            st.caption(f"{len(moved):,} 个批次有变动或风险升级，按价值变化绝对值列出前 200 个")
+            st.dataframe(moved.loc[moved['价值变化'].abs().nlargest(200).index].round(1),
+                         use_container_width=True, height=360, hide_index=True)
+
+# 标签5：生产计划
+with tab5:
+    st.markdown("### 🏭 补货与生产计划")
+    
+    st.markdown('<div class="analysis-card">', unsafe_allow_html=True)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        service_level = st.selectbox("服务水平", options=[0.90, 0.95, 0.98, 0.99], index=1,
+                                     format_func=lambda v: f"{v:.0%}")
+    with col2:
+        lead_time = st.number_input("生产提前期(月)", min_value=1, max_value=6, value=1)
+    with col3:
+        review_period = st.number_input("盘点周期(月)", min_value=1, max_value=6, value=1)
+    with col4:
+        lot_size = st.number_input("生产批量(箱)", min_value=1, value=1)
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    if forecast_df.empty or shipment_df.empty:
+        st.warning("缺少出货或预测数据，无法生成生产计划")
+    else:
+        plan = load_plan(version, service_level, lead_time, review_period, lot_size)
+        needed = plan[plan['需要补货']].sort_values('建议生产量', ascending=False)
         
-        csv = display_data.to_csv(index=False, encoding='utf-8-sig')
+        st.markdown(f"""
+        <div class="insight-box">
+            <div class="insight-title">📊 计划汇总</div>
+            <div class="insight-content">
+                共 <strong>{len(plan):,}</strong> 个 SKU，其中 <strong>{len(needed):,}</strong> 个在库已低于再订货点，
+                建议生产 <strong>{needed['建议生产量'].sum():,.0f}</strong> 箱；
+                在库中 <strong>{plan['高风险库存'].sum():,.0f}</strong> 箱处于高风险及以上
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        only_needed = st.checkbox("只显示需要补货的 SKU", value=True)
+        shown = needed if only_needed else plan
+        st.dataframe(shown.round(1), use_container_width=True, height=400)
+        # 计划参数变化时才重新写出导出文件，下载时才读取；旧文件随参数变化或会话结束删除
+        plan_key = (version, service_level, lead_time, review_period, lot_size)
+        plan_file = st.session_state.get('plan_file')
+        if plan_file is None or plan_file.key != plan_key:
+            if plan_file is not None:
+                plan_file.discard()
+            plan_path = write_export(FrameQuery(plan), range(len(plan)), 'csv', columns=list(plan.columns),
+                                     prefix='生产计划_')
+            plan_file = ExportFile(plan_path, plan_key)
+            st.session_state['plan_file'] = plan_file
         st.download_button(
-            label="📥 下载筛选结果",
-            data=csv,
-            file_name=f"库存分析_{datetime.now().strftime('%Y%m%d')}.csv",
+            label="📥 下载生产计划",
+            data=plan_file.read,
+            file_name=f"生产计划_{datetime.now().strftime('%Y%m%d')}.csv",
             mime="text/csv"
         )
-        st.markdown('</div>', unsafe_allow_html=True)
-    else:
-        st.warning("没有符合筛选条件的数据")
+
+# 性能计时（仅管理员）
+if timings is not None:
+    timings.stop()
+    with st.expander("⏱️ 性能计时"):
+        timing_df = timings.to_frame()
+        st.caption(f"本次运行总耗时 {timings.elapsed:.2f}s，记录 {len(timing_df)} 个阶段"
+                   f"（已写入 {timings.write_json(TIMINGS_FILE)}；完整剖析请用 python -m analytics --profile）")
+        timing_df['阶段'] = ['　' * level + name for level, name in zip(timing_df.pop('层级'), timing_df['阶段'])]
+        st.dataframe(timing_df, use_container_width=True, hide_index=True)
 
 # 页脚
 st.markdown("---")